@@ -83,8 +83,17 @@ REST_FRAMEWORK = {
      'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
       ],
+     'DEFAULT_RENDERER_CLASSES': [
+        'copoapp.json_backend.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+      ],
 }
 
+# Encode JsonResponse and DRF responses with orjson (falls back to the stdlib
+# encoder when orjson is not installed). The values are the same but the bytes
+# differ: compact separators and raw UTF-8 instead of \uXXXX escapes.
+COPO_FAST_JSON = True
+
 SIMPLE_JWT = {
      'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
      'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -92,6 +101,39 @@ SIMPLE_JWT = {
      'BLACKLIST_AFTER_ROTATION': True
 }
 
+# Keyset pagination for large list endpoints (opt-in via ?page_size= or ?cursor=)
+COPO_PAGE_SIZE = 100
+COPO_MAX_PAGE_SIZE = 1000
+# Rows fetched per cursor round trip when a list is streamed (?stream=true)
+COPO_STREAM_CHUNK_SIZE = 2000
+
+# Rows read and committed at a time by the CSV importers
+COPO_IMPORT_CHUNK_SIZE = 5000
+# Skipped or failing rows listed in an import result
+COPO_IMPORT_MAX_ERRORS = 500
+# Failing rows listed in a dry_run=true validation report
+COPO_DRY_RUN_MAX_ERRORS = 500
+
+# Processes used to hash passwords during bulk faculty onboarding (None = one per CPU)
+COPO_HASH_WORKERS = None
+
+# CO attainment: students scoring TARGET_PERCENT of a CO's marks attain it, and the
+# CO gets the highest level whose percentage of attaining students is reached
+COPO_ATTAINMENT = {
+    "TARGET_PERCENT": 60,
+    "LEVELS": {3: 70, 2: 60, 1: 50},
+}
+
+# Background job queue (manage.py run_jobs)
+COPO_JOB_WORKERS = 2
+COPO_JOB_POLL_INTERVAL = 1.0
+# Longest pause of a worker retrying after a database error ("database is locked")
+COPO_JOB_MAX_BACKOFF = 30.0
+# Finished jobs, and files they produced such as exam previews, are kept this long
+COPO_JOB_RETENTION_DAYS = 7
+# Seconds between two sweeps of expired jobs by an idle worker
+COPO_JOB_SWEEP_INTERVAL = 3600
+
 WSGI_APPLICATION = "copo.wsgi.application"
 
 
@@ -106,6 +148,32 @@ DATABASES = {
 }
 
 
+# Cache
+# Reference data responses are cached under per-entity version keys that are
+# bumped on every write. Both caches are file based so that every worker
+# process sees the same versions. The versions live in a cache of their own:
+# culling response bodies must never reset a version and bring old bodies
+# back. Hit/miss stats are counted in memory, per worker process.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "cache" / "responses",
+        "TIMEOUT": None,
+        "OPTIONS": {"MAX_ENTRIES": 1000},
+    },
+    "versions": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "cache" / "versions",
+        "TIMEOUT": None,
+        # A few keys per entity and cached view; never reached, so never culled
+        "OPTIONS": {"MAX_ENTRIES": 1000000},
+    },
+}
+COPO_RESPONSE_CACHE = "default"
+COPO_VERSION_CACHE = "versions"
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CopoappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'copoapp'
+
+    def ready(self):
+        from . import signals
+
+        signals.connect_counters()
+        signals.connect_response_cache()
+        signals.connect_attainment()
+        signals.connect_scoring()
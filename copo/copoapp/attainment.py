@@ -0,0 +1,287 @@
+import numpy as np
+from django.conf import settings
+
+from .mapping import TARGETS, dense
+from .models import CO, PO, PSO, Batch, ExamQuestion, InternalExam, InternalMark, QuestionMark
+
+# Students reaching TARGET_PERCENT of a CO's marks count as having attained it;
+# the CO's level is the highest one whose share of such students is reached.
+DEFAULT_ATTAINMENT = {
+    "TARGET_PERCENT": 60,
+    "LEVELS": {3: 70, 2: 60, 1: 50},
+}
+
+
+def get_config():
+    return {**DEFAULT_ATTAINMENT, **getattr(settings, "COPO_ATTAINMENT", {})}
+
+
+def compute(marks, max_marks, incidence, target_percent=None, levels=None):
+    """CO attainment from a marks matrix, with matrix operations only.
+
+    ``marks`` is students x assessments (NaN where a student has no mark),
+    ``max_marks`` the maximum of each assessment and ``incidence``
+    assessments x COs, the share of each assessment's marks that tests each
+    CO. Returns per-CO arrays: average score percentage, percentage of
+    assessed students reaching the target, attainment level and number of
+    students assessed.
+    """
+    config = get_config()
+    target_percent = config["TARGET_PERCENT"] if target_percent is None else target_percent
+    levels = config["LEVELS"] if levels is None else levels
+
+    marks = np.asarray(marks, dtype=float)
+    incidence = np.asarray(incidence, dtype=float)
+    present = ~np.isnan(marks)
+    obtained = np.where(present, marks, 0.0) @ incidence
+    possible = (present * np.asarray(max_marks, dtype=float)) @ incidence
+
+    assessed = possible > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = np.where(assessed, obtained / possible * 100, np.nan)
+        reached = (score >= target_percent).sum(axis=0)
+        counted = assessed.sum(axis=0)
+        attainment = np.where(counted > 0, reached / counted * 100, np.nan)
+        average = np.where(counted > 0, np.nansum(score, axis=0) / counted, np.nan)
+
+    level_values = np.array(sorted(levels), dtype=int)
+    cuts = np.array([levels[level] for level in level_values], dtype=float)
+    level = np.where(attainment[:, None] >= cuts[None, :], level_values[None, :], 0).max(axis=1, initial=0)
+    return {
+        "average_percent": average,
+        "attainment_percent": attainment,
+        "level": level,
+        "students_assessed": counted,
+    }
+
+
+def group_slices(keys, values):
+    """Slices of the rows of ``keys`` (sorted) equal to each of ``values``."""
+    return zip(np.searchsorted(keys, values, "left"), np.searchsorted(keys, values, "right"))
+
+
+def assemble(cos, exams, questions, rows, question_rows):
+    """Matrices of one batch from its COs, exams (id, max marks), questions
+    (exam, question, CO, marks), exam marks (student, exam, marks) and
+    question marks (student, question, marks) rows.
+
+    An exam with question-level marks is assessed question by question, each
+    question a column on its own CO; any other exam is one column whose marks
+    are shared between COs in proportion to the marks of its questions.
+    """
+    exam_ids = exams[:, 0].astype(int)
+    co_ids = np.array([co_id for co_id, _ in cos], dtype=int)
+
+    # Questions on another course's COs are ignored
+    on_course = np.isin(questions[:, 2], co_ids)
+    question_max = np.nan_to_num(questions[:, 3])
+    question_cos = np.zeros((len(questions), len(co_ids)))
+    question_cos[np.flatnonzero(on_course), np.searchsorted(co_ids, questions[on_course, 2])] = 1
+    question_exams = np.searchsorted(exam_ids, questions[:, 0])
+    weights = np.zeros((len(exam_ids), len(co_ids)))
+    np.add.at(weights, question_exams, question_cos * question_max[:, None])
+    exam_question_marks = weights.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        exam_incidence = np.where(exam_question_marks[:, None] > 0, weights / exam_question_marks[:, None], 0.0)
+    # Exams without max_marks are marked out of their questions
+    exam_max = np.where(np.nan_to_num(exams[:, 1]) > 0, exams[:, 1], exam_question_marks)
+
+    by_question = np.zeros(len(exam_ids), dtype=bool)
+    by_question[question_exams[np.isin(questions[:, 1], question_rows[:, 1])]] = True
+    whole_exams = np.flatnonzero(~by_question)
+    split = np.flatnonzero(by_question[question_exams])
+    question_ids = questions[split, 1].astype(int)
+
+    rows = rows[np.isin(rows[:, 1], exam_ids[whole_exams])]
+    students, student_rows = np.unique(
+        np.concatenate([rows[:, 0], question_rows[:, 0]]).astype(int), return_inverse=True
+    )
+    marks = np.full((len(students), len(whole_exams) + len(split)), np.nan)
+    marks[student_rows[:len(rows)], np.searchsorted(exam_ids[whole_exams], rows[:, 1])] = rows[:, 2]
+    marks[student_rows[len(rows):], len(whole_exams) + np.searchsorted(question_ids, question_rows[:, 1])] = (
+        question_rows[:, 2]
+    )
+
+    return {
+        "cos": cos,
+        "exams": exam_ids,
+        "students": students,
+        "marks": marks,
+        "max_marks": np.concatenate([exam_max[whole_exams], question_max[split]]),
+        "incidence": np.vstack([exam_incidence[whole_exams], question_cos[split]]),
+    }
+
+
+def load_batches(batches):
+    """Marks matrix, maximum marks and assessment x CO incidence of each batch, in five queries.
+
+    Each internal exam is one assessment, unless it has question-level
+    marks; see ``assemble``. Returns {batch_id: matrices}.
+    """
+    batch_ids = sorted(batch.pk for batch in batches)
+    cos_by_course = {}
+    for co_id, co_label, course_id in (
+        CO.objects.filter(course_id__in={batch.course_id for batch in batches})
+        .order_by("co_id").values_list("co_id", "co_label", "course_id")
+    ):
+        cos_by_course.setdefault(course_id, []).append((co_id, co_label))
+
+    def table(queryset, columns):
+        # Rows sorted by batch, so each batch is one contiguous slice
+        return np.array(list(queryset), dtype=float).reshape(-1, columns)
+
+    exams = table(
+        InternalExam.objects.filter(batch_id__in=batch_ids).order_by("batch_id", "int_exam_id")
+        .values_list("batch_id", "int_exam_id", "max_marks"),
+        3,
+    )
+    questions = table(
+        ExamQuestion.objects.filter(section__internal_exam__batch_id__in=batch_ids)
+        .order_by("section__internal_exam__batch_id", "q_id")
+        .values_list(
+            "section__internal_exam__batch_id", "section__internal_exam_id", "q_id",
+            "question_bank__co_id", "question_bank__marks",
+        ),
+        5,
+    )
+    rows = table(
+        InternalMark.objects.filter(internal_exam__batch_id__in=batch_ids).order_by("internal_exam__batch_id")
+        .values_list("internal_exam__batch_id", "student_id", "internal_exam_id", "marks"),
+        4,
+    )
+    question_rows = table(
+        QuestionMark.objects.filter(exam_question__section__internal_exam__batch_id__in=batch_ids)
+        .order_by("exam_question__section__internal_exam__batch_id")
+        .values_list("exam_question__section__internal_exam__batch_id", "student_id", "exam_question_id", "marks"),
+        4,
+    )
+
+    courses = {batch.pk: batch.course_id for batch in batches}
+    return {
+        batch_id: assemble(
+            cos_by_course.get(courses[batch_id], []),
+            exams[e0:e1, 1:], questions[q0:q1, 1:], rows[r0:r1, 1:], question_rows[m0:m1, 1:],
+        )
+        for batch_id, (e0, e1), (q0, q1), (r0, r1), (m0, m1) in zip(
+            batch_ids,
+            group_slices(exams[:, 0], batch_ids),
+            group_slices(questions[:, 0], batch_ids),
+            group_slices(rows[:, 0], batch_ids),
+            group_slices(question_rows[:, 0], batch_ids),
+        )
+    }
+
+
+def load_batch(batch):
+    return load_batches([batch])[batch.pk]
+
+
+def batch_attainment(batch):
+    """CO attainment of a batch as a JSON-ready dict, computed live from its marks."""
+    data = load_batch(batch)
+    config = get_config()
+    result = compute(data["marks"], data["max_marks"], data["incidence"], config["TARGET_PERCENT"], config["LEVELS"])
+
+    def number(value):
+        return None if np.isnan(value) else round(float(value), 2)
+
+    return {
+        "batch_id": batch.pk,
+        "students": len(data["students"]),
+        "assessments": len(data["exams"]),
+        "target_percent": config["TARGET_PERCENT"],
+        "cos": [
+            {
+                "co_id": co_id,
+                "co_label": co_label,
+                "average_percent": number(result["average_percent"][i]),
+                "attainment_percent": number(result["attainment_percent"][i]),
+                "level": int(result["level"][i]),
+                "students_assessed": int(result["students_assessed"][i]),
+            }
+            for i, (co_id, co_label) in enumerate(data["cos"])
+        ],
+    }
+
+
+def rollup(co_levels, strengths):
+    """PO (or PSO) attainment as the strength-weighted mean of the levels of mapped COs.
+
+    ``co_levels`` has one level per CO (NaN when not assessed), ``strengths``
+    is COs x targets. Returns the attainment of each target (NaN when none
+    of its COs was assessed) and the number of assessed COs mapped to it.
+    """
+    co_levels = np.asarray(co_levels, dtype=float)
+    strengths = np.asarray(strengths, dtype=float)
+    assessed = ~np.isnan(co_levels)
+    weight = assessed @ strengths
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = np.where(weight > 0, np.where(assessed, co_levels, 0.0) @ strengths / weight, np.nan)
+    return value, assessed.astype(int) @ (strengths > 0).astype(int)
+
+
+def mean_levels(co_ids, levels):
+    """Mean level of each CO over the batches that assessed it (NaN levels are not assessed)."""
+    co_ids, index = np.unique(np.asarray(co_ids, dtype=int), return_inverse=True)
+    levels = np.asarray(levels, dtype=float)
+    counts = np.bincount(index, weights=~np.isnan(levels), minlength=len(co_ids))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = np.bincount(index, weights=np.nan_to_num(levels), minlength=len(co_ids)) / counts
+    return co_ids, means
+
+
+def programme_targets(programme):
+    return {
+        "po": PO.objects.filter(level_id=programme.level_id).order_by("id"),
+        "pso": PSO.objects.filter(programme=programme).order_by("pso_id"),
+    }
+
+
+def rollup_targets(programme, co_ids, co_levels):
+    """{"pos": [...], "psos": [...]} attainment of a programme's POs and PSOs, two queries each."""
+    data = {}
+    for target, queryset in programme_targets(programme).items():
+        mapping_model, _, field = TARGETS[target]
+        columns = list(queryset.values_list("pk", f"{field}_label"))
+        column_ids = [pk for pk, _ in columns]
+        pairs = mapping_model.objects.filter(co_id__in=co_ids.tolist(), **{f"{field}_id__in": column_ids})
+        strengths = dense(pairs.values_list("co_id", f"{field}_id", "strength"), co_ids, column_ids)
+        value, mapped = rollup(co_levels, strengths)
+        data[f"{target}s"] = [
+            {
+                "id": pk,
+                "label": label,
+                "attainment": None if np.isnan(value[i]) else round(float(value[i]), 2),
+                "cos_mapped": int(mapped[i]),
+            }
+            for i, (pk, label) in enumerate(columns)
+        ]
+    return data
+
+
+def programme_attainment(programme, year=None):
+    """PO and PSO attainment of a programme, rolled up live from the marks of its courses.
+
+    A programme's courses are those of its department; their batches of
+    ``year`` (all active batches by default) are assessed, and a CO taught in
+    several batches counts with its mean level. Runs a constant number of
+    queries however many courses the programme has.
+    """
+    batches = Batch.objects.filter(course__dept_id=programme.dept_id)
+    batches = list(batches.filter(year=year) if year else batches.filter(active=True))
+    config = get_config()
+
+    co_ids, levels = [np.empty(0, dtype=int)], [np.empty(0)]
+    for data in load_batches(batches).values():
+        result = compute(data["marks"], data["max_marks"], data["incidence"], config["TARGET_PERCENT"], config["LEVELS"])
+        co_ids.append(np.array([co_id for co_id, _ in data["cos"]], dtype=int))
+        levels.append(np.where(result["students_assessed"] > 0, result["level"], np.nan))
+    co_ids, co_levels = mean_levels(np.concatenate(co_ids), np.concatenate(levels))
+
+    return {
+        "programme_id": programme.pk,
+        "year": year,
+        "batches": len(batches),
+        "cos_assessed": int((~np.isnan(co_levels)).sum()),
+        **rollup_targets(programme, co_ids, co_levels),
+    }
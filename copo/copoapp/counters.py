@@ -0,0 +1,55 @@
+from django.db import connection
+from django.db.models import F
+
+from .models import Batch, Course, DashboardCounter, Faculty, Level, Programme, Student
+
+# Dashboard counter name -> model whose rows it counts
+COUNTED_MODELS = {
+    "faculty": Faculty,
+    "courses": Course,
+    "batches": Batch,
+    "students": Student,
+    "levels": Level,
+    "programmes": Programme,
+}
+
+
+def bump(name, delta):
+    """Adjust a counter in the caller's transaction.
+
+    Called by the model signals and by bulk importers, whose bulk_create
+    calls do not send signals.
+    """
+    if delta:
+        DashboardCounter.objects.filter(name=name).update(value=F("value") + delta)
+
+
+def reconcile():
+    """Recount every table in one round trip and store the results."""
+    names = list(COUNTED_MODELS)
+    selects = ", ".join(
+        f"(SELECT COUNT(*) FROM {COUNTED_MODELS[name]._meta.db_table})" for name in names
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {selects}")
+        counts = dict(zip(names, cursor.fetchone()))
+
+    DashboardCounter.objects.bulk_create(
+        [DashboardCounter(name=name, value=value) for name, value in counts.items()],
+        update_conflicts=True,
+        unique_fields=["name"],
+        update_fields=["value", "updated_at"],
+    )
+    return counts
+
+
+def read(recount=False):
+    """Return all dashboard counters, recounting when forced or missing."""
+    if recount:
+        return reconcile()
+    counts = dict(
+        DashboardCounter.objects.filter(name__in=COUNTED_MODELS).values_list("name", "value")
+    )
+    if len(counts) != len(COUNTED_MODELS):
+        return reconcile()
+    return {name: counts[name] for name in COUNTED_MODELS}
@@ -0,0 +1,33 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+
+# Below this many passwords a process pool costs more than it saves
+PARALLEL_THRESHOLD = 4
+
+
+def _encode(hasher, password):
+    return hasher.encode(password, hasher.salt())
+
+
+def hash_passwords(passwords):
+    """Hash ``passwords`` with the default hasher, in parallel across CPU cores.
+
+    Password hashing is deliberately slow and CPU bound, so bulk onboarding
+    spreads it over a process pool. This module imports no models, so pool
+    workers can load it without setting up Django.
+    """
+    hasher = get_hasher()
+    workers = getattr(settings, "COPO_HASH_WORKERS", None) or os.cpu_count() or 1
+    if workers < 2 or len(passwords) < PARALLEL_THRESHOLD:
+        return [_encode(hasher, password) for password in passwords]
+
+    # forkserver avoids forking the (possibly threaded) web server process itself
+    context = multiprocessing.get_context("forkserver")
+    workers = min(workers, len(passwords))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        chunksize = max(len(passwords) // (workers * 4), 1)
+        return list(pool.map(_encode, [hasher] * len(passwords), passwords, chunksize=chunksize))
@@ -0,0 +1,582 @@
+import logging
+from collections import defaultdict
+
+import openpyxl
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+
+from . import counters, response_cache
+from .hashing import hash_passwords
+from .models import Course, CustomUser, Department, Faculty, Programme, Student
+
+logger = logging.getLogger(__name__)
+
+
+class ImportRowError(Exception):
+    """A row that stops the import; chunks committed before it are kept."""
+
+    rows_processed = 0
+
+# Student CSV header (lower-cased, stripped) -> Student field
+STUDENT_COLUMNS = {
+    "programme": "programme",
+    "examination register number": "register_no",
+    "admission no.": "admn_no",
+    "name": "name",
+}
+
+
+# Course CSV columns, all required
+COURSE_COLUMNS = ["course_code", "course_title", "dept_name", "sem", "credits", "syllabus_year"]
+
+# Faculty CSV columns; mob is optional
+FACULTY_COLUMNS = ["name", "dept_name", "email", "mob"]
+FACULTY_REQUIRED = ["name", "dept_name", "email"]
+
+# Examination register numbers look like "NA24ECORO50"; digits 3-4 are the year of admission
+REGISTER_NO_PATTERN = r"[A-Za-z]{2}\d{2}[A-Za-z0-9]+"
+EMAIL_PATTERN = r"[^@\s]+@[^@\s]+\.[^@\s]+"
+
+
+def normalize_column(column):
+    return str(column).strip().lower()
+
+
+def read_csv_chunks(source, columns, chunk_size=None, normalize=False):
+    """Iterate over a CSV in DataFrame chunks, reading only ``columns``, all as text.
+
+    Memory use is bounded by the chunk size, whatever the size of the file.
+    """
+    if chunk_size is None:
+        chunk_size = getattr(settings, "COPO_IMPORT_CHUNK_SIZE", 5000)
+    wanted = set(columns)
+    if normalize:
+        usecols = lambda column: normalize_column(column) in wanted
+    else:
+        usecols = lambda column: column in wanted
+    return pd.read_csv(
+        source, usecols=usecols, dtype=str, chunksize=chunk_size, encoding="utf-8"
+    )
+
+
+def cell_text(value):
+    """Spreadsheet cell as the text a CSV export would have held."""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def read_xlsx_chunks(source, columns, chunk_size=None, normalize=False):
+    """Iterate over the first sheet of a workbook in DataFrame chunks, like ``read_csv_chunks``.
+
+    The workbook is opened in read-only mode, so rows are streamed from the
+    file and only one chunk is held in memory at a time.
+    """
+    if chunk_size is None:
+        chunk_size = getattr(settings, "COPO_IMPORT_CHUNK_SIZE", 5000)
+    wanted = set(columns)
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [cell_text(value) or "" for value in next(rows, ())]
+        keep = [
+            i for i, column in enumerate(header)
+            if (normalize_column(column) if normalize else column) in wanted
+        ]
+        names = [header[i] for i in keep]
+
+        start = 0
+        chunk = []
+        for row in rows:
+            if not any(value is not None for value in row):
+                continue  # blank rows, as read_csv skips them
+            chunk.append([cell_text(row[i]) if i < len(row) else None for i in keep])
+            if len(chunk) == chunk_size:
+                yield pd.DataFrame(chunk, columns=names, index=range(start, start + len(chunk)))
+                start += len(chunk)
+                chunk = []
+        if chunk or not start:
+            yield pd.DataFrame(chunk, columns=names, index=range(start, start + len(chunk)))
+    finally:
+        workbook.close()
+
+
+def read_chunks(source, columns, chunk_size=None, normalize=False):
+    """Read a CSV or .xlsx upload (a file or a storage path) in chunks, by file extension."""
+    name = source if isinstance(source, str) else getattr(source, "name", "") or ""
+    if name.lower().endswith(".xlsx"):
+        return read_xlsx_chunks(source, columns, chunk_size, normalize)
+    return read_csv_chunks(source, columns, chunk_size, normalize)
+
+
+def run_import(chunks, import_chunk, required=None, progress=None, max_errors=None):
+    """Feed ``chunks`` to ``import_chunk`` one at a time and add up the results.
+
+    Each chunk is written in its own transaction. Counts are summed; lists,
+    which chunk importers only return for skipped or failed rows, are
+    collected up to ``max_errors`` entries each, setting "truncated" beyond
+    that, so the result stays bounded whatever the size of the file. ``progress`` is called with the number of rows
+    processed so far after every chunk.
+    """
+    if max_errors is None:
+        max_errors = getattr(settings, "COPO_IMPORT_MAX_ERRORS", 500)
+    totals = {}
+    rows = 0
+    for chunk in chunks:
+        if required:
+            missing = [column for column in required if column not in chunk.columns]
+            if missing:
+                raise ImportRowError(f"Missing required column(s): {', '.join(missing)}")
+        try:
+            result = import_chunk(chunk)
+        except ImportRowError as e:
+            e.rows_processed = rows
+            raise
+        for key, value in result.items():
+            if isinstance(value, list):
+                collected = totals.setdefault(key, [])
+                room = max(max_errors - len(collected), 0)
+                collected.extend(value[:room])
+                if len(value) > room:
+                    totals["truncated"] = True
+            else:
+                totals[key] = totals.get(key, 0) + value
+        rows += len(chunk)
+        logger.info("%s: %d rows processed", import_chunk.__name__, rows)
+        if progress is not None:
+            progress(rows)
+    totals["rows_processed"] = rows
+    return totals
+
+
+def wants_dry_run(request):
+    value = request.GET.get("dry_run") or request.POST.get("dry_run", "")
+    return value.lower() in ("1", "true", "yes")
+
+
+def collect_errors(index, checks):
+    """Turn (mask, message) checks into {row label: [messages]} for the failing rows.
+
+    A message is either a string or a Series of per-row messages.
+    """
+    errors = defaultdict(list)
+    for mask, message in checks:
+        mask = mask.fillna(False).astype(bool)
+        for label in index[mask.to_numpy()]:
+            errors[label].append(message if isinstance(message, str) else message[label])
+    return dict(sorted(errors.items()))
+
+
+def first_errors(index, checks):
+    """The first failing message of each row, "" for rows that pass every check."""
+    errors = pd.Series("", index=index)
+    for mask, message in reversed(checks):
+        errors = errors.mask(mask.fillna(False).astype(bool), message)
+    return errors
+
+
+def run_validation(chunks, validate_chunk, required=None, max_errors=None):
+    """Check a whole file chunk by chunk with ``validate_chunk`` without writing anything.
+
+    ``validate_chunk(df, seen)`` returns (mask, message) checks and a mask of
+    rows that would update an existing record; ``seen`` carries the keys of
+    earlier chunks so duplicates are found across the whole file. Only the
+    first ``max_errors`` failing rows are listed.
+    """
+    if max_errors is None:
+        max_errors = getattr(settings, "COPO_DRY_RUN_MAX_ERRORS", 500)
+    seen = defaultdict(set)
+    report = {
+        "dry_run": True,
+        "valid": True,
+        "rows_checked": 0,
+        "error_rows": 0,
+        "would_create": 0,
+        "would_update": 0,
+        "errors": [],
+        "truncated": False,
+    }
+    for chunk in chunks:
+        if required:
+            columns = {normalize_column(column) for column in chunk.columns}
+            missing = [column for column in required if column not in columns]
+            if missing:
+                report.update(valid=False, missing_columns=missing)
+                return report
+
+        checks, updates = validate_chunk(chunk, seen)
+        errors = collect_errors(chunk.index, checks)
+        passed = ~chunk.index.isin(list(errors))
+        would_update = int((updates.to_numpy(dtype=bool) & passed).sum())
+        report["rows_checked"] += len(chunk)
+        report["error_rows"] += len(errors)
+        report["would_update"] += would_update
+        report["would_create"] += int(passed.sum()) - would_update
+        for label, messages in errors.items():
+            if len(report["errors"]) == max_errors:
+                report["truncated"] = True
+                break
+            report["errors"].append({"row": int(label) + 1, "errors": messages})
+
+    report["valid"] = report["error_rows"] == 0
+    return report
+
+
+def in_file_duplicates(keys, seen, name):
+    """Rows whose key already appeared earlier in this chunk or in an earlier chunk."""
+    duplicate = keys.notna() & (keys.duplicated() | keys.isin(seen[name]))
+    seen[name].update(keys.dropna())
+    return duplicate
+
+
+def clean_text(series):
+    """Strip a column and turn blanks into missing values."""
+    series = series.astype("string").str.strip()
+    return series.mask(series == "")
+
+
+def student_frame(df):
+    """A chunk of the admission CSV with Student field names as columns, cleaned."""
+    df = df.rename(columns=normalize_column)
+    df = df.reindex(columns=list(STUDENT_COLUMNS)).rename(columns=STUDENT_COLUMNS)
+    return df.apply(clean_text)
+
+
+def register_owners(df):
+    """{register_no: admn_no} of the students already holding the chunk's register numbers."""
+    return dict(
+        Student.objects.filter(register_no__in=df["register_no"].dropna().tolist())
+        .values_list("register_no", "admn_no")
+    )
+
+
+def student_checks(df, programmes, owners):
+    """(mask, message) checks for student rows that cannot be imported, most basic first.
+
+    ``owners`` gives, for each row, the admn_no its register_no already
+    belongs to. Within a file a register number belongs to the first
+    admission number that claims it.
+    """
+    admn_no = df["admn_no"].astype(object).fillna("")
+    first_claim = df.groupby("register_no")["admn_no"].transform("first").astype(object)
+    checks = [
+        (df[column].isna(), f"{column} is required.") for column in ["programme", "register_no", "admn_no", "name"]
+    ]
+    checks += [
+        (df["register_no"].notna() & ~df["register_no"].str.fullmatch(REGISTER_NO_PATTERN).fillna(False),
+         "register_no does not look like a register number (e.g. NA24ECORO50)."),
+        (df["programme"].notna() & ~df["programme"].isin(programmes),
+         'Programme "' + df["programme"].fillna("") + '" does not exist.'),
+        (owners.notna() & (owners != admn_no), "register_no already belongs to another student."),
+        (first_claim.notna() & (first_claim != admn_no), "Duplicate register_no in the file."),
+    ]
+    return checks
+
+
+def row_errors(df, errors, columns):
+    """[{row, <columns>, error}] for the rows with an error; rows are numbered from 1 after the header."""
+    failed = errors[errors != ""]
+    labels = df.loc[failed.index, columns].astype(object)
+    labels = labels.where(labels.notna(), None)
+    return [
+        {"row": int(index) + 1, **dict(zip(columns, values)), "error": error}
+        for index, values, error in zip(failed.index, labels.itertuples(index=False), failed)
+    ]
+
+
+def import_students(df):
+    """Create or update students from a DataFrame of the admission CSV.
+
+    Everything is done column-wise: the year of admission comes from the
+    register number (e.g. "NA24ECORO50" -> 2024), programmes and the current
+    holders of the register numbers are resolved in one query each, and
+    rows are split into inserts and updates against one pre-fetched admn_no
+    map before a single upsert in one transaction. Rows that fail
+    ``student_checks`` are skipped and reported.
+    """
+    df = student_frame(df)
+    names = df["programme"].dropna().unique().tolist()
+    programmes = dict(
+        Programme.objects.filter(programme_name__in=names).values_list("programme_name", "programme_id")
+    )
+    owners = df["register_no"].astype(object).map(register_owners(df))
+    errors = first_errors(df.index, student_checks(df, programmes, owners))
+
+    valid = errors == ""
+    rows = df[valid].assign(
+        year_of_admission=pd.to_numeric(df.loc[valid, "register_no"].str[2:4]).astype(int) + 2000,
+        programme_id=df.loc[valid, "programme"].map(programmes),
+    )
+    # A later row for the same admission number wins, as with row-by-row updates.
+    rows = rows.drop_duplicates("admn_no", keep="last")
+
+    existing = set(
+        Student.objects.filter(admn_no__in=rows["admn_no"].tolist()).values_list("admn_no", flat=True)
+    )
+    created = int((~rows["admn_no"].isin(existing)).sum())
+
+    students = [
+        Student(
+            admn_no=row.admn_no,
+            register_no=row.register_no,
+            name=row.name,
+            year_of_admission=row.year_of_admission,
+            programme_id=int(row.programme_id),
+        )
+        for row in rows.itertuples(index=False)
+    ]
+    with transaction.atomic():
+        Student.objects.bulk_create(
+            students,
+            update_conflicts=True,
+            unique_fields=["admn_no"],
+            update_fields=["register_no", "name", "year_of_admission", "programme"],
+        )
+        # bulk_create sends no signals, so keep the counter and cache version in step here
+        counters.bump("students", created)
+        response_cache.bump_on_write("students")
+
+    return {
+        "created": created,
+        "updated": len(students) - created,
+        "skipped": int((~valid).sum()),
+        "skipped_rows": row_errors(df, errors, ["admn_no", "register_no"]),
+    }
+
+
+def validate_students(df, seen):
+    df = student_frame(df)
+    names = df["programme"].dropna().unique().tolist()
+    programmes = set(
+        Programme.objects.filter(programme_name__in=names).values_list("programme_name", flat=True)
+    )
+    # Register numbers taken by passing rows of earlier chunks are held as if already imported
+    claims = seen.setdefault("register_owners", {})
+    owners = df["register_no"].astype(object).map({**register_owners(df), **claims})
+    existing = set(
+        Student.objects.filter(admn_no__in=df["admn_no"].dropna().tolist()).values_list("admn_no", flat=True)
+    )
+
+    checks = student_checks(df, programmes, owners)
+    passed = first_errors(df.index, checks) == ""
+    for register_no, admn_no in zip(df.loc[passed, "register_no"], df.loc[passed, "admn_no"]):
+        claims.setdefault(register_no, admn_no)
+    # As on import, a later row for the same admission number updates the earlier one
+    repeated = in_file_duplicates(df["admn_no"].where(passed), seen, "admn_no")
+    return checks, df["admn_no"].isin(existing) | repeated
+
+
+def course_checks(df, numbers, departments):
+    """(mask, message) checks for course rows that cannot be imported, most basic first."""
+    return [
+        (df[["course_code", "course_title", "dept_name"]].isna().any(axis=1),
+         "course_code, course_title and dept_name are required."),
+        (numbers.isna().any(axis=1) | (numbers % 1 != 0).any(axis=1),
+         "sem, credits and syllabus_year must be integers."),
+        (df["dept_name"].notna() & ~df["dept_name"].isin(departments),
+         "Department with name \"" + df["dept_name"].fillna("") + "\" does not exist."),
+    ]
+
+
+def course_keys(df, numbers):
+    return df["course_code"] + "|" + numbers["syllabus_year"].where(numbers["syllabus_year"] % 1 == 0).astype("Int64").astype("string")
+
+
+def validate_courses(df, seen):
+    df = df.apply(clean_text)
+    numbers = df[["sem", "credits", "syllabus_year"]].apply(pd.to_numeric, errors="coerce")
+    names = df["dept_name"].dropna().unique().tolist()
+    departments = set(Department.objects.filter(dept_name__in=names).values_list("dept_name", flat=True))
+
+    keys = course_keys(df, numbers)
+    existing = {
+        f"{code}|{year}"
+        for code, year in Course.objects.filter(course_code__in=df["course_code"].dropna().unique().tolist())
+        .values_list("course_code", "syllabus_year")
+    }
+    checks = course_checks(df, numbers, departments)
+    # As on import, a later row for the same course supersedes the earlier one
+    repeated = in_file_duplicates(keys.where(first_errors(df.index, checks) == ""), seen, "course")
+    return checks, (keys.isin(existing) | repeated).fillna(False)
+
+
+def import_courses(df):
+    """Upsert courses from a chunk of the course CSV on (course_code, syllabus_year).
+
+    Re-uploading the same syllabus updates the existing courses instead of
+    duplicating them. Departments are resolved in one query, existing keys
+    are fetched in one query and all rows are written with one upsert, so a
+    chunk costs the same number of queries whatever its size. Returns counts
+    and the skipped rows: those with an error and earlier duplicates.
+    """
+    df = df.apply(clean_text)
+    numbers = df[["sem", "credits", "syllabus_year"]].apply(pd.to_numeric, errors="coerce")
+
+    names = df["dept_name"].dropna().unique().tolist()
+    departments = dict(
+        Department.objects.filter(dept_name__in=names).values_list("dept_name", "dept_id")
+    )
+
+    errors = first_errors(df.index, course_checks(df, numbers, departments))
+
+    valid = errors == ""
+    key = course_keys(df, numbers).where(valid)
+    # The last row for a course in the file wins, as it would across uploads
+    duplicate = valid & key.duplicated(keep="last")
+    write = valid & ~duplicate
+
+    rows = df[write].assign(**numbers[write].astype(int))
+    existing = set(
+        Course.objects.filter(course_code__in=rows["course_code"].unique().tolist())
+        .values_list("course_code", "syllabus_year")
+    )
+    is_update = pd.Series(
+        [(row.course_code, row.syllabus_year) in existing for row in rows.itertuples(index=False)],
+        index=rows.index, dtype=bool,
+    )
+
+    courses = [
+        Course(
+            course_code=row.course_code,
+            title=row.course_title,
+            dept_id=departments[row.dept_name],
+            semester=row.sem,
+            credits=row.credits,
+            syllabus_year=row.syllabus_year,
+            no_of_cos=1,  # Default value for new courses; kept as is on update
+        )
+        for row in rows.itertuples(index=False)
+    ]
+    created = int((~is_update).sum())
+    with transaction.atomic():
+        Course.objects.bulk_create(
+            courses,
+            update_conflicts=True,
+            unique_fields=["course_code", "syllabus_year"],
+            update_fields=["title", "dept", "semester", "credits"],
+        )
+        # bulk_create sends no signals, so keep the counter and cache version in step here
+        counters.bump("courses", created)
+        response_cache.bump_on_write("courses")
+
+    skipped = errors.mask(duplicate, "Superseded by a later row for the same course_code and syllabus_year.")
+    return {
+        "created": created,
+        "updated": len(courses) - created,
+        "duplicates": int(duplicate.sum()),
+        "errors": int((~valid).sum()),
+        "skipped_rows": row_errors(df, skipped, ["course_code", "syllabus_year"]),
+    }
+
+
+def faculty_frame(df):
+    """A chunk of the faculty CSV with every column present, cleaned."""
+    return df.reindex(columns=FACULTY_COLUMNS).apply(clean_text)
+
+
+def faculty_usernames(df):
+    """The username of each row: the email prefix (before @), normalized as Django does."""
+    return df["email"].str.split("@").str[0].map(CustomUser.normalize_username)
+
+
+def faculty_checks(df, usernames, departments, seen):
+    """(mask, message) checks for faculty rows that cannot be imported, most basic first.
+
+    Emails and usernames are checked against existing records with one query
+    each and against earlier rows through ``seen``.
+    """
+    emails = df["email"].dropna().tolist()
+    taken_emails = set(
+        Faculty.objects.filter(email__in=emails).values_list("email", flat=True).union(
+            CustomUser.objects.filter(email__in=emails).values_list("email", flat=True)
+        )
+    )
+    taken_usernames = set(
+        CustomUser.objects.filter(username__in=usernames.dropna().tolist()).values_list("username", flat=True)
+    )
+
+    checks = [(df[column].isna(), f"{column} is required.") for column in FACULTY_REQUIRED]
+    checks += [
+        (df["email"].notna() & ~df["email"].str.fullmatch(EMAIL_PATTERN).fillna(False), "email is not valid."),
+        (df["dept_name"].notna() & ~df["dept_name"].isin(list(departments)),
+         "Department '" + df["dept_name"].fillna("") + "' does not exist."),
+        (in_file_duplicates(df["email"], seen, "email"), "Duplicate email in the file."),
+        (in_file_duplicates(usernames, seen, "username"), "Duplicate username in the file."),
+        (df["email"].isin(taken_emails), "A faculty member or user with this email already exists."),
+        (usernames.isin(taken_usernames), "Username " + usernames.fillna("") + " is already taken."),
+    ]
+    return checks
+
+
+def validate_faculty(df, seen):
+    df = faculty_frame(df)
+    names = df["dept_name"].dropna().unique().tolist()
+    departments = set(Department.objects.filter(dept_name__in=names).values_list("dept_name", flat=True))
+    checks = faculty_checks(df, faculty_usernames(df), departments, seen)
+    return checks, pd.Series(False, index=df.index)
+
+
+def import_faculty(df):
+    """Onboard faculty members and their teacher accounts from a chunk of the faculty CSV.
+
+    Rows failing ``faculty_checks`` are skipped and reported. Existing emails
+    and usernames are checked with one query each, departments are resolved
+    in one query, passwords are hashed in parallel and both tables are
+    written with bulk_create in one transaction.
+    """
+    df = faculty_frame(df)
+    usernames = faculty_usernames(df)
+    names = df["dept_name"].dropna().unique().tolist()
+    departments = dict(
+        Department.objects.filter(dept_name__in=names).values_list("dept_name", "dept_id")
+    )
+    errors = first_errors(df.index, faculty_checks(df, usernames, departments, defaultdict(set)))
+
+    valid = errors == ""
+    rows, usernames = df[valid], usernames[valid]
+
+    # Split name into first and last name
+    name_parts = rows["name"].str.split(" ", n=1)
+    first_names = name_parts.str[0]
+    last_names = name_parts.str[1].fillna("")
+
+    # Phone number is the initial password, "123" when missing
+    phone_numbers = rows["mob"].fillna("123").tolist()
+    hashed = hash_passwords(phone_numbers)
+
+    faculty = []
+    users = []
+    for row, phone_no, username, first_name, last_name, password in zip(
+        rows.itertuples(index=False), phone_numbers, usernames, first_names, last_names, hashed
+    ):
+        faculty.append(
+            Faculty(name=row.name, dept_id=departments[row.dept_name], email=row.email, phone_no=phone_no)
+        )
+        users.append(
+            CustomUser(
+                username=username,
+                password=password,
+                email=CustomUser.objects.normalize_email(row.email),
+                first_name=first_name,
+                last_name=last_name,
+                role="teacher",
+            )
+        )
+
+    with transaction.atomic():
+        Faculty.objects.bulk_create(faculty)
+        CustomUser.objects.bulk_create(users)
+        # bulk_create sends no signals, so keep the counter and cache version in step here
+        counters.bump("faculty", len(faculty))
+        response_cache.bump_on_write("faculty")
+
+    return {
+        "created": len(faculty),
+        "skipped": int((~valid).sum()),
+        "skipped_rows": row_errors(df, errors, ["name", "email"]),
+    }
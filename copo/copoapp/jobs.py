@@ -0,0 +1,273 @@
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import OperationalError, close_old_connections, connections
+from django.utils import timezone
+
+from . import importers, marks, snapshots
+from .json_backend import JsonResponse
+from .models import ExternalExam, Job
+
+logger = logging.getLogger(__name__)
+
+# Job kind -> function(job) returning the JSON result
+HANDLERS = {}
+
+
+def handler(kind):
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def wants_async(request):
+    value = request.GET.get("async") or request.POST.get("async", "")
+    return value.lower() in ("1", "true", "yes")
+
+
+def enqueue(kind, payload):
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    return Job.objects.create(kind=kind, payload=payload)
+
+
+def enqueue_once(kind, payload):
+    """Queue a job unless one of the same kind is already waiting to run."""
+    if Job.objects.filter(kind=kind, status=Job.QUEUED).exists():
+        return None
+    return enqueue(kind, payload)
+
+
+def describe(job):
+    duration = None
+    if job.started_at:
+        duration = ((job.finished_at or timezone.now()) - job.started_at).total_seconds()
+    return {
+        "job_id": job.job_id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": job.progress,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "duration_seconds": duration,
+        "result_url": f"/jobs/{job.job_id}/result/",
+    }
+
+
+def accepted_response(job):
+    return JsonResponse(describe(job), status=202)
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim(worker=""):
+    """Take the oldest queued job, or return None when the queue is empty.
+
+    The claim is a conditional UPDATE, so two workers racing for the same
+    job cannot both win; the loser just moves on to the next one.
+    """
+    while True:
+        job_id = (
+            Job.objects.filter(status=Job.QUEUED).order_by("job_id").values_list("job_id", flat=True).first()
+        )
+        if job_id is None:
+            return None
+        claimed = Job.objects.filter(job_id=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING, started_at=timezone.now(), worker=worker
+        )
+        if claimed:
+            return Job.objects.get(job_id=job_id)
+
+
+def run(job):
+    """Run a claimed job and record its result or error."""
+    try:
+        result = HANDLERS[job.kind](job)
+    except Exception as e:
+        logger.exception("Job %s failed", job.job_id)
+        job.status = Job.FAILED
+        job.error = str(e) or traceback.format_exc(limit=1)
+        if isinstance(e, importers.ImportRowError):
+            job.result = {"rows_processed": e.rows_processed}
+    else:
+        job.status = Job.SUCCEEDED
+        job.result = result
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "result", "error", "finished_at"])
+    return job
+
+
+def run_next(worker=""):
+    """Claim and run one job. Returns the job, or None when nothing is queued."""
+    close_old_connections()
+    job = claim(worker)
+    if job is not None:
+        run(job)
+    return job
+
+
+def work(worker, poll_interval, once=False, stopping=lambda: False):
+    """Worker loop: run queued jobs until ``stopping()`` (or the queue is empty with ``once``).
+
+    A database error such as SQLite's "database is locked" is logged and
+    retried after a growing pause instead of ending the worker. Expired jobs
+    are purged when the queue is idle, at most every COPO_JOB_SWEEP_INTERVAL
+    seconds.
+    """
+    max_backoff = getattr(settings, "COPO_JOB_MAX_BACKOFF", 30.0)
+    sweep_interval = getattr(settings, "COPO_JOB_SWEEP_INTERVAL", 3600)
+    backoff = poll_interval
+    next_sweep = time.monotonic()
+    while not stopping():
+        try:
+            job = run_next(worker)
+            if job is None and time.monotonic() >= next_sweep:
+                purge_expired()
+                next_sweep = time.monotonic() + sweep_interval
+        except OperationalError:
+            logger.exception("Worker %s: database error, retrying in %.1fs", worker, backoff)
+            connections.close_all()
+            time.sleep(backoff)
+            backoff = min(backoff * 2, max_backoff)
+            continue
+        backoff = poll_interval
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+
+
+def purge_expired(retention=None):
+    """Delete finished jobs older than ``retention`` and the files they produced.
+
+    ``retention`` defaults to COPO_JOB_RETENTION_DAYS. Returns the number of
+    jobs deleted.
+    """
+    if retention is None:
+        retention = timedelta(days=getattr(settings, "COPO_JOB_RETENTION_DAYS", 7))
+    expired = Job.objects.filter(
+        status__in=[Job.SUCCEEDED, Job.FAILED], finished_at__lt=timezone.now() - retention
+    )
+    for name in expired.filter(result__has_key="file").values_list("result__file", flat=True):
+        default_storage.delete(name)
+    return expired.delete()[0]
+
+
+def requeue_running():
+    """Put jobs left running by a stopped worker back on the queue."""
+    return Job.objects.filter(status=Job.RUNNING).update(status=Job.QUEUED, started_at=None, progress=0)
+
+
+def report_progress(job):
+    def progress(done):
+        Job.objects.filter(job_id=job.job_id).update(progress=done)
+    return progress
+
+
+def run_upload_import(job, read_chunks, import_chunk, message, validation, required=None):
+    """Import (or with dry_run, validate) the uploaded file saved at payload["path"].
+
+    ``validation`` is the (validate_chunk, required columns) pair used for a dry run.
+    """
+    path = job.payload["path"]
+    try:
+        with default_storage.open(path, "rb") as f:
+            if job.payload.get("dry_run"):
+                validate_chunk, validate_required = validation
+                return importers.run_validation(read_chunks(f), validate_chunk, required=validate_required)
+            result = importers.run_import(
+                read_chunks(f), import_chunk, required=required, progress=report_progress(job)
+            )
+    finally:
+        default_storage.delete(path)
+    return {"message": message, **result}
+
+
+@handler("import_students")
+def import_students(job):
+    return run_upload_import(
+        job,
+        lambda f: importers.read_chunks(f, importers.STUDENT_COLUMNS, normalize=True),
+        importers.import_students,
+        "Students added successfully",
+        (importers.validate_students, list(importers.STUDENT_COLUMNS)),
+    )
+
+
+@handler("import_courses")
+def import_courses(job):
+    return run_upload_import(
+        job,
+        lambda f: importers.read_chunks(f, importers.COURSE_COLUMNS),
+        importers.import_courses,
+        "Courses uploaded successfully!",
+        (importers.validate_courses, importers.COURSE_COLUMNS),
+        required=importers.COURSE_COLUMNS,
+    )
+
+
+@handler("import_faculty")
+def import_faculty(job):
+    return run_upload_import(
+        job,
+        lambda f: importers.read_chunks(f, importers.FACULTY_COLUMNS),
+        importers.import_faculty,
+        "Faculty records processed successfully",
+        (importers.validate_faculty, importers.FACULTY_REQUIRED),
+    )
+
+
+@handler("import_external_marks")
+def import_external_marks(job):
+    exam = ExternalExam.objects.get(pk=job.payload["external_exam_id"])
+    path = job.payload["path"]
+    try:
+        with default_storage.open(path, "rb") as f:
+            chunks = importers.read_chunks(f, marks.EXTERNAL_MARK_COLUMNS, normalize=True)
+            result = importers.run_import(chunks, marks.external_marks_importer(exam), progress=report_progress(job))
+    finally:
+        default_storage.delete(path)
+    return {"message": "External marks imported", **result}
+
+
+@handler(snapshots.RECOMPUTE_JOB)
+def recompute_attainment(job):
+    return snapshots.recompute(progress=report_progress(job))
+
+
+@handler("generate_questions")
+def generate_questions(job):
+    from .views import extract_text_from_pdf, generate_questions_from_text
+
+    path = job.payload["path"]
+    try:
+        text = extract_text_from_pdf(default_storage.path(path))
+    finally:
+        default_storage.delete(path)
+    questions = generate_questions_from_text(
+        text,
+        question_type=job.payload["question_type"],
+        no_of_questions=job.payload["no_of_questions"],
+    )
+    return {"questions": questions}
+
+
+@handler("exam_preview")
+def exam_preview(job):
+    from .views import compile_exam_pdf
+
+    # Deleted with the job by purge_expired
+    name = default_storage.save(f"jobs/exam_preview_{job.job_id}.pdf", ContentFile(compile_exam_pdf(job.payload)))
+    return {"file": name, "content_type": "application/pdf"}
@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.http import JsonResponse as DjangoJsonResponse
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+
+_django_encoder = DjangoJSONEncoder()
+
+
+def fast_json_enabled():
+    return orjson is not None and getattr(settings, "COPO_FAST_JSON", False)
+
+
+def fast_dumps(data, default):
+    # Dates, datetimes and times are passed to ``default`` instead of orjson's
+    # own formatting, so they are rendered exactly as the stdlib encoder
+    # would render them; Decimals always go through ``default``.
+    return orjson.dumps(
+        data,
+        default=default,
+        option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+    )
+
+
+def dumps(data):
+    """Encode ``data`` as JsonResponse would, returning bytes."""
+    if fast_json_enabled():
+        return fast_dumps(data, _django_encoder.default)
+    return _django_encoder.encode(data).encode()
+
+
+def item_separator():
+    """Separator between array items in the output of dumps()."""
+    return b"," if fast_json_enabled() else b", "
+
+
+class JsonResponse(DjangoJsonResponse):
+    """Drop-in JsonResponse that encodes with orjson when COPO_FAST_JSON is on."""
+
+    def __init__(self, data, encoder=DjangoJSONEncoder, safe=True, json_dumps_params=None, **kwargs):
+        if not fast_json_enabled() or json_dumps_params:
+            super().__init__(data, encoder, safe, json_dumps_params, **kwargs)
+            return
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the "
+                "safe parameter to False."
+            )
+        kwargs.setdefault("content_type", "application/json")
+        HttpResponse.__init__(self, content=fast_dumps(data, encoder().default), **kwargs)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """DRF JSONRenderer that encodes with orjson when COPO_FAST_JSON is on."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or not fast_json_enabled():
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = fast_dumps(data, self.encoder_class().default)
+        # Same escaping as JSONRenderer: keep the output valid JavaScript.
+        return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
@@ -0,0 +1,136 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from copoapp import attainment
+from copoapp.models import (
+    CO,
+    Batch,
+    Course,
+    Department,
+    ExamQuestion,
+    ExamSection,
+    Faculty,
+    InternalExam,
+    InternalMark,
+    Level,
+    Programme,
+    QuestionBank,
+    Student,
+)
+from copoapp.views import get_batch_attainment
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time CO attainment of one batch: the matrix computation, loading the "
+        "batch from the database and the /batches/<id>/attainment/ endpoint, "
+        "against a target. A synthetic batch of students x internal exams is "
+        "added inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=300)
+        parser.add_argument("--assessments", type=int, default=60, help="Internal exams in the batch.")
+        parser.add_argument("--cos", type=int, default=6)
+        parser.add_argument("--repeat", type=int, default=20, help="Runs; the best is kept.")
+        parser.add_argument("--target-ms", type=float, default=50.0)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{options['students']} students x {options['assessments']} assessments x {options['cos']} COs"
+        )
+        self.stdout.write(f"{'step':<22} {'best ms':>9} {'queries':>8}")
+        try:
+            with transaction.atomic():
+                batch = self.seed(options["students"], options["assessments"], options["cos"])
+                data = attainment.load_batch(batch)
+                factory = RequestFactory()
+                url = f"/batches/{batch.pk}/attainment/"
+                steps = [
+                    ("compute", lambda: attainment.compute(data["marks"], data["max_marks"], data["incidence"])),
+                    ("load_batch", lambda: attainment.load_batch(batch)),
+                    ("batch_attainment", lambda: attainment.batch_attainment(batch)),
+                    ("endpoint ?live=true", lambda: get_batch_attainment(factory.get(url, {"live": "true"}), batch.pk)),
+                    # The first run builds the snapshots; the best run reads them
+                    ("endpoint (snapshots)", lambda: get_batch_attainment(factory.get(url), batch.pk)),
+                ]
+                for label, step in steps:
+                    self.measure(label, step, options["repeat"], options["target_ms"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, students, assessments, cos):
+        rng = np.random.default_rng(0)
+        dept = Department.objects.create(dept_name="Benchmark")
+        level = Level.objects.create(name="Benchmark")
+        programme = Programme.objects.create(programme_name="Benchmark", dept=dept, level=level, duration=3)
+        course = Course.objects.create(
+            course_code="BENCH", title="Benchmark", dept=dept, semester=1, credits=4,
+            no_of_cos=cos, syllabus_year=2024,
+        )
+        faculty = Faculty.objects.create(name="Benchmark", dept=dept, email="bench@example.com", phone_no="123")
+        batch = Batch.objects.create(course=course, faculty_id=faculty, year=2024, part="A", active=True)
+
+        # bulk_create sends no signals, so seeding queues no snapshot recompute
+        co_rows = CO.objects.bulk_create([
+            CO(course=course, co_label=f"CO{i + 1}", co_description="", remember=1,
+               understand=0, apply=0, analyze=0, evaluate=0, create=0)
+            for i in range(cos)
+        ])
+        exams = InternalExam.objects.bulk_create([
+            InternalExam(batch=batch, exam_name=f"E{i}", max_marks=int(rng.integers(10, 51)))
+            for i in range(assessments)
+        ])
+        sections = ExamSection.objects.bulk_create([
+            ExamSection(internal_exam=exam, section_name="A", no_of_questions=2, no_of_questions_to_be_answered=2)
+            for exam in exams
+        ])
+        # Two questions per exam on different COs, so each exam's marks are shared between COs
+        questions = QuestionBank.objects.bulk_create([
+            QuestionBank(course=course, co=co_rows[(i + j) % cos], question_text=f"Q{i}.{j}",
+                         marks=int(rng.integers(2, 16)))
+            for i in range(assessments) for j in range(2)
+        ])
+        ExamQuestion.objects.bulk_create([
+            ExamQuestion(section=sections[i // 2], question_bank=question) for i, question in enumerate(questions)
+        ])
+        student_rows = Student.objects.bulk_create([
+            Student(name=f"Student {i}", register_no=f"BENCH{i:05}", admn_no=f"BENCH{i:05}",
+                    programme=programme, year_of_admission=2024)
+            for i in range(students)
+        ])
+
+        max_marks = np.array([exam.max_marks for exam in exams])
+        marks = np.floor(rng.random((students, assessments)) * (max_marks + 1)).astype(int)
+        present = rng.random(marks.shape) >= 0.05  # absentees
+        InternalMark.objects.bulk_create(
+            [
+                InternalMark(internal_exam=exams[e], student=student_rows[s], marks=int(marks[s, e]))
+                for s, e in zip(*np.nonzero(present))
+            ],
+            batch_size=5000,
+        )
+        return batch
+
+    def measure(self, label, step, repeat, target_ms):
+        best = float("inf")
+        queries = 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                step()
+                elapsed = time.perf_counter() - start
+            if elapsed < best:
+                best, queries = elapsed, len(captured)
+        verdict = self.style.SUCCESS("ok") if best * 1000 <= target_ms else self.style.ERROR("over target")
+        self.stdout.write(f"{label:<22} {best * 1000:>9.2f} {queries:>8}  {verdict}")
@@ -0,0 +1,96 @@
+import datetime
+import json
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import JSONRenderer
+
+from copoapp.json_backend import fast_dumps, orjson
+
+
+def student_rows(rows):
+    return [
+        {
+            "student_id": i,
+            "name": f"Student {i}",
+            "register_no": f"NA24CS{i:05}",
+            "year_of_admission": 2024,
+            "phone_number": "9999999999",
+            "email": f"student{i}@example.com",
+            "admn_no": f"A{i:06}",
+            "programme__programme_name": "BSc Computer Science",
+        }
+        for i in range(rows)
+    ]
+
+
+def question_rows(rows):
+    return [
+        {
+            "question_id": i,
+            "question_text": "Explain the working of a binary search tree with an example. " * 3,
+            "marks": 5,
+            "course": "Data Structures",
+            "co_label": "CO2",
+        }
+        for i in range(rows)
+    ]
+
+
+def exam_rows(rows):
+    return [
+        {
+            "int_exam_id": i,
+            "exam_name": "IA1",
+            "date": datetime.date(2025, 1, 1) + datetime.timedelta(days=i % 365),
+            "max_marks": Decimal("50.00"),
+        }
+        for i in range(rows)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Time the stdlib and orjson encoders on the largest list payloads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20000, help="Rows per payload.")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per encoder; the best is kept.")
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError("orjson is not installed.")
+
+        rows, repeat = options["rows"], options["repeat"]
+        payloads = {
+            "students": student_rows(rows),
+            "questions": question_rows(rows),
+            "exams (dates, decimals)": exam_rows(rows),
+        }
+        django_encoder = DjangoJSONEncoder()
+        drf_encoder = JSONRenderer.encoder_class()
+        encoders = [
+            ("JsonResponse stdlib", django_encoder.encode),
+            ("JsonResponse orjson", lambda data: fast_dumps(data, django_encoder.default)),
+            ("DRF JSONRenderer", JSONRenderer().render),
+            ("DRF orjson", lambda data: fast_dumps(data, drf_encoder.default)),
+        ]
+
+        for name, data in payloads.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name} ({rows} rows)"))
+            outputs = []
+            for label, encode in encoders:
+                best = float("inf")
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    output = encode(data)
+                    best = min(best, time.perf_counter() - start)
+                outputs.append(json.loads(output))
+                self.stdout.write(f"  {label:<20} {best * 1000:8.1f} ms  {len(output):>10} bytes")
+            # DRF renders Decimal as a number and Django as a string, so each
+            # fast path is compared with its own stdlib counterpart.
+            self.stdout.write(
+                f"  same decoded output: JsonResponse {outputs[0] == outputs[1]}, "
+                f"DRF {outputs[2] == outputs[3]}"
+            )
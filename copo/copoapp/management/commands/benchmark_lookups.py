@@ -0,0 +1,129 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from copoapp.models import (
+    AssignmentMark,
+    ExamQuestion,
+    ExternalMark,
+    InternalMark,
+    QuizMark,
+    VivaMark,
+)
+
+# (model, outer lookup column, inner lookup column)
+HOT_LOOKUPS = [
+    (InternalMark, "internal_exam", "student"),
+    (QuizMark, "quiz", "student"),
+    (AssignmentMark, "assignment", "student"),
+    (VivaMark, "viva", "student"),
+    (ExternalMark, "external_exam", "student"),
+    (ExamQuestion, "section", "question_bank"),
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Print EXPLAIN QUERY PLAN and timings for the marks and exam question "
+        "lookups, against the current schema and against a copy of each table "
+        "that only has the old single-column foreign key indexes. Everything "
+        "runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, default=0,
+            help="Synthetic rows to add to each table before measuring.",
+        )
+        parser.add_argument(
+            "--groups", type=int, default=200,
+            help="Distinct exams/sections the synthetic rows are spread over.",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=500, help="Lookups timed per query."
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            self.stderr.write("This benchmark only supports SQLite.")
+            return
+        try:
+            with transaction.atomic():
+                for model, outer, inner in HOT_LOOKUPS:
+                    self.benchmark(model, outer, inner, options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def benchmark(self, model, outer, inner, options):
+        table = model._meta.db_table
+        outer_col = model._meta.get_field(outer).column
+        inner_col = model._meta.get_field(inner).column
+
+        with connection.cursor() as cursor:
+            if options["rows"]:
+                self.seed(cursor, model, outer_col, inner_col, options["rows"], options["groups"])
+
+            # The "before" table mirrors the schema prior to the composite
+            # unique constraints: one index per foreign key column.
+            before = f"bench_before_{table}"
+            cursor.execute(f"CREATE TEMP TABLE {before} AS SELECT * FROM {table}")
+            cursor.execute(f"CREATE INDEX temp.{before}_outer ON {before} ({outer_col})")
+            cursor.execute(f"CREATE INDEX temp.{before}_inner ON {before} ({inner_col})")
+
+            cursor.execute(f"SELECT {outer_col}, {inner_col} FROM {table} WHERE {outer_col} IS NOT NULL")
+            keys = cursor.fetchall()
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            total = cursor.fetchone()[0]
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{model.__name__} ({total} rows)"))
+            if not keys:
+                self.stdout.write("  no rows to look up; use --rows to add synthetic data")
+                return
+
+            samples = [random.choice(keys) for _ in range(options["repeat"])]
+            queries = [
+                ("pair lookup", f"WHERE {outer_col} = %s AND {inner_col} = %s", lambda key: key),
+                ("per-exam scan", f"WHERE {outer_col} = %s", lambda key: key[:1]),
+            ]
+            for label, where, params in queries:
+                for name, source in (("before", before), ("after", table)):
+                    sql = f"SELECT * FROM {source} {where}"
+                    cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params(samples[0]))
+                    plan = "; ".join(row[-1] for row in cursor.fetchall())
+
+                    start = time.perf_counter()
+                    for key in samples:
+                        cursor.execute(sql, params(key))
+                        cursor.fetchall()
+                    elapsed = (time.perf_counter() - start) / len(samples) * 1e6
+
+                    self.stdout.write(f"  {label:<14} {name:<6} {elapsed:9.1f} us  {plan}")
+
+    def seed(self, cursor, model, outer_col, inner_col, rows, groups):
+        table = model._meta.db_table
+        cursor.execute(f"SELECT COALESCE(MAX({outer_col}), 0), COALESCE(MAX({inner_col}), 0) FROM {table}")
+        outer_base, inner_base = cursor.fetchone()
+        per_group = max(rows // groups, 1)
+        columns = [outer_col, inner_col]
+        if any(field.name == "marks" for field in model._meta.concrete_fields):
+            columns.append("marks")
+
+        # Foreign keys are deferred until commit and this data is always
+        # rolled back, so the synthetic ids do not need real parents.
+        values = []
+        for i in range(rows):
+            row = [outer_base + 1 + i // per_group, inner_base + 1 + i % per_group]
+            if len(columns) == 3:
+                row.append(random.randint(0, 50))
+            values.append(row)
+        placeholders = ", ".join(["%s"] * len(columns))
+        cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", values
+        )
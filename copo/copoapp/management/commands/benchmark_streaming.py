@@ -0,0 +1,75 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+from copoapp.models import Department, Level, Programme, Student
+from copoapp.views import get_students_by_programme
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare peak Python memory and time of the students list built in "
+        "memory versus streamed (?stream=true). Synthetic students are added "
+        "inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, nargs="+", default=[1000, 10000, 50000],
+            help="Student counts to measure.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'rows':>8} {'mode':<9} {'peak MiB':>9} {'seconds':>8} {'bytes':>11}")
+        for rows in options["rows"]:
+            try:
+                with transaction.atomic():
+                    programme = self.seed(rows)
+                    for mode in ("list", "stream"):
+                        self.measure(programme, rows, mode)
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def seed(self, rows):
+        dept = Department.objects.create(dept_name="Benchmark")
+        level = Level.objects.create(name="Benchmark")
+        programme = Programme.objects.create(
+            programme_name="Benchmark", dept=dept, level=level, duration=3
+        )
+        Student.objects.bulk_create(
+            [
+                Student(
+                    name=f"Student {i}", register_no=f"BENCH{i:07}", admn_no=f"BENCH{i:07}",
+                    programme=programme, year_of_admission=2024,
+                    phone_number="9999999999", email=f"student{i}@example.com",
+                )
+                for i in range(rows)
+            ],
+            batch_size=5000,
+        )
+        return programme
+
+    def measure(self, programme, rows, mode):
+        params = {"stream": "true"} if mode == "stream" else {}
+        request = RequestFactory().get(f"/students/by-programme/{programme.pk}/", params)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        response = get_students_by_programme(request, programme_id=programme.pk)
+        if response.streaming:
+            size = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            size = len(response.content)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.stdout.write(f"{rows:>8} {mode:<9} {peak / 2**20:>9.1f} {elapsed:>8.2f} {size:>11}")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from copoapp import snapshots
+from copoapp.models import Batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the CO attainment snapshots of every batch (or only the dirty "
+        "ones) and the PO/PSO rollups of the affected programmes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dirty-only", action="store_true", help="Only recompute batches marked dirty.",
+        )
+        parser.add_argument("--batch", type=int, nargs="+", help="Only recompute these batches.")
+
+    def handle(self, *args, **options):
+        if options["batch"]:
+            batch_ids = options["batch"]
+        elif options["dirty_only"]:
+            batch_ids = None
+        else:
+            batch_ids = list(Batch.objects.values_list("pk", flat=True))
+        result = snapshots.recompute(batch_ids)
+        self.stdout.write(f"Recomputed {result['batches']} batch(es) and {result['rollups']} programme rollup(s)")
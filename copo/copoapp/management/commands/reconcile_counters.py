@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from copoapp import counters
+
+
+class Command(BaseCommand):
+    help = "Recount the dashboard counters from the database. Run periodically, e.g. from cron."
+
+    def handle(self, *args, **options):
+        for name, value in counters.reconcile().items():
+            self.stdout.write(f"{name}: {value}")
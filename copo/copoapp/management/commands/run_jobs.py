@@ -0,0 +1,72 @@
+import multiprocessing
+import signal
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from copoapp import jobs
+
+
+def work(poll_interval, once):
+    """Worker process: run jobs until SIGTERM/SIGINT, letting the current job finish first."""
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    jobs.work(jobs.worker_name(), poll_interval, once, stopping=lambda: stopping)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background jobs (async imports, question generation, exam previews) "
+        "from the database queue with a pool of worker processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=getattr(settings, "COPO_JOB_WORKERS", 2),
+            help="Worker processes to start.",
+        )
+        parser.add_argument(
+            "--poll", type=float, default=getattr(settings, "COPO_JOB_POLL_INTERVAL", 1.0),
+            help="Seconds an idle worker waits before checking the queue again.",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Exit once the queue is empty.",
+        )
+        parser.add_argument(
+            "--requeue", action="store_true",
+            help="First put jobs left running by a stopped worker back on the queue.",
+        )
+
+    def handle(self, *args, **options):
+        if options["requeue"]:
+            self.stdout.write(f"Requeued {jobs.requeue_running()} job(s)")
+
+        # Children must not share the parent's database connection
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=work, args=(options["poll"], options["once"]), daemon=True)
+            for _ in range(max(options["workers"], 1))
+        ]
+        for process in workers:
+            process.start()
+        self.stdout.write(f"Started {len(workers)} worker(s)")
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+        try:
+            for process in workers:
+                process.join()
+        except (KeyboardInterrupt, SystemExit):
+            # Let every worker finish the job it is running before exiting
+            for process in workers:
+                process.terminate()
+            for process in workers:
+                process.join()
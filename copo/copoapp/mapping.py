@@ -0,0 +1,104 @@
+import numpy as np
+from django.db import transaction
+
+from . import snapshots
+from .models import CO, PO, PSO, Batch, COPOMapping, COPSOMapping
+
+# Mapping target -> (mapping model, target model, mapping field of the target)
+TARGETS = {
+    "po": (COPOMapping, PO, "po"),
+    "pso": (COPSOMapping, PSO, "pso"),
+}
+
+
+class MappingError(ValueError):
+    pass
+
+
+def course_targets(course):
+    """POs and PSOs a course's COs can map to: those of the programmes of its department."""
+    return {
+        "po": PO.objects.filter(level__programme__dept_id=course.dept_id).distinct().order_by("id"),
+        "pso": PSO.objects.filter(programme__dept_id=course.dept_id).order_by("pso_id"),
+    }
+
+
+def dense(pairs, row_ids, column_ids):
+    """Strength matrix (rows x columns) from (row id, column id, strength) rows."""
+    pairs = np.array(list(pairs), dtype=int).reshape(-1, 3)
+    row_ids = np.asarray(row_ids, dtype=int)
+    column_ids = np.asarray(column_ids, dtype=int)
+    pairs = pairs[np.isin(pairs[:, 0], row_ids) & np.isin(pairs[:, 1], column_ids)]
+    matrix = np.zeros((len(row_ids), len(column_ids)), dtype=int)
+    order_rows, order_columns = np.argsort(row_ids), np.argsort(column_ids)
+    rows = order_rows[np.searchsorted(row_ids, pairs[:, 0], sorter=order_rows)]
+    columns = order_columns[np.searchsorted(column_ids, pairs[:, 1], sorter=order_columns)]
+    matrix[rows, columns] = pairs[:, 2]
+    return matrix
+
+
+def read_matrix(course):
+    """The course's CO x PO and CO x PSO grids; 0 means not mapped."""
+    cos = list(CO.objects.filter(course=course).order_by("co_id").values_list("co_id", "co_label"))
+    co_ids = [co_id for co_id, _ in cos]
+    data = {"course_id": course.pk, "co_ids": co_ids, "co_labels": [label for _, label in cos]}
+    for target, targets in course_targets(course).items():
+        mapping_model, _, field = TARGETS[target]
+        columns = list(targets.values_list("pk", f"{field}_label"))
+        column_ids = [pk for pk, _ in columns]
+        pairs = mapping_model.objects.filter(co_id__in=co_ids).values_list("co_id", f"{field}_id", "strength")
+        data[f"{target}_ids"] = column_ids
+        data[f"{target}_labels"] = [label for _, label in columns]
+        data[f"{target}_matrix"] = dense(pairs, co_ids, column_ids).tolist()
+    return data
+
+
+def save_matrix(course, data):
+    """Replace the cells of the CO x PO and/or CO x PSO grids sent in ``data``.
+
+    ``data`` holds ``co_ids`` (rows, defaulting to all of the course's COs)
+    and, per target, ``po_ids``/``po_matrix`` or ``pso_ids``/``pso_matrix``
+    with strengths 0-3. Every cell of the sent grids is written: 0 removes a
+    mapping. Costs a constant number of queries whatever the grid size.
+    """
+    course_cos = set(CO.objects.filter(course=course).values_list("co_id", flat=True))
+    co_ids = data.get("co_ids") or sorted(course_cos)
+    if not set(co_ids) <= course_cos or len(set(co_ids)) != len(co_ids):
+        raise MappingError("co_ids must be distinct COs of this course.")
+
+    grids = []
+    for target, targets in course_targets(course).items():
+        if f"{target}_matrix" not in data:
+            continue
+        column_ids = data.get(f"{target}_ids") or list(targets.values_list("pk", flat=True))
+        if not set(column_ids) <= set(targets.values_list("pk", flat=True)) or len(set(column_ids)) != len(column_ids):
+            raise MappingError(f"{target}_ids must be distinct {target.upper()}s of this course's programmes.")
+        shape = (len(co_ids), len(column_ids))
+        try:
+            matrix = np.asarray(data[f"{target}_matrix"], dtype=float)
+        except (TypeError, ValueError):
+            matrix = None
+        if matrix is not None and matrix.size == 0 == shape[0] * shape[1]:
+            matrix = matrix.reshape(shape)
+        if matrix is None or matrix.shape != shape:
+            raise MappingError(f"{target}_matrix must be a {shape[0]} x {shape[1]} grid of numbers.")
+        if not np.isin(matrix, [0, 1, 2, 3]).all():
+            raise MappingError(f"{target}_matrix strengths must be 0, 1, 2 or 3.")
+        grids.append((target, column_ids, matrix.astype(int)))
+    if not grids:
+        raise MappingError("Send po_matrix and/or pso_matrix.")
+
+    counts = {}
+    with transaction.atomic():
+        for target, column_ids, matrix in grids:
+            mapping_model, _, field = TARGETS[target]
+            mapping_model.objects.filter(co_id__in=co_ids, **{f"{field}_id__in": column_ids}).delete()
+            rows, columns = np.nonzero(matrix)
+            mapping_model.objects.bulk_create([
+                mapping_model(co_id=co_ids[row], strength=int(matrix[row, column]), **{f"{field}_id": column_ids[column]})
+                for row, column in zip(rows.tolist(), columns.tolist())
+            ])
+            counts[target] = len(rows)
+        # Bulk writes send no signals; the course's batches feed the programme rollups
+        snapshots.mark_dirty(Batch.objects.filter(course=course).values_list("pk", flat=True))
+    return counts
@@ -0,0 +1,336 @@
+import numpy as np
+import pandas as pd
+from django.db import connection, transaction
+
+from . import scoring, snapshots
+from .importers import clean_text, first_errors, normalize_column, row_errors
+from .models import (
+    Assignment,
+    AssignmentMark,
+    ExamQuestion,
+    ExternalExam,
+    ExternalMark,
+    InternalExam,
+    InternalMark,
+    QuestionMark,
+    Quiz,
+    QuizMark,
+    Student,
+    Viva,
+    VivaMark,
+)
+
+# Assessment kind -> (assessment model, mark model, mark foreign key to the assessment)
+ASSESSMENTS = {
+    "internal": (InternalExam, InternalMark, "internal_exam"),
+    "quiz": (Quiz, QuizMark, "quiz"),
+    "assignment": (Assignment, AssignmentMark, "assignment"),
+    "viva": (Viva, VivaMark, "viva"),
+    "external": (ExternalExam, ExternalMark, "external_exam"),
+}
+
+
+class MarksError(ValueError):
+    """Marks that cannot be saved; ``errors`` lists the offending entries."""
+
+    def __init__(self, message, errors=()):
+        super().__init__(message)
+        self.errors = list(errors)
+
+
+def parse_marks(data):
+    """Turn ``[[student_id, marks], ...]`` into an (n, 2) integer array."""
+    try:
+        values = np.asarray(data, dtype=float)
+    except (TypeError, ValueError):
+        raise MarksError("Marks must be a list of [student_id, marks] pairs of numbers.")
+    if values.size == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    if values.ndim != 2 or values.shape[1] != 2:
+        raise MarksError("Marks must be a list of [student_id, marks] pairs of numbers.")
+    if not np.isfinite(values).all() or (values != np.floor(values)).any():
+        raise MarksError("Student ids and marks must be whole numbers.")
+    return values.astype(np.int64)
+
+
+def mark_errors(student_ids, marks, max_marks, known_students):
+    """Entries that fail validation, checked column-wise over the whole set."""
+    checks = [
+        (~np.isin(student_ids, known_students), "Student does not exist."),
+        (marks < 0, "Marks cannot be negative."),
+    ]
+    if max_marks is not None:
+        checks.append((marks > max_marks, f"Marks cannot exceed {max_marks}."))
+    _, first = np.unique(student_ids, return_index=True)
+    repeated = np.ones(len(student_ids), dtype=bool)
+    repeated[first] = False
+    checks.append((repeated, "Student appears more than once."))
+
+    errors = []
+    for failed, message in checks:
+        for i in np.flatnonzero(failed):
+            errors.append({"index": int(i), "student_id": int(student_ids[i]), "error": message})
+    return sorted(errors, key=lambda error: error["index"])
+
+
+def get_assessment(kind, assessment_id):
+    if kind not in ASSESSMENTS:
+        raise KeyError(kind)
+    assessment_model, _, _ = ASSESSMENTS[kind]
+    return assessment_model.objects.get(pk=assessment_id)
+
+
+def read_marks(kind, assessment_id):
+    """Marks of one assessment as ``[[student_id, marks], ...]`` ordered by student."""
+    _, mark_model, fk = ASSESSMENTS[kind]
+    rows = mark_model.objects.filter(**{fk: assessment_id}).order_by("student_id")
+    return [list(row) for row in rows.values_list("student_id", "marks")]
+
+
+def save_marks(kind, assessment, data):
+    """Validate and upsert a whole assessment's marks in one transaction.
+
+    Nothing is written unless every entry is valid. Costs three queries
+    (students, existing marks, upsert) whatever the number of students.
+    """
+    _, mark_model, fk = ASSESSMENTS[kind]
+    values = parse_marks(data)
+    student_ids, marks = values[:, 0], values[:, 1]
+
+    known = np.fromiter(
+        Student.objects.filter(pk__in=student_ids.tolist()).values_list("pk", flat=True), dtype=np.int64
+    )
+    errors = mark_errors(student_ids, marks, assessment.max_marks, known)
+    if errors:
+        raise MarksError(f"{len(errors)} of {len(student_ids)} entries are invalid.", errors)
+
+    existing = mark_model.objects.filter(**{fk: assessment, "student_id__in": student_ids.tolist()}).count()
+    rows = [
+        mark_model(student_id=student_id, marks=mark, **{fk: assessment})
+        for student_id, mark in zip(student_ids.tolist(), marks.tolist())
+    ]
+    with transaction.atomic():
+        mark_model.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=[fk, "student"], update_fields=["marks"]
+        )
+        if mark_model is InternalMark:
+            # bulk_create sends no signals; internal marks feed CO attainment
+            snapshots.mark_dirty([assessment.batch_id])
+    return {"saved": len(rows), "created": len(rows) - existing, "updated": existing}
+
+
+def exam_questions(exam):
+    """(question ids, maximum marks) of an internal exam's questions, ordered by id."""
+    questions = np.array(
+        list(
+            ExamQuestion.objects.filter(section__internal_exam=exam).order_by("q_id")
+            .values_list("q_id", "question_bank__marks")
+        ),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    return questions[:, 0], questions[:, 1]
+
+
+def read_question_marks(exam):
+    """An exam's question-level marks as a students x questions grid; None means not answered."""
+    question_ids, max_marks = exam_questions(exam)
+    rows = np.array(
+        list(
+            QuestionMark.objects.filter(exam_question__section__internal_exam=exam)
+            .values_list("student_id", "exam_question_id", "marks")
+        ),
+        dtype=np.int64,
+    ).reshape(-1, 3)
+    student_ids, student_rows = np.unique(rows[:, 0], return_inverse=True)
+    grid = np.full((len(student_ids), len(question_ids)), None, dtype=object)
+    grid[student_rows, np.searchsorted(question_ids, rows[:, 1])] = rows[:, 2].tolist()
+    return {
+        "exam_id": exam.pk,
+        "question_ids": question_ids.tolist(),
+        "max_marks": max_marks.tolist(),
+        "student_ids": student_ids.tolist(),
+        "marks": grid.tolist(),
+    }
+
+
+def save_question_marks(exam, data):
+    """Replace the cells of an exam's students x questions marks grid sent in ``data``.
+
+    ``data`` holds ``student_ids`` (rows), ``question_ids`` (columns,
+    defaulting to all of the exam's questions) and ``marks``, the grid;
+    null cells are questions not answered and clear any saved marks.
+    Nothing is written unless every cell is valid; the write is one upsert
+    whatever the size of the grid, after which the exam's totals are
+    re-scored.
+    """
+    question_ids, max_marks = exam_questions(exam)
+    columns = np.asarray(data.get("question_ids") or question_ids.tolist())
+    if (
+        columns.ndim != 1 or not np.isin(columns, question_ids).all()
+        or len(np.unique(columns)) != len(columns)
+    ):
+        raise MarksError("question_ids must be distinct questions of this exam.")
+    columns = columns.astype(np.int64)
+    max_marks = max_marks[np.searchsorted(question_ids, columns)]
+
+    try:
+        student_ids = np.asarray(data.get("student_ids", []), dtype=float)
+        grid = np.asarray(data.get("marks", []), dtype=float)  # null becomes NaN
+    except (TypeError, ValueError):
+        raise MarksError("student_ids and marks must be numbers.")
+    if student_ids.ndim != 1:
+        raise MarksError("student_ids must be a list of student ids.")
+    shape = (len(student_ids), len(columns))
+    if grid.size == 0 == shape[0] * shape[1]:
+        grid = grid.reshape(shape)
+    if grid.shape != shape:
+        raise MarksError(f"marks must be a {shape[0]} x {shape[1]} grid.")
+    answered = ~np.isnan(grid)
+    if (student_ids != np.floor(student_ids)).any() or (grid[answered] != np.floor(grid[answered])).any():
+        raise MarksError("Student ids and marks must be whole numbers.")
+    student_ids = student_ids.astype(np.int64)
+
+    known = np.fromiter(
+        Student.objects.filter(pk__in=student_ids.tolist()).values_list("pk", flat=True), dtype=np.int64
+    )
+    _, first = np.unique(student_ids, return_index=True)
+    repeated = np.ones(len(student_ids), dtype=bool)
+    repeated[first] = False
+    errors = [
+        {"index": int(i), "student_id": int(student_ids[i]), "error": message}
+        for failed, message in (
+            (~np.isin(student_ids, known), "Student does not exist."),
+            (repeated, "Student appears more than once."),
+        )
+        for i in np.flatnonzero(failed)
+    ]
+    with np.errstate(invalid="ignore"):
+        cell_checks = [(grid < 0, "Marks cannot be negative."), (grid > max_marks, "Marks exceed the question's marks.")]
+    for failed, message in cell_checks:
+        for i, j in zip(*np.nonzero(failed)):
+            errors.append({
+                "index": int(i), "student_id": int(student_ids[i]), "question_id": int(columns[j]), "error": message
+            })
+    if errors:
+        errors.sort(key=lambda error: error["index"])
+        raise MarksError(f"{len(errors)} entries are invalid.", errors)
+
+    existing = np.array(
+        list(
+            QuestionMark.objects.filter(exam_question_id__in=columns.tolist(), student_id__in=student_ids.tolist())
+            .values_list("pk", "student_id", "exam_question_id")
+        ),
+        dtype=np.int64,
+    ).reshape(-1, 3)
+    # Saved cells now sent empty are deleted; every answered cell is upserted
+    order_rows, order_columns = np.argsort(student_ids), np.argsort(columns)
+    cleared = ~answered[
+        order_rows[np.searchsorted(student_ids, existing[:, 1], sorter=order_rows)],
+        order_columns[np.searchsorted(columns, existing[:, 2], sorter=order_columns)],
+    ]
+    rows, cells = np.nonzero(answered)
+    with transaction.atomic():
+        if cleared.any():
+            QuestionMark.objects.filter(pk__in=existing[cleared, 0].tolist()).delete()
+        QuestionMark.objects.bulk_create(
+            [
+                QuestionMark(exam_question_id=question_id, student_id=student_id, marks=mark)
+                for question_id, student_id, mark in zip(
+                    columns[cells].tolist(), student_ids[rows].tolist(), grid[rows, cells].astype(int).tolist()
+                )
+            ],
+            update_conflicts=True,
+            unique_fields=["exam_question", "student"],
+            update_fields=["marks"],
+        )
+        scoring.score_exam(exam, cleared=existing[cleared, 1])
+        # bulk_create sends no signals; one flag per save, whatever the cells, as in save_marks
+        snapshots.mark_dirty([exam.batch_id])
+    updated = len(existing) - int(cleared.sum())
+    return {"saved": len(rows), "created": len(rows) - updated, "updated": updated, "cleared": int(cleared.sum())}
+
+
+# External result spreadsheet header (lower-cased, stripped) -> column
+EXTERNAL_MARK_COLUMNS = {
+    "register_no": "register_no",
+    "register number": "register_no",
+    "examination register number": "register_no",
+    "marks": "marks",
+}
+
+
+def upsert_external_marks(exam, student_ids, marks):
+    """Insert or update ``exam``'s marks in one transaction.
+
+    Where the database supports ON CONFLICT this is a single executemany,
+    skipping the per-object cost of bulk_create on result sheets with
+    hundreds of thousands of rows.
+    """
+    with transaction.atomic():
+        if not connection.features.supports_update_conflicts_with_target:
+            ExternalMark.objects.bulk_create(
+                [
+                    ExternalMark(external_exam_id=exam.pk, student_id=student_id, marks=mark)
+                    for student_id, mark in zip(student_ids, marks)
+                ],
+                update_conflicts=True,
+                unique_fields=["external_exam", "student"],
+                update_fields=["marks"],
+            )
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {ExternalMark._meta.db_table} (external_exam_id, student_id, marks) "
+                "VALUES (%s, %s, %s) "
+                "ON CONFLICT (external_exam_id, student_id) DO UPDATE SET marks = excluded.marks",
+                [(exam.pk, student_id, mark) for student_id, mark in zip(student_ids, marks)],
+            )
+
+
+def external_marks_importer(exam):
+    """Return a chunk importer (for ``importers.run_import``) of ``exam``'s results.
+
+    Every register number in the database is loaded into one map up front,
+    so chunks are resolved to students in memory. Each chunk is validated
+    against ``exam.max_marks`` column-wise and upserted in one statement
+    batch; rows for unknown register numbers are reported, not written.
+    """
+    students = {
+        register_no.strip().upper(): student_id
+        for register_no, student_id in Student.objects.exclude(register_no=None)
+        .values_list("register_no", "student_id").iterator()
+    }
+    # Register number -> student id as an index, so a chunk is resolved with one reindex
+    students = pd.Series(students, dtype="float64")
+    students = students[~students.index.duplicated()]
+
+    def import_external_marks(df):
+        df = df.rename(columns=normalize_column).rename(columns=EXTERNAL_MARK_COLUMNS)
+        df = df.reindex(columns=["register_no", "marks"]).apply(clean_text)
+        register_no = df["register_no"].str.upper()
+        student_id = pd.Series(students.reindex(register_no.to_numpy(object)).to_numpy(), index=df.index)
+        marks = pd.to_numeric(df["marks"], errors="coerce")
+
+        checks = [
+            (register_no.isna(), "register_no is required."),
+            (marks.isna() | (marks % 1 != 0), "Marks must be a whole number."),
+            (marks < 0, "Marks cannot be negative."),
+            (marks > exam.max_marks, f"Marks cannot exceed {exam.max_marks}."),
+        ]
+        invalid = first_errors(df.index, checks)
+        unmatched = (invalid == "") & student_id.isna()
+        valid = (invalid == "") & ~unmatched
+
+        rows = pd.DataFrame({"student_id": student_id[valid], "marks": marks[valid]}).astype(int)
+        # A later row for the same student wins
+        rows = rows.drop_duplicates("student_id", keep="last")
+        upsert_external_marks(exam, rows["student_id"].tolist(), rows["marks"].tolist())
+
+        return {
+            "saved": len(rows),
+            "invalid": row_errors(df, invalid, ["register_no"]),
+            "unmatched": register_no[unmatched].tolist(),
+        }
+
+    return import_external_marks
+
@@ -0,0 +1,283 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:45
+
+import django.contrib.auth.models
+import django.contrib.auth.validators
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Batch',
+            fields=[
+                ('batch_id', models.AutoField(primary_key=True, serialize=False)),
+                ('year', models.IntegerField()),
+                ('part', models.CharField(max_length=50)),
+                ('active', models.BooleanField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Course',
+            fields=[
+                ('course_id', models.AutoField(primary_key=True, serialize=False)),
+                ('course_code', models.CharField(max_length=50)),
+                ('title', models.CharField(max_length=100)),
+                ('semester', models.IntegerField()),
+                ('credits', models.IntegerField()),
+                ('no_of_cos', models.IntegerField()),
+                ('syllabus_year', models.IntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Department',
+            fields=[
+                ('dept_id', models.AutoField(primary_key=True, serialize=False)),
+                ('dept_name', models.CharField(max_length=255)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Level',
+            fields=[
+                ('level_id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CustomUser',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('is_superuser', models.BooleanField(default=False, help_text='Designates that this user has all permissions without explicitly assigning them.', verbose_name='superuser status')),
+                ('username', models.CharField(error_messages={'unique': 'A user with that username already exists.'}, help_text='Required. 150 characters or fewer. Letters, digits and @/./+/-/_ only.', max_length=150, unique=True, validators=[django.contrib.auth.validators.UnicodeUsernameValidator()], verbose_name='username')),
+                ('first_name', models.CharField(blank=True, max_length=150, verbose_name='first name')),
+                ('last_name', models.CharField(blank=True, max_length=150, verbose_name='last name')),
+                ('email', models.EmailField(blank=True, max_length=254, verbose_name='email address')),
+                ('is_staff', models.BooleanField(default=False, help_text='Designates whether the user can log into this admin site.', verbose_name='staff status')),
+                ('is_active', models.BooleanField(default=True, help_text='Designates whether this user should be treated as active. Unselect this instead of deleting accounts.', verbose_name='active')),
+                ('date_joined', models.DateTimeField(default=django.utils.timezone.now, verbose_name='date joined')),
+                ('role', models.CharField(choices=[('admin', 'Admin'), ('teacher', 'Teacher')], default='teacher', max_length=20)),
+                ('is_first_login', models.BooleanField(default=True)),
+                ('groups', models.ManyToManyField(blank=True, help_text='The groups this user belongs to. A user will get all permissions granted to each of their groups.', related_name='user_set', related_query_name='user', to='auth.group', verbose_name='groups')),
+                ('user_permissions', models.ManyToManyField(blank=True, help_text='Specific permissions for this user.', related_name='user_set', related_query_name='user', to='auth.permission', verbose_name='user permissions')),
+            ],
+            options={
+                'verbose_name': 'user',
+                'verbose_name_plural': 'users',
+                'abstract': False,
+            },
+            managers=[
+                ('objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Assignment',
+            fields=[
+                ('assignment_id', models.AutoField(primary_key=True, serialize=False)),
+                ('max_marks', models.IntegerField()),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.batch')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CO',
+            fields=[
+                ('co_id', models.AutoField(primary_key=True, serialize=False)),
+                ('co_label', models.CharField(max_length=255)),
+                ('co_description', models.TextField()),
+                ('remember', models.IntegerField()),
+                ('understand', models.IntegerField()),
+                ('apply', models.IntegerField()),
+                ('analyze', models.IntegerField()),
+                ('evaluate', models.IntegerField()),
+                ('create', models.IntegerField()),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='copoapp.course')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='batch',
+            name='course',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.course'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='dept',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.department'),
+        ),
+        migrations.CreateModel(
+            name='ExternalExam',
+            fields=[
+                ('external_exam_id', models.AutoField(primary_key=True, serialize=False)),
+                ('max_marks', models.IntegerField()),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.batch')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Faculty',
+            fields=[
+                ('faculty_id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('phone_no', models.CharField(max_length=15)),
+                ('dept', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.department')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='batch',
+            name='faculty_id',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.faculty'),
+        ),
+        migrations.CreateModel(
+            name='InternalExam',
+            fields=[
+                ('int_exam_id', models.AutoField(primary_key=True, serialize=False)),
+                ('exam_name', models.CharField(blank=True, max_length=20, null=True)),
+                ('duration', models.IntegerField(blank=True, null=True)),
+                ('max_marks', models.IntegerField(blank=True, null=True)),
+                ('date', models.DateField(blank=True, default=django.utils.timezone.now, null=True)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.batch')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ExamSection',
+            fields=[
+                ('section_id', models.AutoField(primary_key=True, serialize=False)),
+                ('section_name', models.CharField(max_length=255)),
+                ('no_of_questions', models.IntegerField()),
+                ('no_of_questions_to_be_answered', models.IntegerField()),
+                ('ceiling_mark', models.IntegerField(blank=True, default=0, null=True)),
+                ('description', models.CharField(blank=True, default='Default description', max_length=500, null=True)),
+                ('internal_exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.internalexam')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PO',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('po_label', models.CharField(blank=True, max_length=255, null=True)),
+                ('pos_description', models.TextField()),
+                ('level', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.level')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Programme',
+            fields=[
+                ('programme_id', models.AutoField(primary_key=True, serialize=False)),
+                ('programme_name', models.CharField(max_length=255)),
+                ('no_of_pos', models.IntegerField(default=1)),
+                ('duration', models.IntegerField()),
+                ('dept', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.department')),
+                ('level', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.level')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PSO',
+            fields=[
+                ('pso_id', models.AutoField(primary_key=True, serialize=False)),
+                ('pso_label', models.CharField(max_length=255)),
+                ('pso_desc', models.TextField()),
+                ('programme', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.programme')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuestionBank',
+            fields=[
+                ('question_id', models.AutoField(primary_key=True, serialize=False)),
+                ('question_text', models.TextField()),
+                ('marks', models.IntegerField(default=0)),
+                ('co', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.co')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.course')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ExamQuestion',
+            fields=[
+                ('q_id', models.AutoField(primary_key=True, serialize=False)),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.examsection')),
+                ('question_bank', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.questionbank')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Quiz',
+            fields=[
+                ('quiz_id', models.AutoField(primary_key=True, serialize=False)),
+                ('max_marks', models.IntegerField()),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.batch')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Student',
+            fields=[
+                ('student_id', models.AutoField(primary_key=True, serialize=False)),
+                ('register_no', models.CharField(blank=True, max_length=50, null=True, unique=True)),
+                ('admn_no', models.CharField(blank=True, max_length=50, null=True, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('year_of_admission', models.IntegerField()),
+                ('phone_number', models.CharField(blank=True, max_length=15, null=True)),
+                ('email', models.EmailField(blank=True, max_length=254, null=True)),
+                ('sex', models.CharField(blank=True, choices=[('M', 'Male'), ('F', 'Female')], max_length=1, null=True)),
+                ('programme', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.programme')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuizMark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marks', models.IntegerField()),
+                ('quiz', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='copoapp.quiz')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.student')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InternalMark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marks', models.IntegerField()),
+                ('internal_exam', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='copoapp.internalexam')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.student')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ExternalMark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marks', models.IntegerField()),
+                ('external_exam', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='copoapp.externalexam')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.student')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AssignmentMark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marks', models.IntegerField()),
+                ('assignment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='copoapp.assignment')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.student')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Viva',
+            fields=[
+                ('viva_id', models.AutoField(primary_key=True, serialize=False)),
+                ('max_marks', models.IntegerField()),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.batch')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VivaMark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marks', models.IntegerField()),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.student')),
+                ('viva', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='copoapp.viva')),
+            ],
+        ),
+    ]
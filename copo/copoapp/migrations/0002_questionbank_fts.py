@@ -0,0 +1,63 @@
+from django.db import migrations
+
+# External-content FTS5 index over QuestionBank.question_text. Triggers keep
+# it in sync on every insert, update and delete, including bulk writes that
+# bypass model signals.
+FORWARD_SQL = [
+    """
+    CREATE VIRTUAL TABLE copoapp_questionbank_fts USING fts5(
+        question_text,
+        content='copoapp_questionbank',
+        content_rowid='question_id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER copoapp_questionbank_fts_ai AFTER INSERT ON copoapp_questionbank BEGIN
+        INSERT INTO copoapp_questionbank_fts(rowid, question_text)
+        VALUES (new.question_id, new.question_text);
+    END
+    """,
+    """
+    CREATE TRIGGER copoapp_questionbank_fts_ad AFTER DELETE ON copoapp_questionbank BEGIN
+        INSERT INTO copoapp_questionbank_fts(copoapp_questionbank_fts, rowid, question_text)
+        VALUES ('delete', old.question_id, old.question_text);
+    END
+    """,
+    """
+    CREATE TRIGGER copoapp_questionbank_fts_au AFTER UPDATE ON copoapp_questionbank BEGIN
+        INSERT INTO copoapp_questionbank_fts(copoapp_questionbank_fts, rowid, question_text)
+        VALUES ('delete', old.question_id, old.question_text);
+        INSERT INTO copoapp_questionbank_fts(rowid, question_text)
+        VALUES (new.question_id, new.question_text);
+    END
+    """,
+    "INSERT INTO copoapp_questionbank_fts(copoapp_questionbank_fts) VALUES ('rebuild')",
+]
+
+REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS copoapp_questionbank_fts_au",
+    "DROP TRIGGER IF EXISTS copoapp_questionbank_fts_ad",
+    "DROP TRIGGER IF EXISTS copoapp_questionbank_fts_ai",
+    "DROP TABLE IF EXISTS copoapp_questionbank_fts",
+]
+
+
+def run_sql(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("copoapp", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sql(FORWARD_SQL), run_sql(REVERSE_SQL)),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:47
+
+import logging
+
+from django.db import migrations, models
+from django.db.models import Max
+
+logger = logging.getLogger(__name__)
+
+PAIRS = [
+    ("AssignmentMark", "assignment", "student"),
+    ("ExamQuestion", "section", "question_bank"),
+    ("ExternalMark", "external_exam", "student"),
+    ("InternalMark", "internal_exam", "student"),
+    ("QuizMark", "quiz", "student"),
+    ("VivaMark", "viva", "student"),
+]
+
+
+def drop_duplicate_pairs(apps, schema_editor):
+    # Keep the most recently written row of every duplicated pair so the
+    # unique constraints below can be created.
+    for model_name, outer, inner in PAIRS:
+        model = apps.get_model("copoapp", model_name)
+        rows = model.objects.filter(**{f"{outer}__isnull": False})
+        keep = (
+            rows.values(outer, inner)
+            .annotate(keep_pk=Max("pk"))
+            .values_list("keep_pk", flat=True)
+        )
+        deleted, _ = rows.exclude(pk__in=list(keep)).delete()
+        if deleted:
+            logger.warning("Deleted %d duplicate %s row(s), keeping the newest of each pair", deleted, model_name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('copoapp', '0002_questionbank_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_pairs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='assignmentmark',
+            constraint=models.UniqueConstraint(fields=('assignment', 'student'), name='unique_assignment_mark'),
+        ),
+        migrations.AddConstraint(
+            model_name='examquestion',
+            constraint=models.UniqueConstraint(fields=('section', 'question_bank'), name='unique_exam_question'),
+        ),
+        migrations.AddConstraint(
+            model_name='externalmark',
+            constraint=models.UniqueConstraint(fields=('external_exam', 'student'), name='unique_external_mark'),
+        ),
+        migrations.AddConstraint(
+            model_name='internalmark',
+            constraint=models.UniqueConstraint(fields=('internal_exam', 'student'), name='unique_internal_mark'),
+        ),
+        migrations.AddConstraint(
+            model_name='quizmark',
+            constraint=models.UniqueConstraint(fields=('quiz', 'student'), name='unique_quiz_mark'),
+        ),
+        migrations.AddConstraint(
+            model_name='vivamark',
+            constraint=models.UniqueConstraint(fields=('viva', 'student'), name='unique_viva_mark'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:55
+
+import logging
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+logger = logging.getLogger(__name__)
+
+
+def merge_duplicate_cos(CO, course_id):
+    # The merged course now has each duplicate's COs as well. Keep the oldest
+    # CO of each label and move whatever points at the others onto it.
+    keep = {}
+    extra = {}
+    for co_id, label in CO.objects.filter(course_id=course_id).order_by("pk").values_list("pk", "co_label"):
+        if label in keep:
+            extra[co_id] = keep[label]
+        else:
+            keep[label] = co_id
+    for relation in CO._meta.related_objects:
+        if not relation.one_to_many:
+            continue
+        for co_id, kept in extra.items():
+            relation.related_model.objects.filter(**{relation.field.attname: co_id}).update(
+                **{relation.field.attname: kept}
+            )
+    CO.objects.filter(pk__in=list(extra)).delete()
+    return len(extra)
+
+
+def merge_duplicate_courses(apps, schema_editor):
+    # Re-uploading a syllabus used to duplicate every course. Keep the oldest
+    # course of each (course_code, syllabus_year) and move everything that
+    # points at a duplicate onto it before the duplicates are removed.
+    Course = apps.get_model("copoapp", "Course")
+    CO = apps.get_model("copoapp", "CO")
+    related = [apps.get_model("copoapp", name) for name in ("CO", "Batch", "QuestionBank")]
+    duplicates = (
+        Course.objects.values("course_code", "syllabus_year")
+        .annotate(rows=Count("pk"), keep=Min("pk"))
+        .filter(rows__gt=1)
+    )
+    for group in duplicates:
+        extra = Course.objects.filter(
+            course_code=group["course_code"], syllabus_year=group["syllabus_year"]
+        ).exclude(pk=group["keep"])
+        for model in related:
+            model.objects.filter(course__in=extra).update(course_id=group["keep"])
+        extra.delete()
+        merged = merge_duplicate_cos(CO, group["keep"])
+        logger.warning(
+            "Merged duplicate course %s (%s) and %d CO(s) sharing a label",
+            group["course_code"], group["syllabus_year"], merged,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('copoapp', '0004_dashboardcounter'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_courses, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='course',
+            constraint=models.UniqueConstraint(fields=('course_code', 'syllabus_year'), name='unique_course_syllabus'),
+        ),
+    ]
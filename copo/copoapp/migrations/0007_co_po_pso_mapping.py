@@ -0,0 +1,38 @@
+# Generated by Django 5.1.5 on 2026-10-18 14:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('copoapp', '0006_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='COPOMapping',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('strength', models.PositiveSmallIntegerField(choices=[(1, 'Low'), (2, 'Medium'), (3, 'High')])),
+                ('co', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.co')),
+                ('po', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.po')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('co', 'po'), name='unique_co_po_mapping')],
+            },
+        ),
+        migrations.CreateModel(
+            name='COPSOMapping',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('strength', models.PositiveSmallIntegerField(choices=[(1, 'Low'), (2, 'Medium'), (3, 'High')])),
+                ('co', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.co')),
+                ('pso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.pso')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('co', 'pso'), name='unique_co_pso_mapping')],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.1.5 on 2026-10-18 14:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('copoapp', '0007_co_po_pso_mapping'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttainmentState',
+            fields=[
+                ('batch', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='copoapp.batch')),
+                ('dirty', models.BooleanField(default=True)),
+                ('marked_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('computed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='COAttainment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('average_percent', models.FloatField(blank=True, null=True)),
+                ('attainment_percent', models.FloatField(blank=True, null=True)),
+                ('level', models.PositiveSmallIntegerField(default=0)),
+                ('students_assessed', models.IntegerField(default=0)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.batch')),
+                ('co', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.co')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('batch', 'co'), name='unique_batch_co_attainment')],
+            },
+        ),
+        migrations.CreateModel(
+            name='POAttainment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('attainment', models.FloatField(blank=True, null=True)),
+                ('cos_mapped', models.IntegerField(default=0)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('po', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.po')),
+                ('programme', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.programme')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('programme', 'year', 'po'), name='unique_programme_po_attainment')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PSOAttainment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('attainment', models.FloatField(blank=True, null=True)),
+                ('cos_mapped', models.IntegerField(default=0)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('programme', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.programme')),
+                ('pso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.pso')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('programme', 'year', 'pso'), name='unique_programme_pso_attainment')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.5 on 2026-10-18 14:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('copoapp', '0008_attainment_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionMark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marks', models.PositiveSmallIntegerField()),
+                ('exam_question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.examquestion')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='copoapp.student')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('exam_question', 'student'), name='unique_question_mark')],
+            },
+        ),
+    ]
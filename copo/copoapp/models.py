@@ -53,6 +53,13 @@ class Course(models.Model):
     no_of_cos = models.IntegerField()
     syllabus_year = models.IntegerField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["course_code", "syllabus_year"], name="unique_course_syllabus"
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -131,6 +138,32 @@ class PSO(models.Model):
         return self.pso_label
 
 
+# Correlation strengths of the CO-PO and CO-PSO articulation matrices
+STRENGTH_CHOICES = [(1, "Low"), (2, "Medium"), (3, "High")]
+
+
+class COPOMapping(models.Model):
+    co = models.ForeignKey(CO, on_delete=models.CASCADE)
+    po = models.ForeignKey(PO, on_delete=models.CASCADE)
+    strength = models.PositiveSmallIntegerField(choices=STRENGTH_CHOICES)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["co", "po"], name="unique_co_po_mapping"),
+        ]
+
+
+class COPSOMapping(models.Model):
+    co = models.ForeignKey(CO, on_delete=models.CASCADE)
+    pso = models.ForeignKey(PSO, on_delete=models.CASCADE)
+    strength = models.PositiveSmallIntegerField(choices=STRENGTH_CHOICES)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["co", "pso"], name="unique_co_pso_mapping"),
+        ]
+
+
 class ExternalExam(models.Model):
     external_exam_id = models.AutoField(primary_key=True)
     batch = models.ForeignKey(Batch, on_delete=models.CASCADE)
@@ -188,12 +221,24 @@ class ExternalMark(models.Model):
     )
     marks = models.IntegerField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["external_exam", "student"], name="unique_external_mark"
+            ),
+        ]
+
 
 class VivaMark(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     viva = models.ForeignKey(Viva, on_delete=models.CASCADE, null=True, blank=True)
     marks = models.IntegerField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["viva", "student"], name="unique_viva_mark"),
+        ]
+
 
 class QuizMark(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
@@ -202,6 +247,11 @@ class QuizMark(models.Model):
     )  # Once all existing rows have valid quiz values, make the field non-nullable again by removing null=True, blank=True and running migrations.
     marks = models.IntegerField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["quiz", "student"], name="unique_quiz_mark"),
+        ]
+
 
 class AssignmentMark(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
@@ -210,6 +260,13 @@ class AssignmentMark(models.Model):
     )
     marks = models.IntegerField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["assignment", "student"], name="unique_assignment_mark"
+            ),
+        ]
+
 
 class InternalMark(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
@@ -218,6 +275,13 @@ class InternalMark(models.Model):
     )
     marks = models.IntegerField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["internal_exam", "student"], name="unique_internal_mark"
+            ),
+        ]
+
 
 class ExamSection(models.Model):
     section_id = models.AutoField(primary_key=True)
@@ -244,3 +308,118 @@ class ExamQuestion(models.Model):
     q_id = models.AutoField(primary_key=True)
     section = models.ForeignKey(ExamSection, on_delete=models.CASCADE)
     question_bank = models.ForeignKey(QuestionBank, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["section", "question_bank"], name="unique_exam_question"
+            ),
+        ]
+
+
+class QuestionMark(models.Model):
+    """A student's marks on one question of an internal exam; no row means not answered."""
+
+    exam_question = models.ForeignKey(ExamQuestion, on_delete=models.CASCADE)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    marks = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            # Also the index a whole exam's marks are read through
+            models.UniqueConstraint(
+                fields=["exam_question", "student"], name="unique_question_mark"
+            ),
+        ]
+
+
+class DashboardCounter(models.Model):
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class Job(models.Model):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    job_id = models.AutoField(primary_key=True)
+    kind = models.CharField(max_length=50)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    payload = models.JSONField(default=dict)
+    progress = models.IntegerField(default=0)  # rows or steps done so far
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "job_id"], name="job_status_idx")]
+
+    def __str__(self):
+        return f"{self.kind} #{self.job_id} ({self.status})"
+
+
+class AttainmentState(models.Model):
+    """Whether a batch's attainment snapshots are out of date with its marks."""
+
+    batch = models.OneToOneField(Batch, on_delete=models.CASCADE, primary_key=True)
+    dirty = models.BooleanField(default=True)
+    marked_at = models.DateTimeField(default=timezone.now)
+    computed_at = models.DateTimeField(null=True, blank=True)
+
+
+class COAttainment(models.Model):
+    batch = models.ForeignKey(Batch, on_delete=models.CASCADE)
+    co = models.ForeignKey(CO, on_delete=models.CASCADE)
+    average_percent = models.FloatField(null=True, blank=True)
+    attainment_percent = models.FloatField(null=True, blank=True)
+    level = models.PositiveSmallIntegerField(default=0)
+    students_assessed = models.IntegerField(default=0)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["batch", "co"], name="unique_batch_co_attainment"),
+        ]
+
+
+class POAttainment(models.Model):
+    programme = models.ForeignKey(Programme, on_delete=models.CASCADE)
+    year = models.IntegerField()
+    po = models.ForeignKey(PO, on_delete=models.CASCADE)
+    attainment = models.FloatField(null=True, blank=True)
+    cos_mapped = models.IntegerField(default=0)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["programme", "year", "po"], name="unique_programme_po_attainment"),
+        ]
+
+
+class PSOAttainment(models.Model):
+    programme = models.ForeignKey(Programme, on_delete=models.CASCADE)
+    year = models.IntegerField()
+    pso = models.ForeignKey(PSO, on_delete=models.CASCADE)
+    attainment = models.FloatField(null=True, blank=True)
+    cos_mapped = models.IntegerField(default=0)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["programme", "year", "pso"], name="unique_programme_pso_attainment"),
+        ]
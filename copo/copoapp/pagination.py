@@ -0,0 +1,70 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(pk):
+    raw = json.dumps({"after": pk}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        after = json.loads(raw)["after"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise PaginationError("Invalid cursor.")
+    if not isinstance(after, int):
+        raise PaginationError("Invalid cursor.")
+    return after
+
+
+def get_page_size(value):
+    default = getattr(settings, "COPO_PAGE_SIZE", 100)
+    maximum = getattr(settings, "COPO_MAX_PAGE_SIZE", 1000)
+    if value in (None, ""):
+        return default
+    try:
+        page_size = int(value)
+    except ValueError:
+        raise PaginationError("page_size must be an integer.")
+    if page_size < 1:
+        raise PaginationError("page_size must be a positive integer.")
+    return min(page_size, maximum)
+
+
+def paginate(request, projection, queryset=None):
+    """Keyset-paginate a projection on its primary key.
+
+    Pagination is opt-in: returns None unless the request carries a
+    ``cursor`` or ``page_size`` parameter. Each page is a single
+    ``WHERE pk > after ORDER BY pk LIMIT n`` query, so deep pages cost
+    the same as the first one.
+    """
+    if "cursor" not in request.GET and "page_size" not in request.GET:
+        return None
+
+    page_size = get_page_size(request.GET.get("page_size"))
+    after = decode_cursor(request.GET.get("cursor"))
+
+    if queryset is None:
+        queryset = projection.queryset()
+    queryset = queryset.order_by("pk")
+    if after is not None:
+        queryset = queryset.filter(pk__gt=after)
+
+    # Fetch one extra row to know whether another page exists.
+    rows = projection.rows(queryset[: page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1][projection.pk_key])
+    return {"results": rows, "next": next_cursor}
@@ -0,0 +1,124 @@
+from .models import Batch, CO, Course, Faculty, PO, PSO, Programme, QuestionBank, Student
+
+
+class FieldSelectionError(ValueError):
+    pass
+
+
+class Projection:
+    """Builds list payloads from a single values_list() query.
+
+    ``fields`` is a sequence of (output key, ORM lookup) pairs. Related
+    columns are pulled in through the lookup path, so the whole list is
+    one joined SELECT instead of one query per row.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = tuple(fields)
+        self.keys = tuple(key for key, _ in self.fields)
+        pk_name = model._meta.pk.name
+        self.pk_key = next((key for key, lookup in self.fields if lookup == pk_name), None)
+
+    def select(self, keys):
+        """Return a projection limited to ``keys``; the primary key is always kept."""
+        unknown = [key for key in keys if key not in self.keys]
+        if unknown:
+            raise FieldSelectionError(
+                f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(self.keys)}."
+            )
+        keep = set(keys) | {self.pk_key}
+        return Projection(self.model, [field for field in self.fields if field[0] in keep])
+
+    def for_request(self, request):
+        """Apply a ``?fields=a,b`` sparse fieldset, if the request has one."""
+        value = request.GET.get("fields", "")
+        keys = [key.strip() for key in value.split(",") if key.strip()]
+        return self.select(keys) if keys else self
+
+    def queryset(self):
+        return self.model.objects.all()
+
+    def rows(self, queryset=None):
+        if queryset is None:
+            queryset = self.queryset()
+        lookups = [lookup for _, lookup in self.fields]
+        return [dict(zip(self.keys, row)) for row in queryset.values_list(*lookups)]
+
+    def iter_rows(self, queryset=None, chunk_size=2000):
+        """Like rows(), but fetches from the cursor ``chunk_size`` rows at a time."""
+        if queryset is None:
+            queryset = self.queryset()
+        lookups = [lookup for _, lookup in self.fields]
+        for row in queryset.values_list(*lookups).iterator(chunk_size=chunk_size):
+            yield dict(zip(self.keys, row))
+
+
+BATCH_LIST = Projection(Batch, [
+    ("batch_id", "batch_id"),
+    ("faculty", "faculty_id__name"),
+    ("course", "course__title"),
+    ("year", "year"),
+    ("part", "part"),
+    ("active", "active"),
+])
+
+COURSE_LIST = Projection(Course, [
+    ("course_id", "course_id"),
+    ("title", "title"),
+    ("dept", "dept__dept_name"),
+])
+
+PROGRAMME_LIST = Projection(Programme, [
+    ("programme_id", "programme_id"),
+    ("programme_name", "programme_name"),
+    ("department", "dept__dept_name"),
+    ("level", "level__name"),
+])
+
+QUESTION_LIST = Projection(QuestionBank, [
+    ("question_id", "question_id"),
+    ("question_text", "question_text"),
+    ("marks", "marks"),
+    ("course", "course__title"),
+    ("co_label", "co__co_label"),
+])
+
+CO_LIST = Projection(CO, [
+    ("co_id", "co_id"),
+    ("co_label", "co_label"),
+    ("co_description", "co_description"),
+    ("course", "course__title"),
+])
+
+FACULTY_LIST = Projection(Faculty, [
+    ("faculty_id", "faculty_id"),
+    ("name", "name"),
+    ("dept", "dept__dept_name"),
+])
+
+PO_LIST = Projection(PO, [
+    ("id", "id"),
+    ("po_label", "po_label"),
+    ("pos_description", "pos_description"),
+    ("level_id", "level_id"),
+    ("level_name", "level__name"),
+])
+
+PSO_LIST = Projection(PSO, [
+    ("pso_id", "pso_id"),
+    ("pso_label", "pso_label"),
+    ("programme", "programme__programme_name"),
+    ("pso_desc", "pso_desc"),
+])
+
+STUDENT_LIST = Projection(Student, [
+    ("student_id", "student_id"),
+    ("name", "name"),
+    ("register_no", "register_no"),
+    ("year_of_admission", "year_of_admission"),
+    ("phone_number", "phone_number"),
+    ("email", "email"),
+    ("admn_no", "admn_no"),
+    ("programme__programme_name", "programme__programme_name"),
+])
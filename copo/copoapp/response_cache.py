@@ -0,0 +1,170 @@
+import hashlib
+import threading
+import uuid
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.views.decorators.http import condition
+
+from .models import (
+    CO,
+    PO,
+    PSO,
+    Batch,
+    Course,
+    Department,
+    Faculty,
+    Level,
+    Programme,
+    QuestionBank,
+    Student,
+)
+
+# Entity name -> model whose writes change every response built from it
+VERSIONED_MODELS = {
+    "departments": Department,
+    "levels": Level,
+    "programmes": Programme,
+    "pos": PO,
+    "psos": PSO,
+    "courses": Course,
+    "cos": CO,
+    "faculty": Faculty,
+    "batches": Batch,
+    "questions": QuestionBank,
+    "students": Student,
+}
+
+# Names of the views wrapped by cached_response, for the stats endpoint
+CACHED_VIEWS = []
+
+# Hit/miss counts of this worker process. Kept in memory so that counting
+# a hit writes nothing to the shared caches; they start from zero when the
+# process does and each worker reports only the requests it served.
+STATS = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[getattr(settings, "COPO_RESPONSE_CACHE", "default")]
+
+
+def get_version_cache():
+    # Kept apart from the bodies so that culling them cannot reset a version
+    alias = getattr(settings, "COPO_VERSION_CACHE", None)
+    return caches[alias] if alias else get_cache()
+
+
+def get_versions(entities):
+    """Return the current version token of each entity, creating missing ones."""
+    cache = get_version_cache()
+    keys = [f"version:{entity}" for entity in entities]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump(*entities):
+    """Give each entity a new version so every cached response built from it is skipped."""
+    get_version_cache().set_many(
+        {f"version:{entity}": uuid.uuid4().hex for entity in entities}, timeout=None
+    )
+
+
+def bump_on_write(*entities):
+    # Bump right away and again once the transaction commits, so a response
+    # built from pre-commit data can never be stored under the new version.
+    bump(*entities)
+    transaction.on_commit(lambda: bump(*entities))
+
+
+def record(view_name, outcome):
+    with _stats_lock:
+        STATS[view_name, outcome] += 1
+
+
+def get_stats():
+    """Return the hit and miss counts of every cached view in this worker process."""
+    with _stats_lock:
+        return {
+            view_name: {"hits": STATS[view_name, "hits"], "misses": STATS[view_name, "misses"]}
+            for view_name in CACHED_VIEWS
+        }
+
+
+def cached_response(*entities):
+    """Cache successful GET responses of a view under the versions of ``entities``.
+
+    Entries are keyed on the full request path plus the current version of
+    every entity the payload is built from. Writes bump those versions in
+    the shared version cache, so no worker process serves a stale entry and
+    entries need no expiry.
+    """
+    def decorator(view):
+        view_name = view.__name__
+        CACHED_VIEWS.append(view_name)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != "GET":
+                return view(request, *args, **kwargs)
+
+            cache = get_cache()
+            parts = [view_name, request.get_full_path(), *get_versions(entities)]
+            key = "response:" + hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+            entry = cache.get(key)
+            if entry is not None:
+                record(view_name, "hits")
+                content, content_type = entry
+                response = HttpResponse(content, content_type=content_type)
+                response["X-Cache"] = "HIT"
+                return response
+
+            record(view_name, "misses")
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(key, (response.content, response["Content-Type"]), timeout=None)
+            response["X-Cache"] = "MISS"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def versioned_etag(*entities):
+    """ETag function built from the request path and the versions of ``entities``."""
+    def etag_func(request, *args, **kwargs):
+        parts = [request.get_full_path(), *get_versions(entities)]
+        return hashlib.sha1("|".join(parts).encode()).hexdigest()
+    return etag_func
+
+
+def conditional(*entities):
+    """Send a strong ETag and answer a matching If-None-Match with 304 before the view runs.
+
+    The ETag is built from the shared entity versions, so it changes for
+    every worker once any of them handles a write. Only successful
+    responses are tagged.
+    """
+    def decorator(view):
+        conditional_view = condition(etag_func=versioned_etag(*entities))(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if not 200 <= response.status_code < 300 and response.status_code != 304:
+                del response["ETag"]
+            return response
+
+        return wrapper
+
+    return decorator
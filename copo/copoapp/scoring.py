@@ -0,0 +1,108 @@
+import numpy as np
+from django.db import transaction
+
+from . import snapshots
+from .models import ExamQuestion, ExamSection, InternalExam, InternalMark, QuestionMark
+
+
+def section_scores(marks, question_sections, best, ceilings):
+    """Each student's score on each section, from a students x questions marks matrix.
+
+    ``question_sections`` gives the section (0 to S-1) of each question,
+    ``best`` the number of questions counted per section (the best answered
+    ones; 0 counts all) and ``ceilings`` the most a section can score (0 for
+    no cap). Unanswered questions (NaN) score nothing. The questions are
+    laid out as a students x sections x questions array and sorted once, so
+    the whole exam is scored in a handful of array operations.
+    """
+    marks = np.nan_to_num(np.asarray(marks, dtype=float))
+    question_sections = np.asarray(question_sections, dtype=int)
+    best = np.asarray(best, dtype=int)
+    ceilings = np.nan_to_num(np.asarray(ceilings, dtype=float))
+
+    order = np.argsort(question_sections, kind="stable")
+    sections = question_sections[order]
+    counts = np.bincount(sections, minlength=len(best))
+    slots = np.arange(len(sections)) - np.repeat(np.cumsum(counts) - counts, counts)
+    laid_out = np.zeros((len(marks), len(best), counts.max(initial=0)))
+    laid_out[:, sections, slots] = marks[:, order]
+
+    ranked = -np.sort(-laid_out, axis=2)
+    counted = np.arange(laid_out.shape[2]) < np.where(best > 0, best, counts)[:, None]
+    scores = (ranked * counted).sum(axis=2)
+    return np.where(ceilings > 0, np.minimum(scores, ceilings), scores)
+
+
+def score_exam(exam, cleared=()):
+    """Re-derive the InternalMark totals of an exam from its question-level marks.
+
+    Students without question-level marks keep whatever total was entered
+    for them, except those in ``cleared``, whose question marks were just
+    removed: left with none, they lose the total derived from them. Costs a constant number of queries whatever the number of
+    students. Flagging the batch's attainment is left to the caller, so a
+    save that also writes question marks flags it once.
+    """
+    sections = np.array(
+        list(
+            ExamSection.objects.filter(internal_exam=exam).order_by("section_id")
+            .values_list("section_id", "no_of_questions_to_be_answered", "ceiling_mark")
+        ),
+        dtype=float,
+    ).reshape(-1, 3)
+    questions = np.array(
+        list(
+            ExamQuestion.objects.filter(section__internal_exam=exam).order_by("q_id")
+            .values_list("q_id", "section_id")
+        ),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    rows = np.array(
+        list(
+            QuestionMark.objects.filter(exam_question__section__internal_exam=exam)
+            .values_list("student_id", "exam_question_id", "marks")
+        ),
+        dtype=np.int64,
+    ).reshape(-1, 3)
+
+    students, student_rows = np.unique(rows[:, 0], return_inverse=True)
+    marks = np.full((len(students), len(questions)), np.nan)
+    marks[student_rows, np.searchsorted(questions[:, 0], rows[:, 1])] = rows[:, 2]
+    scores = section_scores(
+        marks,
+        np.searchsorted(sections[:, 0], questions[:, 1]),
+        np.nan_to_num(sections[:, 1]),
+        np.nan_to_num(sections[:, 2]),
+    )
+    totals = scores.sum(axis=1).round().astype(int)
+    dropped = np.setdiff1d(np.asarray(cleared, dtype=np.int64), students)
+
+    with transaction.atomic():
+        if len(dropped):
+            InternalMark.objects.filter(internal_exam=exam, student_id__in=dropped.tolist()).delete()
+        InternalMark.objects.bulk_create(
+            [
+                InternalMark(internal_exam=exam, student_id=student_id, marks=total)
+                for student_id, total in zip(students.tolist(), totals.tolist())
+            ],
+            update_conflicts=True,
+            unique_fields=["internal_exam", "student"],
+            update_fields=["marks"],
+        )
+    return {"exam_id": exam.pk, "students": len(students), "sections": len(sections), "removed": len(dropped)}
+
+
+def rescore(exam_id, cleared=()):
+    """Score an exam by id, if it still exists; used once section rules or questions change.
+
+    Flags the batch's attainment when totals were written or removed.
+    Returns the summary of ``score_exam``, or None when the exam is gone.
+    """
+    exam = InternalExam.objects.filter(pk=exam_id).first()
+    if exam is None:
+        return None
+    with transaction.atomic():
+        result = score_exam(exam, cleared)
+        if result["students"] or result["removed"]:
+            # bulk_create sends no signals; internal marks feed CO attainment
+            snapshots.mark_dirty([exam.batch_id])
+    return result
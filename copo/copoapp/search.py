@@ -0,0 +1,60 @@
+import re
+
+from django.db import connection
+
+from .models import QuestionBank
+from .projections import QUESTION_LIST
+
+FTS_TABLE = "copoapp_questionbank_fts"
+
+
+def build_match_query(text):
+    """Turn free text into an FTS5 query: every word must match, the last as a prefix."""
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    terms = ['"%s"' % word for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_questions(text, course=None, co=None, marks=None, limit=50):
+    """Return QuestionBank rows matching ``text``, best match first."""
+    match = build_match_query(text)
+    if match is None:
+        return []
+
+    if connection.vendor != "sqlite":
+        # No FTS5 index outside SQLite; fall back to a plain substring filter.
+        questions = QuestionBank.objects.all()
+        for word in re.findall(r"\w+", text):
+            questions = questions.filter(question_text__icontains=word)
+        if course is not None:
+            questions = questions.filter(course_id=course)
+        if co is not None:
+            questions = questions.filter(co_id=co)
+        if marks is not None:
+            questions = questions.filter(marks=marks)
+        return QUESTION_LIST.rows(questions.order_by("question_id")[:limit])
+
+    sql = [
+        f"SELECT q.question_id FROM {FTS_TABLE} f",
+        "JOIN copoapp_questionbank q ON q.question_id = f.rowid",
+        f"WHERE {FTS_TABLE} MATCH %s",
+    ]
+    params = [match]
+    for column, value in (("course_id", course), ("co_id", co), ("marks", marks)):
+        if value is not None:
+            sql.append(f"AND q.{column} = %s")
+            params.append(value)
+    sql.append("ORDER BY f.rank LIMIT %s")
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(" ".join(sql), params)
+        ids = [row[0] for row in cursor.fetchall()]
+    if not ids:
+        return []
+
+    rows = {row["question_id"]: row for row in QUESTION_LIST.rows(QuestionBank.objects.filter(pk__in=ids))}
+    return [rows[pk] for pk in ids if pk in rows]
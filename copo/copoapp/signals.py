@@ -0,0 +1,158 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+
+from . import counters, response_cache, scoring, snapshots
+from .models import (
+    CO,
+    Batch,
+    COPOMapping,
+    COPSOMapping,
+    ExamSection,
+    InternalExam,
+    QuestionMark,
+    Student,
+)
+
+
+def connect_counters():
+    for name, model in counters.COUNTED_MODELS.items():
+        post_save.connect(
+            _counter_saved(name), sender=model, weak=False,
+            dispatch_uid=f"dashboard_counter_save_{name}",
+        )
+        post_delete.connect(
+            _counter_deleted(name), sender=model, weak=False,
+            dispatch_uid=f"dashboard_counter_delete_{name}",
+        )
+
+
+def _counter_saved(name):
+    def receiver(sender, instance, created, raw=False, **kwargs):
+        if created and not raw:
+            counters.bump(name, 1)
+    return receiver
+
+
+def _counter_deleted(name):
+    def receiver(sender, instance, **kwargs):
+        counters.bump(name, -1)
+    return receiver
+
+
+def connect_response_cache():
+    for entity, model in response_cache.VERSIONED_MODELS.items():
+        for action, signal in (("save", post_save), ("delete", post_delete)):
+            signal.connect(
+                _version_bumper(entity), sender=model, weak=False,
+                dispatch_uid=f"response_cache_{action}_{entity}",
+            )
+
+
+def _version_bumper(entity):
+    def receiver(sender, instance, **kwargs):
+        response_cache.bump_on_write(entity)
+    return receiver
+
+
+# Model -> function(instance) returning the batches whose attainment it affects.
+# The mark tables (InternalMark, QuestionMark, ExamQuestion, QuestionBank) get
+# no per-row receivers, which would stop cascades deleting them in one
+# statement: their writers call snapshots.mark_dirty once per write and
+# ATTAINMENT_OWNERS covers cascades.
+ATTAINMENT_INPUTS = {
+    InternalExam: lambda exam: [exam.batch_id],
+    CO: lambda co: Batch.objects.filter(course_id=co.course_id).values_list("pk", flat=True),
+    COPOMapping: lambda mapping: Batch.objects.filter(course__co=mapping.co_id).values_list("pk", flat=True),
+    COPSOMapping: lambda mapping: Batch.objects.filter(course__co=mapping.co_id).values_list("pk", flat=True),
+}
+
+# Model -> function(instance) returning the batches of the mark rows its deletion cascades to
+ATTAINMENT_OWNERS = {
+    Student: lambda student: InternalExam.objects.filter(internalmark__student=student).values_list(
+        "batch_id", flat=True
+    ).union(
+        InternalExam.objects.filter(examsection__examquestion__questionmark__student=student).values_list(
+            "batch_id", flat=True
+        )
+    ),
+    ExamSection: lambda section: InternalExam.objects.filter(pk=section.internal_exam_id).values_list(
+        "batch_id", flat=True
+    ),
+}
+
+
+def connect_attainment():
+    # pre_delete, so the batches are looked up (and flagged) before a cascade removes them
+    for model, batches in ATTAINMENT_INPUTS.items():
+        for action, signal in (("save", post_save), ("delete", pre_delete)):
+            signal.connect(
+                _attainment_marker(batches), sender=model, weak=False,
+                dispatch_uid=f"attainment_{action}_{model.__name__}",
+            )
+    for model, batches in ATTAINMENT_OWNERS.items():
+        pre_delete.connect(
+            _attainment_marker(batches), sender=model, weak=False,
+            dispatch_uid=f"attainment_delete_{model.__name__}",
+        )
+
+
+def _attainment_marker(batches):
+    def receiver(sender, instance, raw=False, **kwargs):
+        if not raw:
+            snapshots.mark_dirty(batches(instance))
+    return receiver
+
+
+# Model -> function(instance) returning the internal exams whose totals it affects when saved
+SCORING_INPUTS = {
+    ExamSection: lambda section: [section.internal_exam_id],
+}
+
+# Model -> function(instance) returning the (exam, student) pairs of the question marks its
+# deletion cascades to; read in pre_delete, while those marks still exist
+SCORING_OWNERS = {
+    ExamSection: lambda section: QuestionMark.objects.filter(exam_question__section=section).values_list(
+        "exam_question__section__internal_exam_id", "student_id"
+    ),
+    CO: lambda co: QuestionMark.objects.filter(exam_question__question_bank__co=co).values_list(
+        "exam_question__section__internal_exam_id", "student_id"
+    ),
+}
+
+
+def connect_scoring():
+    # Question marks and exam questions get no receivers: their writers re-score the exam once
+    for model, exams in SCORING_INPUTS.items():
+        post_save.connect(
+            _exam_rescorer(exams), sender=model, weak=False,
+            dispatch_uid=f"scoring_save_{model.__name__}",
+        )
+    for model, marks in SCORING_OWNERS.items():
+        pre_delete.connect(
+            _exam_clearer(marks), sender=model, weak=False,
+            dispatch_uid=f"scoring_delete_{model.__name__}",
+        )
+
+
+def _exam_rescorer(exams):
+    def receiver(sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        for exam_id in set(exams(instance)):
+            if exam_id is not None:
+                transaction.on_commit(partial(scoring.rescore, exam_id))
+    return receiver
+
+
+def _exam_clearer(marks):
+    def receiver(sender, instance, **kwargs):
+        cleared = {}
+        for exam_id, student_id in marks(instance):
+            cleared.setdefault(exam_id, []).append(student_id)
+        for exam_id, student_ids in cleared.items():
+            # After commit, when the cascade has removed the marks (or the exam itself);
+            # students left without question marks lose the totals built from them
+            transaction.on_commit(partial(scoring.rescore, exam_id, student_ids))
+    return receiver
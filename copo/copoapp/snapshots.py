@@ -0,0 +1,197 @@
+import numpy as np
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import attainment
+from .models import (
+    AttainmentState,
+    Batch,
+    COAttainment,
+    POAttainment,
+    Programme,
+    PSOAttainment,
+)
+
+RECOMPUTE_JOB = "recompute_attainment"
+
+# Target -> snapshot model of a programme's rollup
+ROLLUP_MODELS = {"po": POAttainment, "pso": PSOAttainment}
+
+
+def mark_dirty(batch_ids):
+    """Flag batches whose attainment snapshots are out of date and queue a recompute.
+
+    Called by the marks and exam signals and by bulk writers that bypass
+    them. The recompute job is queued once the surrounding transaction
+    commits, and only if one is not already waiting.
+    """
+    from . import jobs
+
+    batch_ids = {batch_id for batch_id in batch_ids if batch_id is not None}
+    if not batch_ids:
+        return
+    now = timezone.now()
+    AttainmentState.objects.bulk_create(
+        [AttainmentState(batch_id=batch_id, dirty=True, marked_at=now) for batch_id in batch_ids],
+        update_conflicts=True,
+        unique_fields=["batch"],
+        update_fields=["dirty", "marked_at"],
+    )
+    transaction.on_commit(lambda: jobs.enqueue_once(RECOMPUTE_JOB, {}))
+
+
+def recompute(batch_ids=None, progress=None):
+    """Recompute the snapshots of dirty batches (or of ``batch_ids``) and their programme rollups.
+
+    A batch marked dirty again while it is being recomputed stays dirty for
+    the next run: each batch's ``marked_at`` is read before its marks, and
+    only a batch whose marker is unchanged at the end is marked clean.
+    Returns the number of batches and programme rollups written.
+    """
+    started = timezone.now()
+    states = AttainmentState.objects.filter(dirty=True) if batch_ids is None else (
+        AttainmentState.objects.filter(batch_id__in=batch_ids)
+    )
+    seen = dict(states.values_list("batch_id", "marked_at"))
+    if batch_ids is None:
+        batch_ids = list(seen)
+    batches = list(Batch.objects.filter(pk__in=batch_ids).select_related("course"))
+    config = attainment.get_config()
+
+    rows = []
+    for batch_id, data in attainment.load_batches(batches).items():
+        result = attainment.compute(
+            data["marks"], data["max_marks"], data["incidence"], config["TARGET_PERCENT"], config["LEVELS"]
+        )
+        for i, (co_id, _) in enumerate(data["cos"]):
+            rows.append(COAttainment(
+                batch_id=batch_id,
+                co_id=co_id,
+                average_percent=number(result["average_percent"][i]),
+                attainment_percent=number(result["attainment_percent"][i]),
+                level=int(result["level"][i]),
+                students_assessed=int(result["students_assessed"][i]),
+                computed_at=started,
+            ))
+
+    with transaction.atomic():
+        # Replace the batches' snapshots, dropping COs no longer on the course
+        COAttainment.objects.filter(batch_id__in=[batch.pk for batch in batches]).delete()
+        COAttainment.objects.bulk_create(rows)
+        # Batches without a state yet start clean, unless one was written meanwhile
+        AttainmentState.objects.bulk_create(
+            [
+                AttainmentState(batch_id=batch.pk, dirty=False, computed_at=started)
+                for batch in batches if batch.pk not in seen
+            ],
+            ignore_conflicts=True,
+        )
+        AttainmentState.objects.filter(batch_id__in=[batch.pk for batch in batches]).update(computed_at=started)
+        # Only batches not marked again since their marker was read are clean
+        for batch in batches:
+            if batch.pk in seen:
+                AttainmentState.objects.filter(batch_id=batch.pk, marked_at=seen[batch.pk]).update(dirty=False)
+        if progress is not None:
+            progress(len(batches))
+
+        programmes = Programme.objects.filter(
+            dept_id__in={batch.course.dept_id for batch in batches}
+        )
+        years = {}
+        for batch in batches:
+            years.setdefault(batch.course.dept_id, set()).add(batch.year)
+        rollups = 0
+        for programme in programmes:
+            for year in years[programme.dept_id]:
+                rebuild_rollup(programme, year, started)
+                rollups += 1
+    return {"batches": len(batches), "rollups": rollups}
+
+
+def number(value):
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+def rebuild_rollup(programme, year, computed_at=None):
+    """Write a programme's PO and PSO snapshots for ``year`` from its batches' CO snapshots."""
+    computed_at = computed_at or timezone.now()
+    levels = np.array(
+        list(
+            COAttainment.objects.filter(batch__course__dept_id=programme.dept_id, batch__year=year)
+            .values_list("co_id", "level", "students_assessed")
+        ),
+        dtype=float,
+    ).reshape(-1, 3)
+    co_ids, co_levels = attainment.mean_levels(
+        levels[:, 0], np.where(levels[:, 2] > 0, levels[:, 1], np.nan)
+    )
+    targets = attainment.rollup_targets(programme, co_ids, co_levels)
+    for target, model in ROLLUP_MODELS.items():
+        model.objects.filter(programme=programme, year=year).delete()
+        model.objects.bulk_create([
+            model(
+                programme=programme, year=year, attainment=row["attainment"], cos_mapped=row["cos_mapped"],
+                computed_at=computed_at, **{f"{target}_id": row["id"]}
+            )
+            for row in targets[f"{target}s"]
+        ])
+
+
+def batch_report(batch):
+    """A batch's CO attainment read from its snapshots, computing them on first use."""
+    state = AttainmentState.objects.filter(batch=batch).first()
+    if state is None or state.computed_at is None:
+        recompute([batch.pk])
+        state = AttainmentState.objects.get(batch=batch)
+    rows = (
+        COAttainment.objects.filter(batch=batch).order_by("co_id")
+        .values("co_id", "co__co_label", "average_percent", "attainment_percent", "level", "students_assessed")
+    )
+    return {
+        "batch_id": batch.pk,
+        "stale": state.dirty,
+        "computed_at": state.computed_at,
+        "cos": [{"co_label": row.pop("co__co_label"), **row} for row in rows],
+    }
+
+
+def programme_report(programme, year=None):
+    """A programme's PO and PSO attainment read from its snapshots, building them on first use."""
+    if year is None:
+        year = (
+            POAttainment.objects.filter(programme=programme).aggregate(year=Max("year"))["year"]
+            or Batch.objects.filter(course__dept_id=programme.dept_id).aggregate(year=Max("year"))["year"]
+        )
+    # Batches never computed are computed now, which also rebuilds the rollup
+    missing = Batch.objects.filter(course__dept_id=programme.dept_id, year=year).exclude(
+        attainmentstate__computed_at__isnull=False
+    )
+    missing = list(missing.values_list("pk", flat=True))
+    if missing:
+        recompute(missing)
+    elif year is not None and not POAttainment.objects.filter(programme=programme, year=year).exists():
+        rebuild_rollup(programme, year)
+
+    data = {"programme_id": programme.pk, "year": year}
+    computed = []
+    for target, model in ROLLUP_MODELS.items():
+        rows = list(
+            model.objects.filter(programme=programme, year=year).order_by(f"{target}_id")
+            .values(f"{target}_id", f"{target}__{target}_label", "attainment", "cos_mapped", "computed_at")
+        )
+        data[f"{target}s"] = [
+            {
+                "id": row[f"{target}_id"],
+                "label": row[f"{target}__{target}_label"],
+                "attainment": row["attainment"],
+                "cos_mapped": row["cos_mapped"],
+            }
+            for row in rows
+        ]
+        computed += [row["computed_at"] for row in rows]
+    data["computed_at"] = min(computed, default=None)
+    data["stale"] = AttainmentState.objects.filter(
+        dirty=True, batch__course__dept_id=programme.dept_id, batch__year=year
+    ).exists()
+    return data
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from .json_backend import dumps, item_separator
+
+
+def wants_stream(request):
+    return request.GET.get("stream", "").lower() in ("1", "true", "yes")
+
+
+def iter_json_array(rows, rows_per_chunk=500):
+    """Yield a JSON array piece by piece, ``rows_per_chunk`` rows at a time.
+
+    Rows are encoded with the same backend and separators as JsonResponse,
+    so both modes produce the same bytes.
+    """
+    separator = item_separator()
+    yield b"["
+    buffer = []
+    first = True
+    for row in rows:
+        buffer.append(dumps(row))
+        if len(buffer) >= rows_per_chunk:
+            yield (b"" if first else separator) + separator.join(buffer)
+            first = False
+            buffer = []
+    if buffer:
+        yield (b"" if first else separator) + separator.join(buffer)
+    yield b"]"
+
+
+def streaming_json_response(projection, queryset=None, chunk_size=None):
+    """Stream a projection as a JSON array without building the list in memory."""
+    if chunk_size is None:
+        chunk_size = getattr(settings, "COPO_STREAM_CHUNK_SIZE", 2000)
+    rows = projection.iter_rows(queryset, chunk_size=chunk_size)
+    return StreamingHttpResponse(iter_json_array(rows), content_type="application/json")
@@ -1,3 +1,1378 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import os
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+import openpyxl
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import attainment, counters, jobs, response_cache, scoring, snapshots
+from .json_backend import FastJSONRenderer, JsonResponse
+from .models import (
+    CO,
+    PO,
+    PSO,
+    AttainmentState,
+    Batch,
+    COAttainment,
+    COPOMapping,
+    Course,
+    CustomUser,
+    DashboardCounter,
+    Department,
+    ExamQuestion,
+    ExamSection,
+    ExternalExam,
+    ExternalMark,
+    Faculty,
+    InternalExam,
+    InternalMark,
+    Job,
+    Level,
+    Programme,
+    QuestionBank,
+    QuestionMark,
+    Quiz,
+    QuizMark,
+    Student,
+)
+
+
+def setUpModule():
+    # Each run gets empty file caches, so versions from an earlier run's database are never seen
+    global cache_settings, cache_dir
+    cache_dir = tempfile.TemporaryDirectory()
+    cache_settings = override_settings(CACHES={
+        alias: {**config, "LOCATION": f"{cache_dir.name}/{alias}"} for alias, config in settings.CACHES.items()
+    })
+    cache_settings.enable()
+
+
+def tearDownModule():
+    cache_settings.disable()
+    cache_dir.cleanup()
+
+
+def create_catalog(rows=5):
+    dept = Department.objects.create(dept_name="Computer Science")
+    level = Level.objects.create(name="UG")
+    programme = Programme.objects.create(
+        programme_name="BSc CS", dept=dept, level=level, duration=3
+    )
+    for i in range(rows):
+        course = Course.objects.create(
+            course_code=f"CS{i}", title=f"Course {i}", dept=dept,
+            semester=1, credits=4, no_of_cos=1, syllabus_year=2024,
+        )
+        faculty = Faculty.objects.create(
+            name=f"Faculty {i}", dept=dept, email=f"f{i}@example.com", phone_no="123"
+        )
+        Batch.objects.create(course=course, faculty_id=faculty, year=2024, part="A", active=True)
+        co = CO.objects.create(
+            course=course, co_label=f"CO{i}", co_description="", remember=1,
+            understand=0, apply=0, analyze=0, evaluate=0, create=0,
+        )
+        QuestionBank.objects.create(course=course, co=co, question_text=f"Q{i}", marks=2)
+        PO.objects.create(po_label=f"PO{i}", pos_description="", level=level)
+        PSO.objects.create(programme=programme, pso_label=f"PSO{i}", pso_desc="")
+        Student.objects.create(
+            name=f"Student {i}", register_no=f"NA24CS{i:03}", admn_no=f"A{i}",
+            programme=programme, year_of_admission=2024,
+        )
+    return programme
+
+
+class ListEndpointQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.programme = create_catalog()
+
+    def assert_list_queries(self, url, queries, expected_keys):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data), 5)
+        self.assertEqual(list(data[0]), expected_keys)
+        return data
+
+    def test_get_batches(self):
+        data = self.assert_list_queries(
+            "/get-batches/", 1, ["batch_id", "faculty", "course", "year", "part", "active"]
+        )
+        self.assertEqual(data[0]["faculty"], "Faculty 0")
+        self.assertEqual(data[0]["course"], "Course 0")
+
+    def test_get_courses(self):
+        data = self.assert_list_queries("/get-courses/", 1, ["course_id", "title", "dept"])
+        self.assertEqual(data[0]["dept"], "Computer Science")
+
+    def test_get_programmes(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/get-programme/")
+        self.assertEqual(
+            response.json(),
+            [{"programme_id": self.programme.programme_id, "programme_name": "BSc CS",
+              "department": "Computer Science", "level": "UG"}],
+        )
+
+    def test_get_questions(self):
+        data = self.assert_list_queries(
+            "/get-questions/", 1, ["question_id", "question_text", "marks", "course", "co_label"]
+        )
+        self.assertEqual(data[0]["co_label"], "CO0")
+
+    def test_get_cos(self):
+        data = self.assert_list_queries(
+            "/get-cos/", 1, ["co_id", "co_label", "co_description", "course"]
+        )
+        self.assertEqual(data[0]["course"], "Course 0")
+
+    def test_get_faculty(self):
+        self.assert_list_queries("/get-faculty/", 1, ["faculty_id", "name", "dept"])
+
+    def test_get_pos(self):
+        data = self.assert_list_queries(
+            "/get-pos/", 1, ["id", "po_label", "pos_description", "level_id", "level_name"]
+        )
+        self.assertEqual(data[0]["level_name"], "UG")
+
+    def test_get_psos(self):
+        data = self.assert_list_queries(
+            "/get-psos/", 1, ["pso_id", "pso_label", "programme", "pso_desc"]
+        )
+        self.assertEqual(data[0]["programme"], "BSc CS")
+
+    def test_get_students(self):
+        self.assert_list_queries(
+            "/get-students/", 1,
+            ["student_id", "name", "register_no", "year_of_admission", "phone_number",
+             "email", "admn_no", "programme__programme_name"],
+        )
+        self.assert_list_queries(
+            f"/students/by-programme/{self.programme.programme_id}/", 2,
+            ["student_id", "name", "register_no", "year_of_admission", "phone_number",
+             "email", "admn_no", "programme__programme_name"],
+        )
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.programme = create_catalog()
+
+    def walk(self, url):
+        ids, cursor = [], None
+        while True:
+            params = {"page_size": 2}
+            if cursor:
+                params["cursor"] = cursor
+            with self.assertNumQueries(1):
+                page = self.client.get(url, params).json()
+            ids.extend(row[next(iter(row))] for row in page["results"])
+            cursor = page["next"]
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_every_row_once(self):
+        self.assertEqual(
+            self.walk("/get-students/"),
+            list(Student.objects.order_by("pk").values_list("pk", flat=True)),
+        )
+        self.assertEqual(
+            self.walk("/get-questions/"),
+            list(QuestionBank.objects.order_by("pk").values_list("pk", flat=True)),
+        )
+        self.assertEqual(
+            self.walk("/get-batches/"),
+            list(Batch.objects.order_by("pk").values_list("pk", flat=True)),
+        )
+
+    def test_unpaginated_response_is_unchanged(self):
+        self.assertIsInstance(self.client.get("/get-students/").json(), list)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/get-students/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+
+class FacultyBatchesAndExamsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog()
+        cls.faculty = Faculty.objects.get(email="f0@example.com")
+        cls.user = CustomUser.objects.create_user(
+            username="f0", password="secret", email="f0@example.com"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_payload(self):
+        with self.assertNumQueries(3):
+            response = self.client.get("/faculty-batches-exams/")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_query_count_does_not_grow_with_batches(self):
+        course = Course.objects.first()
+        for year in range(2010, 2030):
+            batch = Batch.objects.create(
+                course=course, faculty_id=self.faculty, year=year, part="A", active=False
+            )
+            InternalExam.objects.create(batch=batch, exam_name="IA1", duration=60, max_marks=50)
+            InternalExam.objects.create(batch=batch, exam_name="IA2", duration=60, max_marks=50)
+
+        payload = self.get_payload()
+        self.assertEqual(len(payload), 21)
+        self.assertEqual(payload[0]["exams"], [])
+        self.assertEqual(
+            [exam["exam_name"] for exam in payload[1]["exams"]], ["IA1", "IA2"]
+        )
+        self.assertEqual(payload[1]["course_title"], course.title)
+
+
+class QuestionSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog(rows=2)
+        cls.course = Course.objects.get(course_code="CS0")
+        cls.co = CO.objects.get(co_label="CO0")
+        for text, marks in [
+            ("Explain the working of a binary search tree", 5),
+            ("Define a binary number system", 2),
+            ("Explain process scheduling", 5),
+        ]:
+            QuestionBank.objects.create(course=cls.course, co=cls.co, question_text=text, marks=marks)
+
+    def search(self, **params):
+        response = self.client.get("/search-questions/", params)
+        self.assertEqual(response.status_code, 200)
+        return [row["question_text"] for row in response.json()]
+
+    def test_search_matches_words_and_prefixes(self):
+        self.assertEqual(
+            sorted(self.search(q="binary")),
+            ["Define a binary number system", "Explain the working of a binary search tree"],
+        )
+        self.assertEqual(self.search(q="explain sched"), ["Explain process scheduling"])
+
+    def test_search_filters(self):
+        self.assertEqual(
+            self.search(q="binary", marks=5, course=self.course.course_id, co=self.co.co_id),
+            ["Explain the working of a binary search tree"],
+        )
+
+    def test_index_follows_edits_and_deletes(self):
+        question = QuestionBank.objects.get(question_text="Explain process scheduling")
+        question.question_text = "Explain deadlock avoidance"
+        question.save()
+        self.assertEqual(self.search(q="scheduling"), [])
+        self.assertEqual(self.search(q="deadlock"), ["Explain deadlock avoidance"])
+        question.delete()
+        self.assertEqual(self.search(q="deadlock"), [])
+
+    def test_limit_is_clamped(self):
+        self.assertEqual(len(self.search(q="binary", limit=-1)), 1)
+        self.assertEqual(len(self.search(q="binary", limit=0)), 1)
+        response = self.client.get("/search-questions/", {"q": "binary", "limit": "ten"})
+        self.assertEqual(response.status_code, 400)
+
+
+class MarksUniqueLookupTests(TestCase):
+    def test_duplicate_mark_is_rejected(self):
+        create_catalog(rows=1)
+        exam = InternalExam.objects.create(batch=Batch.objects.get(), exam_name="IA1", max_marks=20)
+        InternalMark.objects.create(student=Student.objects.get(), internal_exam=exam, marks=5)
+        with self.assertRaises(IntegrityError):
+            InternalMark.objects.create(student=Student.objects.get(), internal_exam=exam, marks=6)
+
+
+class MigrationTestCase(TransactionTestCase):
+    """Runs migrations to given targets in a test and back to the latest state afterwards; no tests of its own."""
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+
+class MarksDedupeMigrationTests(MigrationTestCase):
+    before = [("copoapp", "0002_questionbank_fts")]
+    after = [("copoapp", "0003_marks_unique_lookups")]
+
+    def test_duplicates_are_dropped_keeping_the_newest(self):
+        apps = self.migrate(self.before)
+        model = lambda name: apps.get_model("copoapp", name)
+        dept = model("Department").objects.create(dept_name="CS")
+        level = model("Level").objects.create(name="UG")
+        programme = model("Programme").objects.create(programme_name="BSc", dept=dept, level=level, duration=3)
+        course = model("Course").objects.create(
+            course_code="CS0", title="C", dept=dept, semester=1, credits=4, no_of_cos=1, syllabus_year=2024
+        )
+        faculty = model("Faculty").objects.create(name="F", dept=dept, email="f@example.com", phone_no="1")
+        batch = model("Batch").objects.create(course=course, faculty_id=faculty, year=2024, part="A", active=True)
+        exam = model("InternalExam").objects.create(batch=batch, exam_name="IA1", max_marks=20)
+        student = model("Student").objects.create(name="S", programme=programme, year_of_admission=2024)
+        other = model("Student").objects.create(name="T", programme=programme, year_of_admission=2024)
+        for student_row, marks in ((student, 5), (student, 7), (other, 3), (student, 9)):
+            model("InternalMark").objects.create(student=student_row, internal_exam=exam, marks=marks)
+
+        with self.assertLogs("copoapp.migrations.0003_marks_unique_lookups", "WARNING") as logs:
+            apps = self.migrate(self.after)
+        self.assertIn("Deleted 2 duplicate InternalMark row(s)", logs.output[0])
+        marks = apps.get_model("copoapp", "InternalMark").objects.order_by("student_id")
+        self.assertEqual(list(marks.values_list("student_id", "marks")), [(student.pk, 9), (other.pk, 3)])
+
+
+class CourseMergeMigrationTests(MigrationTestCase):
+    before = [("copoapp", "0004_dashboardcounter")]
+    after = [("copoapp", "0005_course_unique_syllabus")]
+
+    def test_duplicate_courses_and_their_cos_are_merged(self):
+        apps = self.migrate(self.before)
+        model = lambda name: apps.get_model("copoapp", name)
+        dept = model("Department").objects.create(dept_name="CS")
+        courses = [
+            model("Course").objects.create(
+                course_code="CS0", title="C", dept=dept, semester=1, credits=4, no_of_cos=2, syllabus_year=2024
+            )
+            for _ in range(2)
+        ]
+        cos = {
+            (course.pk, label): model("CO").objects.create(
+                course=course, co_label=label, co_description="", remember=1,
+                understand=0, apply=0, analyze=0, evaluate=0, create=0,
+            )
+            for course in courses for label in ("CO1", "CO2")
+        }
+        cos[courses[1].pk, "CO3"] = model("CO").objects.create(
+            course=courses[1], co_label="CO3", co_description="", remember=1,
+            understand=0, apply=0, analyze=0, evaluate=0, create=0,
+        )
+        question = model("QuestionBank").objects.create(
+            course=courses[1], co=cos[courses[1].pk, "CO2"], question_text="q", marks=2
+        )
+
+        with self.assertLogs("copoapp.migrations.0005_course_unique_syllabus", "WARNING") as logs:
+            apps = self.migrate(self.after)
+        self.assertIn("and 2 CO(s) sharing a label", logs.output[0])
+        course = apps.get_model("copoapp", "Course").objects.get()
+        self.assertEqual(course.pk, courses[0].pk)
+        merged = apps.get_model("copoapp", "CO").objects.order_by("co_label")
+        self.assertEqual(list(merged.values_list("co_label", "course_id")), [
+            ("CO1", course.pk), ("CO2", course.pk), ("CO3", course.pk)
+        ])
+        question = apps.get_model("copoapp", "QuestionBank").objects.get(pk=question.pk)
+        self.assertEqual((question.course_id, question.co_id), (course.pk, cos[courses[0].pk, "CO2"].pk))
+
+
+class DashboardCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog(rows=3)
+        counters.reconcile()
+
+    def get_stats(self, queries=1, **params):
+        with self.assertNumQueries(queries):
+            return self.client.get("/dashboard-stats/", params).json()
+
+    def test_counters_follow_creates_and_deletes(self):
+        expected = {
+            "faculty": 3, "courses": 3, "batches": 3,
+            "students": 3, "levels": 1, "programmes": 1,
+        }
+        self.assertEqual(self.get_stats(), expected)
+
+        Level.objects.create(name="PG")
+        Course.objects.get(course_code="CS0").delete()  # cascades to its batch
+        expected.update(levels=2, courses=2, batches=2)
+        self.assertEqual(self.get_stats(), expected)
+
+    def test_recount_repairs_drift(self):
+        Student.objects.all().update(name="x")
+        DashboardCounter.objects.filter(name="students").update(value=99)
+        self.assertEqual(self.get_stats()["students"], 99)
+        self.assertEqual(self.get_stats(queries=2, recount="true")["students"], 3)
+        self.assertEqual(self.get_stats()["students"], 3)
+
+
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.programme = create_catalog(rows=1)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_hit_after_miss_and_invalidated_by_edit(self):
+        url = "/get-programme/"
+        self.get(url)
+        with self.assertNumQueries(0):
+            response = self.get(url)
+        self.assertEqual(response["X-Cache"], "HIT")
+
+        self.client.put(
+            f"/programme/edit/{self.programme.programme_id}/",
+            {"programme_name": "BSc Computer Science"},
+            content_type="application/json",
+        )
+        response = self.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()[0]["programme_name"], "BSc Computer Science")
+
+    def test_related_entity_write_invalidates(self):
+        self.get("/get-psos/")
+        Programme.objects.filter(pk=self.programme.pk).update(duration=4)
+        self.assertEqual(self.get("/get-psos/")["X-Cache"], "HIT")
+        self.programme.programme_name = "BSc Data Science"
+        self.programme.save()
+        response = self.get("/get-psos/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()[0]["programme"], "BSc Data Science")
+
+    def test_versions_are_shared_between_processes(self):
+        self.get("/get-level/")
+        self.assertEqual(self.get("/get-level/")["X-Cache"], "HIT")
+        # A separate connection to the version cache, as another worker process has
+        other = caches.create_connection(settings.COPO_VERSION_CACHE)
+        other.set("version:levels", "bumped-elsewhere", timeout=None)
+        self.assertEqual(self.get("/get-level/")["X-Cache"], "MISS")
+
+    def test_culling_bodies_keeps_versions(self):
+        versions = response_cache.get_versions(["levels", "programmes"])
+        bodies = response_cache.get_cache()
+        bodies.set_many({f"filler:{i}": i for i in range(1100)}, timeout=None)
+        self.assertLess(len(list(bodies._list_cache_files())), 1000)
+        self.assertEqual(response_cache.get_versions(["levels", "programmes"]), versions)
+
+    def test_stats(self):
+        self.get("/get-level/")
+        self.get("/get-level/")
+        before = response_cache.get_stats()["get_levels"]
+        versions = response_cache.get_version_cache()
+        files = sorted(versions._list_cache_files())
+        mtimes = [os.path.getmtime(name) for name in files]
+        self.assertEqual(self.get("/get-level/")["X-Cache"], "HIT")
+        # Counting a hit writes nothing to the shared caches
+        self.assertEqual(sorted(versions._list_cache_files()), files)
+        self.assertEqual([os.path.getmtime(name) for name in files], mtimes)
+        stats = self.client.get("/cache-stats/").json()
+        self.assertEqual(stats["get_levels"]["hits"], before["hits"] + 1)
+        self.assertEqual(stats["get_levels"]["misses"], before["misses"])
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog(rows=2)
+        cls.course = Course.objects.get(course_code="CS0")
+
+    def test_matching_etag_returns_304_without_queries(self):
+        for url in ("/get-courses/", f"/cos/by-course/{self.course.course_id}/",
+                    f"/courses/{self.course.course_id}/"):
+            etag = self.client.get(url)["ETag"]
+            self.assertTrue(etag.startswith('"'))
+            with self.assertNumQueries(0):
+                response = self.client.get(url, headers={"If-None-Match": etag})
+            self.assertEqual(response.status_code, 304)
+
+    def test_errors_are_not_tagged(self):
+        response = self.client.get("/courses/999999/")
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header("ETag"))
+
+    def test_write_in_another_process_changes_etag(self):
+        url = "/get-courses/"
+        etag = self.client.get(url)["ETag"]
+        caches.create_connection(settings.COPO_VERSION_CACHE).set("version:courses", "bumped-elsewhere")
+        self.assertEqual(self.client.get(url, headers={"If-None-Match": etag}).status_code, 200)
+
+    def test_write_changes_etag(self):
+        url = f"/cos/by-course/{self.course.course_id}/"
+        etag = self.client.get(url)["ETag"]
+        CO.objects.filter(course=self.course).first().delete()
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class StreamingListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.programme = create_catalog(rows=3)
+
+    def test_streamed_body_matches_list_body(self):
+        for url in ("/get-students/", f"/students/by-programme/{self.programme.pk}/",
+                    "/get-questions/"):
+            expected = self.client.get(url).content
+            response = self.client.get(url, {"stream": "true"})
+            self.assertTrue(response.streaming)
+            self.assertEqual(b"".join(response.streaming_content), expected)
+
+
+class FastJsonBackendTests(TestCase):
+    payload = {
+        "date": datetime.date(2025, 3, 1),
+        "datetime": datetime.datetime(2025, 3, 1, 9, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        "time": datetime.time(9, 30),
+        "decimal": Decimal("12.50"),
+        "rows": [{"id": 1, "name": "Ünïcode"}],
+    }
+
+    def test_json_response_differs_from_stdlib_only_in_formatting(self):
+        # The accepted difference: orjson writes compact separators and raw
+        # UTF-8 where the stdlib encoder writes ", ", ": " and \uXXXX escapes.
+        # Dates, times and decimals are rendered identically.
+        with self.settings(COPO_FAST_JSON=False):
+            expected = JsonResponse(self.payload).content
+        with self.settings(COPO_FAST_JSON=True):
+            fast = JsonResponse(self.payload).content
+        self.assertEqual(
+            expected,
+            b'{"date": "2025-03-01", "datetime": "2025-03-01T09:30:15.123Z", "time": "09:30:00", '
+            b'"decimal": "12.50", "rows": [{"id": 1, "name": "\\u00dcn\\u00efcode"}]}',
+        )
+        self.assertEqual(
+            fast,
+            b'{"date":"2025-03-01","datetime":"2025-03-01T09:30:15.123Z","time":"09:30:00",'
+            b'"decimal":"12.50","rows":[{"id":1,"name":"' + "Ünïcode".encode() + b'"}]}',
+        )
+        self.assertEqual(json.loads(fast), json.loads(expected))
+
+    def test_drf_renderer_matches_json_renderer(self):
+        with self.settings(COPO_FAST_JSON=True):
+            fast = FastJSONRenderer().render(self.payload)
+        self.assertEqual(fast, JSONRenderer().render(self.payload))
+
+    def test_exam_details_date(self):
+        create_catalog(rows=1)
+        exam = InternalExam.objects.create(
+            batch=Batch.objects.get(), exam_name="IA1", duration=60, max_marks=50,
+            date=datetime.date(2025, 3, 1),
+        )
+        with self.settings(COPO_FAST_JSON=True):
+            data = self.client.get(f"/exam-details/{exam.int_exam_id}/").json()
+        self.assertEqual(data["date"], "2025-03-01")
+
+
+class SparseFieldsetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.programme = create_catalog(rows=2)
+
+    def test_fields_limit_select_and_output(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/get-students/", {"fields": "name"})
+        self.assertEqual(list(response.json()[0]), ["student_id", "name"])
+        sql = queries.captured_queries[0]["sql"]
+        self.assertNotIn("email", sql)
+        self.assertNotIn("copoapp_programme", sql)
+
+    def test_fields_apply_to_pages_and_streams(self):
+        page = self.client.get("/get-questions/", {"fields": "co_label", "page_size": 1}).json()
+        self.assertEqual(list(page["results"][0]), ["question_id", "co_label"])
+        response = self.client.get("/get-students/", {"fields": "name", "stream": "true"})
+        rows = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(list(rows[0]), ["student_id", "name"])
+
+    def test_unknown_field_is_rejected(self):
+        for url in ("/get-students/", "/get-courses/"):
+            response = self.client.get(url, {"fields": "password"})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("Unknown field(s): password", response.json()["error"])
+
+
+class StudentImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.programme = create_catalog(rows=1)
+
+    def upload(self, lines):
+        content = "Programme,Examination Register Number,Admission No.,Name\n" + "\n".join(lines)
+        upload = SimpleUploadedFile("students.csv", content.encode(), content_type="text/csv")
+        response = self.client.post("/upload-students/", {"file": upload})
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()
+
+    def test_creates_updates_and_skips(self):
+        result = self.upload([
+            "BSc CS,NA23CS001,A0,Renamed Student",  # existing admission number
+            "BSc CS,NA22CS100,B1,New Student",
+            "BSc CS,NA22CS101,B2,Another Student",
+            "Unknown Programme,NA22CS102,B3,Lost Student",
+            "BSc CS,BADREG,B4,Bad Register",
+            "BSc CS,NA22CS105,,No Admission Number",
+        ])
+        self.assertEqual(result["created"], 2)
+        self.assertEqual(result["updated"], 1)
+        self.assertEqual(result["skipped"], 3)
+
+        student = Student.objects.get(admn_no="A0")
+        self.assertEqual((student.name, student.year_of_admission), ("Renamed Student", 2023))
+        self.assertEqual(Student.objects.get(admn_no="B1").year_of_admission, 2022)
+        self.assertFalse(Student.objects.filter(admn_no="B3").exists())
+
+    def test_register_number_conflicts_are_reported(self):
+        result = self.upload([
+            "BSc CS,NA22CS200,E1,First Claim",
+            "BSc CS,NA22CS200,E2,Same Register",
+            "BSc CS,NA24CS000,E3,Taken Register",  # belongs to A0
+            "BSc CS,NA22CS203,E4,Fine",
+        ])
+        self.assertEqual((result["created"], result["skipped"]), (2, 2))
+        self.assertEqual(
+            [(row["row"], row["admn_no"], row["error"]) for row in result["skipped_rows"]],
+            [(2, "E2", "Duplicate register_no in the file."),
+             (3, "E3", "register_no already belongs to another student.")],
+        )
+        self.assertEqual(Student.objects.get(register_no="NA22CS200").admn_no, "E1")
+
+    def test_query_count_does_not_grow_with_rows(self):
+        def count_queries(rows, offset):
+            lines = [f"BSc CS,NA22CS{offset + i},C{offset + i},Student {i}" for i in range(rows)]
+            with CaptureQueriesContext(connection) as queries:
+                self.upload(lines)
+            return len(queries)
+
+        self.assertEqual(count_queries(3, 1000), count_queries(100, 2000))
+
+
+class ChunkedImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog(rows=1)
+
+    def upload(self, url, name, content):
+        upload = SimpleUploadedFile(name, content.encode(), content_type="text/csv")
+        return self.client.post(url, {"file": upload})
+
+    def test_students_are_imported_in_chunks(self):
+        # Columns in a different order plus one the importer does not read
+        content = "Name,Programme,Examination Register Number,Admission No.,Phone\n" + "\n".join(
+            f"Student {i},BSc CS,NA22CS{i:03},D{i},999" for i in range(25)
+        )
+        with self.settings(COPO_IMPORT_CHUNK_SIZE=10):
+            result = self.upload("/upload-students/", "students.csv", content).json()
+        self.assertEqual(result["rows_processed"], 25)
+        self.assertEqual(result["created"], 25)
+
+    def test_course_rows_are_upserted_reporting_skipped_rows(self):
+        rows = [f"C{i},Course {i},Computer Science,1,4,2024" for i in range(12)]
+        rows.append("C99,Course 99,Unknown Dept,1,4,2024")
+        rows.append("C0,Course Zero,Computer Science,2,3,2024")  # repeats row 1
+        content = "course_code,course_title,dept_name,sem,credits,syllabus_year\n" + "\n".join(rows)
+        with self.settings(COPO_IMPORT_CHUNK_SIZE=5):
+            response = self.upload("/upload-courses/", "courses.csv", content)
+        self.assertEqual(response.status_code, 201)
+        result = response.json()
+        self.assertEqual((result["created"], result["errors"], result["rows_processed"]), (12, 1, 14))
+        self.assertEqual([row["row"] for row in result["skipped_rows"]], [13])
+        self.assertIn("Unknown Dept", result["skipped_rows"][0]["error"])
+        self.assertEqual(Course.objects.get(course_code="C0").title, "Course Zero")
+
+        # Uploading the same syllabus again updates instead of duplicating
+        with self.settings(COPO_IMPORT_CHUNK_SIZE=5):
+            result = self.upload("/upload-courses/", "courses.csv", content).json()
+        self.assertEqual((result["created"], result["updated"]), (0, 13))
+        self.assertEqual(Course.objects.filter(course_code__regex=r"^C[0-9]").count(), 12)
+
+    def test_skipped_rows_are_capped(self):
+        rows = [f"D{i},Course {i},Nowhere,1,4,2024" for i in range(30)]
+        rows += ["D0,First,Computer Science,1,4,2024", "D0,Second,Computer Science,1,4,2024"]
+        content = "course_code,course_title,dept_name,sem,credits,syllabus_year\n" + "\n".join(rows)
+        with self.settings(COPO_IMPORT_CHUNK_SIZE=8, COPO_IMPORT_MAX_ERRORS=20):
+            result = self.upload("/upload-courses/", "courses.csv", content).json()
+        self.assertEqual((result["errors"], result["duplicates"], result["created"]), (30, 1, 1))
+        self.assertEqual(len(result["skipped_rows"]), 20)
+        self.assertTrue(result["truncated"])
+
+    def workbook(self, rows):
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        for row in rows:
+            sheet.append(row)
+        content = io.BytesIO()
+        workbook.save(content)
+        return content.getvalue()
+
+    def upload_xlsx(self, url, rows):
+        upload = SimpleUploadedFile(
+            "export.xlsx", self.workbook(rows),
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+        return self.client.post(url, {"file": upload})
+
+    def test_xlsx_courses_and_students(self):
+        rows = [["course_code", "course_title", "dept_name", "sem", "credits", "syllabus_year", "notes"]]
+        rows += [[f"X{i}", f"Course {i}", "Computer Science", 1, 4.0, 2024, None] for i in range(7)]
+        rows.insert(3, [None] * 7)  # blank rows are skipped, as in CSV
+        with self.settings(COPO_IMPORT_CHUNK_SIZE=3):
+            result = self.upload_xlsx("/upload-courses/", rows).json()
+        self.assertEqual((result["created"], result["rows_processed"], result["skipped_rows"]), (7, 7, []))
+        self.assertEqual(Course.objects.get(course_code="X6").credits, 4)
+
+        rows = [[" Programme", "Examination Register Number", "Admission No.", "NAME"]]
+        rows += [["BSc CS", f"NA22CS{i:03}", 7000 + i, f"Student {i}"] for i in range(4)]
+        result = self.upload_xlsx("/upload-students/", rows).json()
+        self.assertEqual(result["created"], 4)
+        self.assertEqual(Student.objects.get(admn_no="7003").year_of_admission, 2022)
+
+    def test_faculty_import(self):
+        content = "name,dept_name,email,mob\nAnu Joseph,Computer Science,anu@example.com,9876\n"
+        content += "Existing,Computer Science,f0@example.com,1\n"
+        with self.settings(COPO_IMPORT_CHUNK_SIZE=1):
+            response = self.upload("/upload-faculty-csv/", "faculty.csv", content)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.json()["created"], response.json()["skipped"]), (1, 1))
+        self.assertEqual(response.json()["skipped_rows"][0]["name"], "Existing")
+        user = CustomUser.objects.get(email="anu@example.com")
+        self.assertEqual((user.username, user.last_name), ("anu", "Joseph"))
+        self.assertTrue(user.check_password("9876"))
+
+    def test_bulk_faculty_onboarding(self):
+        rows = [f"Teacher {i} Name,Computer Science,t{i}@example.com,55{i}" for i in range(6)]
+        rows.append("Duplicate,Computer Science,t0@example.com,1")
+        content = "name,dept_name,email,mob\n" + "\n".join(rows)
+        # Only skipped rows count towards the cap on listed rows
+        with self.settings(COPO_HASH_WORKERS=2, COPO_IMPORT_MAX_ERRORS=2):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.upload("/upload-faculty-csv/", "faculty.csv", content)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.json()["created"], response.json()["skipped"]), (6, 1))
+        self.assertNotIn("truncated", response.json())
+        self.assertEqual(response.json()["skipped_rows"][0]["name"], "Duplicate")
+        self.assertLess(len(queries), 12)
+        user = CustomUser.objects.get(username="t5")
+        self.assertEqual((user.first_name, user.last_name, user.role), ("Teacher", "5 Name", "teacher"))
+        self.assertTrue(user.check_password("555"))
+        self.assertEqual(Faculty.objects.get(email="t5@example.com").phone_no, "555")
+
+
+class DryRunValidationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog(rows=1)
+
+    def dry_run(self, url, content, **settings):
+        upload = SimpleUploadedFile("upload.csv", content.encode(), content_type="text/csv")
+        with self.settings(**settings):
+            return self.client.post(url + "?dry_run=true", {"file": upload})
+
+    def test_student_report_lists_every_bad_row_without_writing(self):
+        content = "Programme,Examination Register Number,Admission No.,Name\n" + "\n".join([
+            "BSc CS,NA22CS100,B1,New Student",
+            "BSc CS,NA23CS001,A0,Existing Student",  # updates A0
+            "Unknown,NA22CS101,B2,Lost Student",
+            "BSc CS,BAD,B3,Bad Register",
+            "BSc CS,NA22CS104,B1,Repeated Admission",  # updates B1, as on import
+            "BSc CS,NA24CS000,B5,Taken Register",  # belongs to A0
+            "BSc CS,NA22CS106,,No Admission",
+        ])
+        students = Student.objects.count()
+        response = self.dry_run("/upload-students/", content, COPO_IMPORT_CHUNK_SIZE=3)
+        report = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Student.objects.count(), students)
+        self.assertFalse(report["valid"])
+        self.assertEqual((report["would_create"], report["would_update"], report["error_rows"]), (1, 2, 4))
+        self.assertEqual([row["row"] for row in report["errors"]], [3, 4, 6, 7])
+        self.assertIn('Programme "Unknown" does not exist.', report["errors"][0]["errors"])
+        self.assertIn("register_no already belongs to another student.", report["errors"][2]["errors"])
+
+    def test_course_and_faculty_reports(self):
+        content = "course_code,course_title,dept_name,sem,credits,syllabus_year\n"
+        content += "CS0,Course 0,Computer Science,1,4,2024\nN1,New,Computer Science,1,four,2024\n"
+        content += "N2,New,History,1,4,2024\nN3,New,Computer Science,1,4,2024\nN3,Again,Computer Science,1,4,2024\n"
+        report = self.dry_run("/upload-courses/", content, COPO_DRY_RUN_MAX_ERRORS=1).json()
+        self.assertEqual((report["would_create"], report["would_update"], report["error_rows"]), (1, 2, 2))
+        self.assertEqual([row["row"] for row in report["errors"]], [2])
+        self.assertTrue(report["truncated"])
+        self.assertFalse(Course.objects.filter(course_code="N3").exists())
+
+        report = self.dry_run("/upload-faculty-csv/", "name,email\nAnu,anu@example.com\n").json()
+        self.assertEqual(report["missing_columns"], ["dept_name"])
+        report = self.dry_run(
+            "/upload-faculty-csv/",
+            "name,dept_name,email\nAnu,Computer Science,anu@example.com\nOld,Computer Science,f0@example.com\n"
+            "Typo,Computer Science,not-an-email\n",
+        ).json()
+        self.assertEqual([row["row"] for row in report["errors"]], [2, 3])
+        self.assertFalse(Faculty.objects.filter(email="anu@example.com").exists())
+
+    def test_faculty_import_skips_what_validation_reports(self):
+        content = (
+            "name,dept_name,email,mob\nAnu,Computer Science,anu@example.com,1\n"
+            "Typo,Computer Science,not-an-email,1\nLost,History,lost@example.com,1\n"
+            "Twin,Computer Science,anu@example.org,1\n"
+        )
+        report = self.dry_run("/upload-faculty-csv/", content).json()
+        upload = SimpleUploadedFile("faculty.csv", content.encode(), content_type="text/csv")
+        result = self.client.post("/upload-faculty-csv/", {"file": upload}).json()
+        self.assertEqual(result["created"], 1)
+        self.assertEqual(
+            [(row["row"], row["error"]) for row in result["skipped_rows"]],
+            [(row["row"], row["errors"][0]) for row in report["errors"]],
+        )
+        self.assertEqual(result["skipped_rows"][2]["error"], "Duplicate username in the file.")
+
+
+class BulkMarksTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog(rows=1)
+        programme = Programme.objects.get()
+        Student.objects.bulk_create([
+            Student(name=f"Student {i}", admn_no=f"M{i}", register_no=f"NA24MK{i:03}",
+                    programme=programme, year_of_admission=2024)
+            for i in range(120)
+        ])
+        cls.student_ids = list(Student.objects.order_by("pk").values_list("pk", flat=True))
+        cls.exam = InternalExam.objects.create(batch=Batch.objects.get(), exam_name="IA1", max_marks=50)
+        cls.quiz = Quiz.objects.create(batch=Batch.objects.get(), max_marks=10)
+
+    def post(self, url, data):
+        return self.client.post(url, json.dumps(data), content_type="application/json")
+
+    def test_whole_class_is_saved_with_constant_queries(self):
+        data = {"marks": [[student_id, i % 51] for i, student_id in enumerate(self.student_ids)]}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post(f"/marks/internal/{self.exam.pk}/", data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["created"], 121)
+        self.assertLessEqual(len(queries), 7)
+
+        data["marks"][0][1] = 49
+        result = self.post(f"/marks/internal/{self.exam.pk}/", data).json()
+        self.assertEqual((result["created"], result["updated"]), (0, 121))
+        saved = self.client.get(f"/marks/internal/{self.exam.pk}/").json()["marks"]
+        self.assertEqual(saved[0], [self.student_ids[0], 49])
+        self.assertEqual(InternalMark.objects.count(), 121)
+
+    def test_invalid_entries_reject_the_whole_set(self):
+        url = f"/marks/quiz/{self.quiz.pk}/"
+        response = self.post(url, [[self.student_ids[0], 5], [self.student_ids[1], 11], [999999, 3],
+                                   [self.student_ids[0], 2], [self.student_ids[2], -1]])
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()["errors"]
+        self.assertEqual([error["index"] for error in errors], [1, 2, 3, 4])
+        self.assertEqual(errors[0]["error"], "Marks cannot exceed 10.")
+        self.assertFalse(QuizMark.objects.exists())
+
+        self.assertEqual(self.post(url, [[1, 2.5]]).status_code, 400)
+        self.assertEqual(self.post(url, [[1, "x"]]).status_code, 400)
+        self.assertEqual(self.post("/marks/project/1/", []).status_code, 404)
+
+
+class ExternalMarksImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog(rows=3)
+        cls.exam = ExternalExam.objects.create(batch=Batch.objects.first(), max_marks=75)
+
+    def test_results_are_matched_on_register_number(self):
+        content = "Register Number,Name,Marks\n" + "\n".join([
+            "NA24CS000,Student 0,70",
+            "na24cs001 ,Student 1,40",  # case and spacing differ
+            "NA24CS002,Student 2,80",  # above max_marks
+            "NA99XX999,Nobody,50",
+            "NA24CS002,Student 2,60",
+            ",Blank,10",
+        ])
+        upload = SimpleUploadedFile("results.csv", content.encode(), content_type="text/csv")
+        with self.settings(COPO_IMPORT_CHUNK_SIZE=4):
+            response = self.client.post(f"/upload-external-marks/{self.exam.pk}/", {"file": upload})
+        self.assertEqual(response.status_code, 201)
+        result = response.json()
+        self.assertEqual(result["saved"], 3)
+        self.assertEqual(result["unmatched"], ["NA99XX999"])
+        self.assertEqual(
+            [(row["row"], row["error"]) for row in result["invalid"]],
+            [(3, "Marks cannot exceed 75."), (6, "register_no is required.")],
+        )
+        saved = dict(ExternalMark.objects.values_list("student__register_no", "marks"))
+        self.assertEqual(saved, {"NA24CS000": 70, "NA24CS001": 40, "NA24CS002": 60})
+
+
+class AttainmentFixture:
+    """A batch with two COs, two question-based exams and four students' totals; no tests of its own."""
+
+    @classmethod
+    def setUpTestData(cls):
+        programme = create_catalog(rows=1)
+        cls.batch = Batch.objects.get()
+        course = cls.batch.course
+        co_a = CO.objects.get()
+        co_b = CO.objects.create(
+            course=course, co_label="CO-B", co_description="", remember=1,
+            understand=0, apply=0, analyze=0, evaluate=0, create=0,
+        )
+        q1 = QuestionBank.objects.create(course=course, co=co_a, question_text="a", marks=6)
+        q2 = QuestionBank.objects.create(course=course, co=co_b, question_text="b", marks=4)
+        q3 = QuestionBank.objects.create(course=course, co=co_b, question_text="c", marks=10)
+        ia1 = InternalExam.objects.create(batch=cls.batch, exam_name="IA1", max_marks=20)
+        ia2 = InternalExam.objects.create(batch=cls.batch, exam_name="IA2", max_marks=10)
+        for exam, questions in ((ia1, [q1, q2]), (ia2, [q3])):
+            section = ExamSection.objects.create(
+                internal_exam=exam, section_name="A", no_of_questions=len(questions),
+                no_of_questions_to_be_answered=len(questions),
+            )
+            for question in questions:
+                ExamQuestion.objects.create(section=section, question_bank=question)
+
+        students = [Student.objects.get()] + [
+            Student.objects.create(name=f"S{i}", admn_no=f"T{i}", register_no=f"NA24AT{i}",
+                                   programme=programme, year_of_admission=2024)
+            for i in range(3)
+        ]
+        marks = [(18, 9), (10, 5), (6, None), (None, 8)]
+        for student, (first, second) in zip(students, marks):
+            for exam, mark in ((ia1, first), (ia2, second)):
+                if mark is not None:
+                    InternalMark.objects.create(student=student, internal_exam=exam, marks=mark)
+
+
+class AttainmentTests(AttainmentFixture, TestCase):
+    def test_compute_on_a_small_matrix(self):
+        result = attainment.compute(
+            [[8, 10], [4, np.nan]], [10, 10], [[1, 0], [0, 1]], target_percent=60, levels={2: 100, 1: 50}
+        )
+        self.assertEqual(result["attainment_percent"].tolist(), [50, 100])
+        self.assertEqual(result["level"].tolist(), [1, 2])
+        self.assertEqual(result["students_assessed"].tolist(), [2, 1])
+
+    def test_batch_endpoint(self):
+        with self.assertNumQueries(6):
+            response = self.client.get(f"/batches/{self.batch.pk}/attainment/?live=true")
+        data = response.json()
+        self.assertEqual((data["students"], data["assessments"]), (4, 2))
+        co_a, co_b = data["cos"]
+        # CO0 is only tested by IA1, which three students sat
+        self.assertEqual((co_a["attainment_percent"], co_a["average_percent"], co_a["level"]), (33.33, 56.67, 0))
+        self.assertEqual((co_b["attainment_percent"], co_b["average_percent"], co_b["level"]), (50, 62.5, 1))
+        self.assertEqual(co_b["students_assessed"], 4)
+        self.assertEqual(self.client.get("/batches/999/attainment/").status_code, 404)
+
+
+class COPOMappingTests(AttainmentFixture, TestCase):
+    def put(self, data):
+        return self.client.put(
+            f"/courses/{self.batch.course_id}/co-mapping/", json.dumps(data), content_type="application/json"
+        )
+
+    def test_grid_round_trip_and_programme_rollup(self):
+        grid = self.client.get(f"/courses/{self.batch.course_id}/co-mapping/").json()
+        self.assertEqual(grid["po_matrix"], [[0], [0]])
+        second_po = PO.objects.create(po_label="PO-B", pos_description="", level=PO.objects.get().level)
+
+        response = self.put({
+            "co_ids": grid["co_ids"],
+            "po_ids": [grid["po_ids"][0], second_po.pk],
+            "po_matrix": [[3, 0], [1, 2]],
+            "pso_ids": grid["pso_ids"],
+            "pso_matrix": [[0], [0]],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["po_matrix"], [[3, 0], [1, 2]])
+        self.assertEqual(COPOMapping.objects.count(), 3)
+        self.assertEqual(self.put({"po_matrix": [[4, 0], [0, 0]]}).status_code, 400)
+        self.assertEqual(self.put({"po_matrix": [[1, 0]]}).status_code, 400)
+
+        # CO levels are 0 and 1 (see AttainmentFixture)
+        programme = Programme.objects.get()
+        with self.assertNumQueries(11):
+            data = self.client.get(f"/programmes/{programme.pk}/attainment/?live=true").json()
+        self.assertEqual([po["attainment"] for po in data["pos"]], [0.25, 1.0])
+        self.assertEqual([po["cos_mapped"] for po in data["pos"]], [2, 1])
+        self.assertEqual(data["psos"][0]["attainment"], None)
+        snapshot = self.client.get(f"/programmes/{programme.pk}/attainment/").json()
+        self.assertEqual((snapshot["pos"], snapshot["psos"]), (data["pos"], data["psos"]))
+
+    def test_rollup_is_a_weighted_matrix_product(self):
+        value, mapped = attainment.rollup([3, np.nan, 1], [[3, 0], [2, 2], [1, 0]])
+        self.assertEqual(value[0], 2.5)
+        self.assertTrue(np.isnan(value[1]))
+        self.assertEqual(mapped.tolist(), [2, 0])
+
+
+class QuestionMarksTests(AttainmentFixture, TestCase):
+    def post(self, data):
+        return self.client.post(
+            f"/marks/internal/{self.ia1.pk}/questions/", json.dumps(data), content_type="application/json"
+        )
+
+    def setUp(self):
+        self.ia1 = InternalExam.objects.get(exam_name="IA1")
+        self.students = list(Student.objects.order_by("pk").values_list("pk", flat=True))
+
+    def test_grid_round_trip(self):
+        grid = self.client.get(f"/marks/internal/{self.ia1.pk}/questions/").json()
+        self.assertEqual((grid["max_marks"], grid["student_ids"]), ([6, 4], []))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post({"student_ids": self.students[:3], "marks": [[6, 4], [3, None], [0, 2]]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["saved"], response.json()["created"]), (5, 5))
+        self.assertTrue(AttainmentState.objects.get(batch=self.batch).dirty)
+
+        response = self.post({
+            "student_ids": self.students[1:2], "question_ids": grid["question_ids"][::-1], "marks": [[1, None]],
+        })
+        self.assertEqual((response.json()["updated"], response.json()["cleared"]), (0, 1))
+        with self.assertNumQueries(3):  # exam, questions, marks
+            grid = self.client.get(f"/marks/internal/{self.ia1.pk}/questions/").json()
+        self.assertEqual(grid["marks"], [[6, 4], [None, 1], [0, 2]])
+
+    def test_each_save_flags_the_batch_once(self):
+        self.post({"student_ids": self.students[:2], "marks": [[6, 4], [3, 2]]})
+        AttainmentState.objects.update(dirty=False)
+        # Clearing every cell still changes attainment, and flags it with one write
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post({"student_ids": self.students[:2], "marks": [[None, None], [None, None]]})
+        self.assertEqual(response.json()["cleared"], 4)
+        self.assertEqual(len([query for query in queries if "copoapp_attainmentstate" in query["sql"]]), 1)
+        self.assertTrue(AttainmentState.objects.get(batch=self.batch).dirty)
+        # Their totals came from the cleared marks, so they go too
+        self.assertFalse(InternalMark.objects.filter(internal_exam=self.ia1, student_id__in=self.students[:2]).exists())
+        self.assertTrue(InternalMark.objects.filter(internal_exam=self.ia1, student_id=self.students[2]).exists())
+
+    def test_question_changes_rescore_the_exam_once(self):
+        self.post({"student_ids": self.students[:2], "marks": [[6, 4], [3, None]]})
+        section = ExamSection.objects.get(internal_exam=self.ia1)
+        q1, q2 = ExamQuestion.objects.filter(section=section).order_by("q_id").values_list("question_bank_id", flat=True)
+        extra = QuestionBank.objects.bulk_create([
+            QuestionBank(course=self.batch.course, co=CO.objects.first(), question_text=f"x{i}", marks=2)
+            for i in range(10)
+        ])
+
+        # Dropping the first question and adding ten re-scores the exam once
+        with mock.patch("copoapp.scoring.score_exam", wraps=scoring.score_exam) as score_exam:
+            response = self.client.post(
+                "/add-exam-questions/",
+                json.dumps({"section_id": section.pk, "question_ids": [q2] + [question.pk for question in extra]}),
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(score_exam.call_count, 1)
+        self.assertEqual(ExamQuestion.objects.filter(section=section).count(), 11)
+        # The second student only answered the dropped question
+        totals = dict(InternalMark.objects.filter(internal_exam=self.ia1).values_list("student_id", "marks"))
+        self.assertEqual((totals[self.students[0]], self.students[1] in totals), (4, False))
+
+        self.client.delete(f"/question/delete/{q2}/")
+        self.assertFalse(InternalMark.objects.filter(internal_exam=self.ia1, student_id=self.students[0]).exists())
+
+    def test_invalid_cells_reject_the_whole_grid(self):
+        response = self.post({"student_ids": [self.students[0], 999999], "marks": [[7, 0], [1, -1]]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [error["error"] for error in response.json()["errors"]],
+            ["Marks exceed the question's marks.", "Student does not exist.", "Marks cannot be negative."],
+        )
+        self.assertEqual(self.post({"student_ids": self.students[:1], "marks": [[1]]}).status_code, 400)
+        ia2_question = ExamQuestion.objects.get(section__internal_exam__exam_name="IA2")
+        response = self.post({"student_ids": [], "question_ids": [ia2_question.pk], "marks": []})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(QuestionMark.objects.exists())
+
+    def test_attainment_uses_question_marks(self):
+        self.post({"student_ids": self.students[:3], "marks": [[6, 4], [3, None], [0, 2]]})
+        data = self.client.get(f"/batches/{self.batch.pk}/attainment/?live=true").json()
+        co_a, co_b = data["cos"]
+        # IA1 is now scored per question: CO-A only by its 6 mark question
+        self.assertEqual((co_a["attainment_percent"], co_a["average_percent"]), (33.33, 50))
+        self.assertEqual(co_b["students_assessed"], 4)
+        self.assertEqual(co_b["attainment_percent"], 50)
+
+
+class SectionScoringTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog(rows=1)
+        batch = Batch.objects.get()
+        co = CO.objects.get()
+        cls.exam = InternalExam.objects.create(batch=batch, exam_name="IA1", max_marks=25)
+        # Part A: answer any 2 of 3 five mark questions; part B: both ten mark questions, capped at 15
+        cls.part_a = ExamSection.objects.create(
+            internal_exam=cls.exam, section_name="A", no_of_questions=3, no_of_questions_to_be_answered=2,
+        )
+        cls.part_b = ExamSection.objects.create(
+            internal_exam=cls.exam, section_name="B", no_of_questions=2, no_of_questions_to_be_answered=2,
+            ceiling_mark=15,
+        )
+        for section, marks in ((cls.part_a, [5, 5, 5]), (cls.part_b, [10, 10])):
+            for mark in marks:
+                question = QuestionBank.objects.create(course=batch.course, co=co, question_text="q", marks=mark)
+                ExamQuestion.objects.create(section=section, question_bank=question)
+        cls.student = Student.objects.get()
+
+    def test_best_answers_are_counted_up_to_the_ceiling(self):
+        scores = scoring.section_scores(
+            [[5, 3, 4, 9, 8], [np.nan, 2, np.nan, 4, np.nan]], [0, 0, 0, 1, 1], [2, 0], [0, 15]
+        )
+        self.assertEqual(scores.tolist(), [[9, 15], [2, 4]])
+
+    def test_totals_follow_marks_and_section_rules(self):
+        url = f"/marks/internal/{self.exam.pk}/questions/"
+        response = self.client.post(
+            url, json.dumps({"student_ids": [self.student.pk], "marks": [[5, 3, 4, 9, 8]]}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(InternalMark.objects.get(internal_exam=self.exam).marks, 24)
+
+        # Counting all of part A and lifting the cap re-scores the exam once the change commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(
+                f"/exam-sections/update/{self.part_a.pk}/", json.dumps({"no_of_questions_to_be_answered": 3}),
+                content_type="application/json",
+            )
+            self.part_b.ceiling_mark = 0
+            self.part_b.save()
+        self.assertEqual(InternalMark.objects.get(internal_exam=self.exam).marks, 29)
+
+        InternalMark.objects.update(marks=0)
+        response = self.client.post(f"/marks/internal/{self.exam.pk}/rescore/")
+        self.assertEqual(response.json()["students"], 1)
+        self.assertEqual(InternalMark.objects.get(internal_exam=self.exam).marks, 29)
+
+    def post_marks(self, student_ids, marks, question_ids=None):
+        response = self.client.post(
+            f"/marks/internal/{self.exam.pk}/questions/",
+            json.dumps({"student_ids": student_ids, "marks": marks, "question_ids": question_ids}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def other_student(self):
+        return Student.objects.create(
+            name="Other", admn_no="B1", register_no="NA24CS900", programme=self.student.programme,
+            year_of_admission=2024,
+        )
+
+    def totals(self):
+        return dict(InternalMark.objects.filter(internal_exam=self.exam).values_list("student_id", "marks"))
+
+    def test_deleting_a_section_drops_totals_built_only_from_its_marks(self):
+        other = self.other_student()
+        self.post_marks([self.student.pk, other.pk], [[5, 3, 4, 9, 8], [None, None, None, 7, None]])
+        self.assertEqual(self.totals(), {self.student.pk: 24, other.pk: 7})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f"/exam-sections/delete/{self.part_b.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.totals(), {self.student.pk: 9})
+
+    def test_deleting_a_co_drops_totals_built_only_from_its_questions(self):
+        batch = self.exam.batch
+        co = CO.objects.create(
+            course=batch.course, co_label="CO-X", co_description="", remember=1,
+            understand=0, apply=0, analyze=0, evaluate=0, create=0,
+        )
+        question = QuestionBank.objects.create(course=batch.course, co=co, question_text="x", marks=5)
+        exam_question = ExamQuestion.objects.create(section=self.part_b, question_bank=question)
+        other = self.other_student()
+        self.post_marks([self.student.pk, other.pk], [[5], [4]], question_ids=[exam_question.pk])
+        self.post_marks([self.student.pk], [[5, 3, 4, 9, 8]], question_ids=[
+            pk for pk in ExamQuestion.objects.filter(section__internal_exam=self.exam).order_by("q_id")
+            .values_list("pk", flat=True) if pk != exam_question.pk
+        ])
+        self.assertEqual(self.totals(), {self.student.pk: 24, other.pk: 4})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f"/cos/delete/{co.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.totals(), {self.student.pk: 24})
+
+
+class AttainmentSnapshotTests(AttainmentFixture, TestCase):
+    def test_reports_are_read_from_snapshots_and_refreshed_by_the_queue(self):
+        url = f"/batches/{self.batch.pk}/attainment/"
+        first = self.client.get(url).json()  # computed on first use
+        self.assertFalse(first["stale"])
+        self.assertEqual([co["level"] for co in first["cos"]], [0, 1])
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get(url).json()["cos"], first["cos"])
+
+        # Raising the third student's IA1 mark marks only this batch dirty and queues one recompute
+        mark = InternalMark.objects.get(marks=6)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/marks/internal/{mark.internal_exam_id}/", json.dumps([[mark.student_id, 20]]),
+                             content_type="application/json")
+        self.assertTrue(self.client.get(url).json()["stale"])
+        self.assertEqual(Job.objects.filter(kind="recompute_attainment", status=Job.QUEUED).count(), 1)
+
+        job = jobs.run_next()
+        self.assertEqual(job.result, {"batches": 1, "rollups": 1})
+        report = self.client.get(url).json()
+        self.assertFalse(report["stale"])
+        self.assertEqual(report["cos"][0]["attainment_percent"], 66.67)
+
+    def test_marks_committed_during_a_recompute_keep_the_batch_dirty(self):
+        snapshots.mark_dirty([self.batch.pk])
+        load_batches = attainment.load_batches
+
+        def late_write(batches):
+            data = load_batches(batches)
+            # A write stamped before the run started that only commits once the marks are read
+            AttainmentState.objects.filter(batch=self.batch).update(
+                dirty=True, marked_at=timezone.now() - datetime.timedelta(minutes=1)
+            )
+            return data
+
+        with mock.patch("copoapp.attainment.load_batches", side_effect=late_write):
+            self.assertEqual(snapshots.recompute()["batches"], 1)
+        state = AttainmentState.objects.get(batch=self.batch)
+        self.assertTrue(state.dirty)
+        self.assertIsNotNone(state.computed_at)
+
+        snapshots.recompute()
+        self.assertFalse(AttainmentState.objects.get(batch=self.batch).dirty)
+
+    def test_cascade_deletes_remove_marks_in_bulk(self):
+        students = list(Student.objects.order_by("pk"))
+        exams = InternalExam.objects.bulk_create(
+            [InternalExam(batch=self.batch, exam_name=f"T{i}", max_marks=10) for i in range(30)]
+        )
+        InternalMark.objects.bulk_create(
+            [InternalMark(internal_exam=exam, student=student, marks=5) for exam in exams for student in students]
+        )
+        ia1 = InternalExam.objects.get(exam_name="IA1")
+        self.client.post(
+            f"/marks/internal/{ia1.pk}/questions/",
+            json.dumps({"student_ids": [student.pk for student in students], "marks": [[6, 4]] * len(students)}),
+            content_type="application/json",
+        )
+        AttainmentState.objects.update(dirty=False)
+
+        # However many marks a student or an exam has, each table is cleared in one statement:
+        # the batch lookup and flag, one delete per marks table, the student and its counter
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(10):
+                students[0].delete()
+        self.assertTrue(AttainmentState.objects.get(batch=self.batch).dirty)
+        exam = InternalExam.objects.get(pk=exams[0].pk)
+        with self.assertNumQueries(4):  # sections, flag, marks, exam
+            exam.delete()
+        self.assertFalse(InternalMark.objects.filter(internal_exam_id=exams[0].pk).exists())
+
+    def test_bulk_marks_and_rebuild_command(self):
+        exam = InternalExam.objects.get(exam_name="IA2")
+        student = Student.objects.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/marks/internal/{exam.pk}/", json.dumps([[student.pk, 1]]),
+                             content_type="application/json")
+        self.assertTrue(AttainmentState.objects.get(batch=self.batch).dirty)
+
+        out = io.StringIO()
+        call_command("rebuild_attainment", stdout=out)
+        self.assertIn("Recomputed 1 batch(es) and 1 programme rollup(s)", out.getvalue())
+        self.assertFalse(AttainmentState.objects.get(batch=self.batch).dirty)
+        self.assertEqual(COAttainment.objects.filter(batch=self.batch).count(), 2)
+
+
+class JobQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog(rows=1)
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        storage = self.settings(MEDIA_ROOT=media.name)
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+    def upload_async(self, url, content):
+        upload = SimpleUploadedFile("courses.csv", content.encode(), content_type="text/csv")
+        return self.client.post(url + "?async=true", {"file": upload})
+
+    def test_async_upload_runs_in_a_worker(self):
+        content = "course_code,course_title,dept_name,sem,credits,syllabus_year\n"
+        content += "\n".join(f"J{i},Course {i},Computer Science,1,4,2024" for i in range(7))
+        response = self.upload_async("/upload-courses/", content)
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["job_id"]
+        self.assertFalse(Course.objects.filter(course_code="J0").exists())
+        self.assertEqual(self.client.get(f"/jobs/{job_id}/result/").status_code, 202)
+
+        with self.settings(COPO_IMPORT_CHUNK_SIZE=3):
+            self.assertEqual(jobs.run_next("test").job_id, job_id)
+        self.assertIsNone(jobs.run_next("test"))
+
+        status = self.client.get(f"/jobs/{job_id}/").json()
+        self.assertEqual((status["status"], status["progress"]), ("succeeded", 7))
+        self.assertIsNotNone(status["duration_seconds"])
+        result = self.client.get(f"/jobs/{job_id}/result/").json()
+        self.assertEqual(result["created"], 7)
+        self.assertEqual(Course.objects.filter(course_code__startswith="J").count(), 7)
+
+    def test_failed_job_reports_its_error(self):
+        response = self.upload_async("/upload-courses/", "course_code,course_title\nJ1,Course\n")
+        job = jobs.run_next()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn("Missing required column", job.error)
+        result = self.client.get(f"/jobs/{response.json()['job_id']}/result/")
+        self.assertEqual(result.status_code, 500)
+        self.assertIn("Missing required column", result.json()["error"])
+
+    def test_worker_retries_after_a_locked_database(self):
+        job = jobs.enqueue("recompute_attainment", {})
+        real_claim = jobs.claim
+        failures = [OperationalError("database is locked")]
+
+        def flaky_claim(worker=""):
+            if failures:
+                raise failures.pop()
+            return real_claim(worker)
+
+        with mock.patch.object(jobs, "claim", flaky_claim), self.assertLogs("copoapp.jobs", "ERROR") as logs:
+            jobs.work("test", poll_interval=0, once=True)
+        self.assertIn("database error", logs.output[0])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+
+    def test_expired_jobs_and_their_files_are_purged(self):
+        name = default_storage.save("jobs/exam_preview_1.pdf", ContentFile(b"%PDF"))
+        old = Job.objects.create(
+            kind="exam_preview", status=Job.SUCCEEDED, result={"file": name},
+            finished_at=timezone.now() - datetime.timedelta(days=8),
+        )
+        recent = Job.objects.create(kind="exam_preview", status=Job.SUCCEEDED, finished_at=timezone.now())
+        queued = Job.objects.create(kind="exam_preview")
+        self.assertEqual(jobs.purge_expired(), 1)
+        self.assertFalse(default_storage.exists(name))
+        self.assertEqual(set(Job.objects.values_list("pk", flat=True)), {recent.pk, queued.pk})
+        self.assertFalse(Job.objects.filter(pk=old.pk).exists())
+
+    def test_a_job_is_claimed_once(self):
+        job = jobs.enqueue("import_courses", {"path": "missing.csv"})
+        self.assertEqual(jobs.claim("first").job_id, job.job_id)
+        self.assertIsNone(jobs.claim("second"))
+        self.assertEqual(jobs.requeue_running(), 1)
 
-# Create your tests here.
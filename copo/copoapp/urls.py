@@ -78,6 +78,7 @@ urlpatterns = [
      path('question/edit/<int:question_id>/', views.edit_question, name='edit-question'),
      path("question/<int:question_id>/", views.get_question_details, name="get-question-details"),
      path("get-questions/", views.get_questions, name="get-questions"),
+     path("search-questions/", views.search_questions, name="search-questions"),
      path("question/delete/<int:question_id>/", views.delete_question, name="delete-question"),
      
      path("exam-sections/<int:int_exam_id>/", views.get_exam_sections, name="get_exam_sections"),
@@ -96,4 +97,16 @@ urlpatterns = [
      path("upload_pdf/", views.upload_pdf, name="upload_pdf"),
      
      path("dashboard-stats/", views.get_dashboard_stats, name="get_dashboard_stats"),
+     path("cache-stats/", views.get_cache_stats, name="get_cache_stats"),
+
+     path("marks/<str:kind>/<int:assessment_id>/", views.assessment_marks, name="assessment_marks"),
+     path("marks/internal/<int:int_exam_id>/questions/", views.question_marks, name="question_marks"),
+     path("marks/internal/<int:int_exam_id>/rescore/", views.rescore_exam, name="rescore_exam"),
+     path("batches/<int:batch_id>/attainment/", views.get_batch_attainment, name="get_batch_attainment"),
+     path("courses/<int:course_id>/co-mapping/", views.course_co_mapping, name="course_co_mapping"),
+     path("programmes/<int:programme_id>/attainment/", views.get_programme_attainment, name="get_programme_attainment"),
+     path("upload-external-marks/<int:external_exam_id>/", views.upload_external_marks, name="upload_external_marks"),
+
+     path("jobs/<int:job_id>/", views.get_job, name="get_job"),
+     path("jobs/<int:job_id>/result/", views.get_job_result, name="get_job_result"),
 ]
@@ -3,14 +3,12 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework import status
-from django.http import JsonResponse
+from .json_backend import JsonResponse
 import json
 import re
-import io
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
 from django.core.validators import validate_email
 from django.core.files.storage import default_storage
-import pandas as pd
 from .models import (
     Faculty,
     Department,
@@ -26,14 +24,37 @@ from .models import (
     QuestionBank,
     InternalExam,
     ExamSection,
-    ExamQuestion
+    ExamQuestion,
+    ExternalExam,
+    Job,
+    QuestionMark,
 )
+from .projections import (
+    FieldSelectionError,
+    BATCH_LIST,
+    CO_LIST,
+    COURSE_LIST,
+    FACULTY_LIST,
+    PO_LIST,
+    PROGRAMME_LIST,
+    PSO_LIST,
+    QUESTION_LIST,
+    STUDENT_LIST,
+)
+from .pagination import PaginationError, paginate
+from .streaming import streaming_json_response, wants_stream
+from . import attainment, counters, importers, jobs, mapping, marks, response_cache, scoring, search, snapshots
+from .response_cache import cached_response, conditional
 from datetime import datetime
 from rest_framework.decorators import api_view, permission_classes
 from django.views.decorators.csrf import csrf_exempt
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils.decorators import method_decorator
 import os
 import subprocess
+import tempfile
 import base64
 import fitz  # PyMuPDF
 from g4f.client import Client
@@ -41,7 +62,7 @@ from django.contrib.auth import authenticate
 from rest_framework.permissions import AllowAny
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse
 
 User = get_user_model()
 
@@ -261,13 +282,10 @@ def delete_faculty(request, faculty_id):
     return JsonResponse({"error": "Invalid request method."}, status=405)
 
 # Get All Faculties name
+@conditional("faculty", "departments")
 def get_faculty(request):
     try:
-        faculty_list = Faculty.objects.all()
-        faculty_data = [
-            {"faculty_id": faculty.faculty_id, "name": faculty.name, "dept":faculty.dept.dept_name}
-            for faculty in faculty_list
-        ]
+        faculty_data = FACULTY_LIST.for_request(request).rows()
         return JsonResponse(faculty_data, safe=False, status=200)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=400)
@@ -275,6 +293,7 @@ def get_faculty(request):
 
 # Get specific details of faculties
 @csrf_exempt
+@conditional("faculty", "departments")
 def get_faculty_details(request, faculty_id):
     if request.method == "GET":
         try:
@@ -295,6 +314,8 @@ def get_faculty_details(request, faculty_id):
 
 
 class DepartmentView(APIView):
+    @method_decorator(conditional("departments"))
+    @method_decorator(cached_response("departments"))
     def get(self, request):
         departments = Department.objects.all()
         department_data = [
@@ -326,6 +347,8 @@ def add_student(request):
     return JsonResponse({"error": "Invalid request method."}, status=405)
 
 
+@conditional("levels")
+@cached_response("levels")
 def get_levels(request):
     try:
         levels = Level.objects.all()
@@ -439,13 +462,10 @@ def delete_course(request, course_id):
 
 
 # Get All Courses
+@conditional("courses", "departments")
 def get_courses(request):
     try:
-        course_list = Course.objects.all()
-        course_data = [
-            {"course_id": course.course_id, "title": course.title,"dept":course.dept.dept_name}
-            for course in course_list
-        ]
+        course_data = COURSE_LIST.for_request(request).rows()
         return JsonResponse(course_data, safe=False, status=200)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=400)
@@ -453,6 +473,7 @@ def get_courses(request):
 
 # Get Specific Course Details
 @csrf_exempt
+@conditional("courses", "departments")
 def get_course_details(request, course_id):
     if request.method == "GET":
         try:
@@ -559,20 +580,14 @@ def delete_batch(request, batch_id):
 
 
 # Get All Batches
+@conditional("batches", "faculty", "courses")
 def get_batches(request):
     try:
-        batch_list = Batch.objects.all()
-        batch_data = [
-            {
-                "batch_id": batch.batch_id,
-                "faculty": batch.faculty_id.name,
-                "course": batch.course.title if batch.course else None,
-                "year": batch.year,
-                "part": batch.part,
-                "active": batch.active,
-            }
-            for batch in batch_list
-        ]
+        projection = BATCH_LIST.for_request(request)
+        page = paginate(request, projection)
+        if page is not None:
+            return JsonResponse(page, status=200)
+        batch_data = projection.rows()
         return JsonResponse(batch_data, safe=False, status=200)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=400)
@@ -580,6 +595,7 @@ def get_batches(request):
 
 # Get Specific Batch Details
 @csrf_exempt
+@conditional("batches", "faculty", "courses")
 def get_batch_details(request, batch_id):
     if request.method == "GET":
         try:
@@ -707,18 +723,11 @@ def delete_programme(request, programme_id):
 
 
 # Get All Programmes
+@conditional("programmes", "departments", "levels")
+@cached_response("programmes", "departments", "levels")
 def get_programmes(request):
     try:
-        programme_list = Programme.objects.all()
-        programme_data = [
-            {
-                "programme_id": programme.programme_id,
-                "programme_name": programme.programme_name,
-                "department": programme.dept.dept_name,
-                "level": programme.level.name,
-            }
-            for programme in programme_list
-        ]
+        programme_data = PROGRAMME_LIST.for_request(request).rows()
         return JsonResponse(programme_data, safe=False, status=200)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=400)
@@ -726,6 +735,7 @@ def get_programmes(request):
 
 # Get Specific Programme Details
 @csrf_exempt
+@conditional("programmes", "departments", "levels")
 def get_programme_details(request, programme_id):
     if request.method == "GET":
         try:
@@ -779,6 +789,7 @@ def edit_student(request, student_id):
     return JsonResponse({"error": "Invalid request method."}, status=405)
 
 @csrf_exempt
+@conditional("students", "programmes")
 def get_student_details(request, student_id):
     if request.method == "GET":
         student = get_object_or_404(Student, student_id=student_id)
@@ -794,6 +805,7 @@ def get_student_details(request, student_id):
     
     return JsonResponse({"error": "Invalid request method."}, status=405)
 
+@conditional("students", "programmes")
 def get_students_by_programme(request, programme_id=None):
     if request.method == "GET":
         if programme_id:
@@ -802,11 +814,19 @@ def get_students_by_programme(request, programme_id=None):
         else:
             students = Student.objects.all()
 
-        student_data = students.values(
-            "student_id", "name", "register_no", "year_of_admission", "phone_number", "email","admn_no","programme__programme_name"
-        )
+        try:
+            projection = STUDENT_LIST.for_request(request)
+            page = paginate(request, projection, students)
+        except (FieldSelectionError, PaginationError) as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        if page is not None:
+            return JsonResponse(page, status=200)
+        if wants_stream(request):
+            return streaming_json_response(projection, students.order_by("student_id"))
+
+        student_data = projection.rows(students)
 
-        return JsonResponse(list(student_data), safe=False, status=200)
+        return JsonResponse(student_data, safe=False, status=200)
     
     return JsonResponse({"error": "Invalid request method."}, status=405)
 @csrf_exempt
@@ -902,6 +922,8 @@ def delete_po(request, po_id):
     return JsonResponse({"error": "Invalid request method."}, status=405)
 
 
+@conditional("pos", "levels")
+@cached_response("pos", "levels")
 def get_pos_by_level(request, level_id=None):
     try:
         if level_id:
@@ -909,21 +931,13 @@ def get_pos_by_level(request, level_id=None):
         else:
             po_list = PO.objects.all()
 
-        po_data = [
-            {
-                "id": po.id,
-                "po_label": po.po_label,
-                "pos_description": po.pos_description,
-                "level_id": po.level.level_id,
-                "level_name": po.level.name,
-            }
-            for po in po_list
-        ]
+        po_data = PO_LIST.for_request(request).rows(po_list)
         return JsonResponse(po_data, safe=False, status=200)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=400)
 
 @csrf_exempt
+@conditional("pos", "levels")
 def get_po_details(request, po_id):
     if request.method == "GET":
         try:
@@ -1054,18 +1068,10 @@ def delete_co(request, co_id):
 
 
 # Get All COs
+@conditional("cos", "courses")
 def get_cos(request):
     try:
-        co_list = CO.objects.all()
-        co_data = [
-            {
-                "co_id": co.co_id,
-                "co_label": co.co_label,
-                "co_description": co.co_description,
-                "course": co.course.title,
-            }
-            for co in co_list
-        ]
+        co_data = CO_LIST.for_request(request).rows()
         return JsonResponse(co_data, safe=False, status=200)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=400)
@@ -1073,6 +1079,7 @@ def get_cos(request):
 
 # Get Specific CO Details
 @csrf_exempt
+@conditional("cos", "courses")
 def get_co_details(request, co_id):
     if request.method == "GET":
         try:
@@ -1098,6 +1105,7 @@ def get_co_details(request, co_id):
             return JsonResponse({"error": str(e)}, status=400)
     return JsonResponse({"error": "Invalid request method."}, status=405)
 
+@conditional("cos", "courses")
 def get_co_by_course(request, course_id):
     if request.method == "GET":
         course = get_object_or_404(Course, course_id=course_id)
@@ -1191,23 +1199,17 @@ def delete_pso(request, pso_id):
             return JsonResponse({"error": str(e)}, status=400)
     return JsonResponse({"error": "Invalid request method."}, status=405)
 
+@conditional("psos", "programmes")
+@cached_response("psos", "programmes")
 def get_psos(request):
     try:
-        pso_list = PSO.objects.all()
-        pso_data = [
-            {
-                "pso_id": pso.pso_id,
-                "pso_label": pso.pso_label,
-                "programme": pso.programme.programme_name,
-                "pso_desc": pso.pso_desc,
-            }
-            for pso in pso_list
-        ]
+        pso_data = PSO_LIST.for_request(request).rows()
         return JsonResponse(pso_data, safe=False, status=200)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=400)
 
 @csrf_exempt
+@conditional("psos", "programmes")
 def get_pso_details(request, pso_id):
     if request.method == "GET":
         try:
@@ -1225,6 +1227,7 @@ def get_pso_details(request, pso_id):
             return JsonResponse({"error": str(e)}, status=400)
     return JsonResponse({"error": "Invalid request method."}, status=405)
 
+@conditional("psos", "programmes")
 def get_psos_by_programme(request, programme_id):
     if request.method == "GET":
         programme = get_object_or_404(Programme, programme_id=programme_id)
@@ -1376,22 +1379,34 @@ class FacultyBatchesAndExamsView(APIView):
             # Get faculty details
             faculty = get_object_or_404(Faculty, email=request.user.email)
 
-            # Get batches assigned to the faculty
-            batches = Batch.objects.filter(faculty_id=faculty)
+            # Get batches assigned to the faculty with their course joined and
+            # all their internal exams prefetched in one extra query
+            exams = InternalExam.objects.only(
+                "int_exam_id", "batch_id", "exam_name", "duration", "max_marks"
+            ).order_by("int_exam_id")
+            batches = (
+                Batch.objects.filter(faculty_id=faculty)
+                .select_related("course")
+                .prefetch_related(Prefetch("internalexam_set", queryset=exams))
+            )
 
-            # Fetching all internal exams related to those batches
             batch_data = []
             for batch in batches:
-                exams = InternalExam.objects.filter(batch=batch).values(
-                    "int_exam_id", "exam_name", "duration", "max_marks"
-                )
                 batch_data.append({
                     "batch_id": batch.batch_id,
                     "course_title": batch.course.title,
                     "year": batch.year,
                     "part": batch.part,
                     "active": batch.active,
-                    "exams": list(exams),  # Convert queryset to list
+                    "exams": [
+                        {
+                            "int_exam_id": exam.int_exam_id,
+                            "exam_name": exam.exam_name,
+                            "duration": exam.duration,
+                            "max_marks": exam.max_marks,
+                        }
+                        for exam in batch.internalexam_set.all()
+                    ],
                 })
 
             return Response(batch_data, status=status.HTTP_200_OK)
@@ -1421,6 +1436,9 @@ def edit_question(request, question_id):
                 question.marks = int(data["marks"])
 
             question.save()
+            snapshots.mark_dirty(
+                ExamQuestion.objects.filter(question_bank=question).values_list("section__internal_exam__batch_id", flat=True)
+            )
             return JsonResponse({"message": "Question updated successfully."}, status=200)
         
         except Course.DoesNotExist:
@@ -1435,6 +1453,7 @@ def edit_question(request, question_id):
     return JsonResponse({"error": "Invalid request method."}, status=405)
 
 @csrf_exempt
+@conditional("questions", "courses", "cos")
 def get_question_details(request, question_id):
     """Fetch details of a specific question"""
     if request.method == "GET":
@@ -1457,30 +1476,63 @@ def delete_question(request, question_id):
     if request.method == "DELETE":
         try:
             question = QuestionBank.objects.get(pk=question_id)
-            question.delete()
+            with transaction.atomic():
+                # Read before the cascade removes them: the exams using the question and who had marks on it
+                exams = list(InternalExam.objects.filter(examsection__examquestion__question_bank=question).distinct())
+                marked = list(
+                    QuestionMark.objects.filter(exam_question__question_bank=question)
+                    .values_list("exam_question__section__internal_exam_id", "student_id")
+                )
+                question.delete()
+                for exam in exams:
+                    scoring.score_exam(exam, cleared=[student_id for exam_id, student_id in marked if exam_id == exam.pk])
+                snapshots.mark_dirty([exam.batch_id for exam in exams])
             return JsonResponse({"message": "Question deleted successfully"})
         except QuestionBank.DoesNotExist:
             return JsonResponse({"error": "Question not found"}, status=404)
 
 # Get All Questions
+@conditional("questions", "courses", "cos")
 def get_questions(request):
     try:
-        question_list = QuestionBank.objects.all()
-        question_data = [
-            {
-                "question_id": question.question_id,
-                "question_text": question.question_text,
-                "marks": question.marks,
-                "course": question.course.title,
-                "co_label": question.co.co_label,
-            }
-            for question in question_list
-        ]
+        projection = QUESTION_LIST.for_request(request)
+        page = paginate(request, projection)
+        if page is not None:
+            return JsonResponse(page, status=200)
+        if wants_stream(request):
+            return streaming_json_response(projection, QuestionBank.objects.order_by("question_id"))
+        question_data = projection.rows()
         return JsonResponse(question_data, safe=False, status=200)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=400)
 
 
+# Full-text search over the question bank
+def search_questions(request):
+    if request.method == "GET":
+        text = request.GET.get("q", "").strip()
+        if not text:
+            return JsonResponse({"error": "q parameter is required"}, status=400)
+
+        filters = {}
+        for field in ("course", "co", "marks"):
+            value = request.GET.get(field)
+            if value:
+                try:
+                    filters[field] = int(value)
+                except ValueError:
+                    return JsonResponse({"error": f"{field} must be an integer"}, status=400)
+        try:
+            limit = max(1, min(int(request.GET.get("limit", 50)), 200))
+        except ValueError:
+            return JsonResponse({"error": "limit must be an integer"}, status=400)
+
+        results = search.search_questions(text, limit=limit, **filters)
+        return JsonResponse(results, safe=False, status=200)
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
 @csrf_exempt
 def add_exam_section(request, int_exam_id):
     if request.method == "POST":
@@ -1568,18 +1620,27 @@ class AddExamQuestionsView(APIView):
     def post(self, request):
         try:
             data = json.loads(request.body)
-            section = ExamSection.objects.get(section_id=data["section_id"])
-            question_ids = data["question_ids"]
-
-            # Remove all existing questions that are not in the selected list
-            ExamQuestion.objects.filter(section=section).exclude(question_bank__question_id__in=question_ids).delete()
-
-            # Add the new questions
-            for q_id in question_ids:
-                # Check if the question already exists to avoid duplicates
-                question = QuestionBank.objects.get(question_id=q_id)
-                if not ExamQuestion.objects.filter(section=section, question_bank=question).exists():
-                    ExamQuestion.objects.create(section=section, question_bank=question)
+            section = ExamSection.objects.select_related("internal_exam").get(section_id=data["section_id"])
+            question_ids = [int(q_id) for q_id in data["question_ids"]]
+            found = set(QuestionBank.objects.filter(question_id__in=question_ids).values_list("question_id", flat=True))
+            if not found.issuperset(question_ids):
+                raise QuestionBank.DoesNotExist("QuestionBank matching query does not exist.")
+
+            with transaction.atomic():
+                # Remove all existing questions that are not in the selected list, with their marks
+                removed = ExamQuestion.objects.filter(section=section).exclude(question_bank_id__in=question_ids)
+                cleared = list(QuestionMark.objects.filter(exam_question__in=removed).values_list("student_id", flat=True))
+                removed.delete()
+
+                # Add the new questions; ones already in the section are left as they are
+                ExamQuestion.objects.bulk_create(
+                    [ExamQuestion(section=section, question_bank_id=q_id) for q_id in question_ids],
+                    ignore_conflicts=True,
+                )
+                # bulk_create sends no signals: re-score the exam and flag its attainment once
+                exam = section.internal_exam
+                scoring.score_exam(exam, cleared=cleared)
+                snapshots.mark_dirty([exam.batch_id])
 
             return JsonResponse({"message": "Questions updated successfully!"}, status=201)
 
@@ -1659,42 +1720,44 @@ def generate_sections_content(sections):
 
     return content
 
+def compile_exam_pdf(data):
+    """Render the exam paper described by ``data`` and return the PDF bytes."""
+    sections_content = generate_sections_content(data['sections'])
+    tex_content = EXAM_TEMPLATE % (
+        data['exam_name'],
+        data['course_name'],
+        data['date'],
+        data['faculty_name'],
+        data['max_marks'],
+        data['duration'],
+        sections_content
+    )
+
+    # Compile in a private directory so concurrent previews and job workers
+    # never overwrite each other's files; it is removed afterwards
+    with tempfile.TemporaryDirectory() as build_dir:
+        with open(os.path.join(build_dir, "exam_temp.tex"), "w") as f:
+            f.write(tex_content)
+
+        subprocess.run(["pdflatex", "-interaction=nonstopmode", "exam_temp.tex"],
+                       cwd=build_dir, stdout=subprocess.PIPE)
+
+        with open(os.path.join(build_dir, "exam_temp.pdf"), "rb") as pdf_file:
+            return pdf_file.read()
+
+
 @csrf_exempt
 def generate_exam_preview(request):
     if request.method == "POST":
         try:
             data = json.loads(request.body)
-            
-            sections_content = generate_sections_content(data['sections'])
-            tex_content = EXAM_TEMPLATE % (
-                data['exam_name'],
-                data['course_name'],
-                data['date'],
-                data['faculty_name'],
-                data['max_marks'],
-                data['duration'],
-                sections_content
-            )
-
-            # Write and compile LaTeX
-            with open("exam_temp.tex", "w") as f:
-                f.write(tex_content)
-
-            subprocess.run(["pdflatex", "-interaction=nonstopmode", "exam_temp.tex"], 
-                         stdout=subprocess.PIPE)
+            if jobs.wants_async(request):
+                job = jobs.enqueue("exam_preview", data)
+                return jobs.accepted_response(job)
 
-            # Return the PDF file
-            with open("exam_temp.pdf", "rb") as pdf_file:
-                response = HttpResponse(pdf_file.read(), content_type='application/pdf')
-                response['Content-Disposition'] = 'inline; filename=exam_preview.pdf'
-                
-                # Cleanup
-                for file in ["exam_temp.aux", "exam_temp.log", "exam_temp.pdf", 
-                            "exam_temp.tex"]:
-                    if os.path.exists(file):
-                        os.remove(file)
-
-                return response
+            response = HttpResponse(compile_exam_pdf(data), content_type='application/pdf')
+            response['Content-Disposition'] = 'inline; filename=exam_preview.pdf'
+            return response
         except Exception as e:
             return JsonResponse({"error": str(e)}, status=500)
 
@@ -1794,37 +1857,39 @@ def upload_pdf(request):
         question_type = request.POST.get("question_type", "short answer")
         no_of_questions = int(request.POST.get("no_of_questions", 5))
 
-        # Ensure the "uploads" directory exists
-        upload_dir = "uploads"
-        if not os.path.exists(upload_dir):
-            os.makedirs(upload_dir)
-
         # Save the PDF file
-        saved_path = os.path.join(upload_dir, pdf.name)
-        with open(saved_path, "wb") as f:
-            for chunk in pdf.chunks():
-                f.write(chunk)
+        saved_path = default_storage.save("uploads/" + pdf.name, pdf)
+        if jobs.wants_async(request):
+            job = jobs.enqueue("generate_questions", {
+                "path": saved_path,
+                "question_type": question_type,
+                "no_of_questions": no_of_questions,
+            })
+            return jobs.accepted_response(job)
 
-        # Extract text from the PDF
-        extracted_text = extract_text_from_pdf(saved_path)
+        try:
+            # Extract text from the PDF
+            extracted_text = extract_text_from_pdf(default_storage.path(saved_path))
+        finally:
+            default_storage.delete(saved_path)
 
         # Generate questions
         questions = generate_questions_from_text(
             extracted_text, question_type=question_type, no_of_questions=no_of_questions
-        )   
+        )
         # Return the generated questions as a response
         return JsonResponse({"questions": questions})
 
     return JsonResponse({"error": "Invalid request"}, status=400)
+
+
+def get_cache_stats(request):
+    return JsonResponse(response_cache.get_stats())
+
 def get_dashboard_stats(request):
-    stats = {
-        "faculty": Faculty.objects.count(),
-        "courses": Course.objects.count(),
-        "batches": Batch.objects.count(),
-        "students": Student.objects.count(),
-        "levels": Level.objects.count(),
-        "programmes": Programme.objects.count(),
-    }
+    # Counters are kept up to date by signals and importers; ?recount=true forces a full count
+    recount = request.GET.get("recount", "").lower() in ("1", "true", "yes")
+    stats = counters.read(recount=recount)
     return JsonResponse(stats)
 
 @csrf_exempt
@@ -1832,47 +1897,27 @@ def upload_student_data(request):
     if request.method == "POST" and request.FILES.get("file"):
         uploaded_file = request.FILES["file"]
         file_path = default_storage.save("uploads/" + uploaded_file.name, uploaded_file)
+        if jobs.wants_async(request):
+            return jobs.accepted_response(jobs.enqueue("import_students", {
+                "path": file_path, "dry_run": importers.wants_dry_run(request)
+            }))
 
         try:
-            # Read CSV file
-            df = pd.read_csv(file_path, encoding="utf-8")
-
-            # Normalize column names (convert to lowercase & strip spaces)
-            df.columns = df.columns.str.strip().str.lower()
-
-            for _, row in df.iterrows():
-                programme_name = row.get("programme")
-                register_no = row.get("examination register number")
-                admission_no = row.get("admission no.")
-                name = row.get("name")
-
-                if not all([programme_name, register_no, admission_no, name]):
-                    continue  # Skip rows with missing required data
-
-                programme, _ = Programme.objects.get_or_create(programme_name=programme_name)
-                print('p-',programme)
-                print("reg_no=",register_no)
-                # Extract year of admission from register number (e.g., "NA24ECORO50" -> 2024)
-                year_of_admission = 2000 + int(register_no[2:4])
-                
-                print("yoa",year_of_admission)
-
-                Student.objects.update_or_create(
-                    admn_no=admission_no,
-                    defaults={
-                        "register_no": register_no,
-                        "name": name,
-                        "year_of_admission": year_of_admission,
-                        "programme": programme,
-                    },
-                )
-
-            os.remove(file_path)  # Clean up the uploaded file
-            return JsonResponse({"message": "Students added successfully"}, status=201)
+            # Read the CSV in chunks, keeping every column as text so ids are not parsed as numbers
+            chunks = importers.read_chunks(file_path, importers.STUDENT_COLUMNS, normalize=True)
+            if importers.wants_dry_run(request):
+                # Validate the whole file without writing anything
+                report = importers.run_validation(chunks, importers.validate_students, required=list(importers.STUDENT_COLUMNS))
+                return JsonResponse(report)
+            result = importers.run_import(chunks, importers.import_students)
+            return JsonResponse({"message": "Students added successfully", **result}, status=201)
 
         except Exception as e:
             return JsonResponse({"error": str(e)}, status=400)
 
+        finally:
+            default_storage.delete(file_path)  # Clean up the uploaded file
+
     return JsonResponse({"error": "Invalid request"}, status=400)
 
 
@@ -1881,35 +1926,25 @@ def upload_courses_csv(request):
     if request.method == 'POST' and request.FILES.get('file'):
         try:
             csv_file = request.FILES['file']
-            if not csv_file.name.endswith('.csv'):
-                return JsonResponse({'error': 'Invalid file format. Please upload a CSV file.'}, status=400)
-
-            # Read CSV file into pandas DataFrame
-            df = pd.read_csv(io.StringIO(csv_file.read().decode('utf-8')))
-
-            required_columns = {'course_code', 'course_title', 'dept_name', 'sem', 'credits', 'syllabus_year'}
-            if not required_columns.issubset(df.columns):
-                return JsonResponse({'error': 'Invalid CSV format. Required columns: course_code, course_title, dept_name, sem, credits, syllabus_year'}, status=400)
-
-            courses_to_create = []
-            for _, row in df.iterrows():
-                try:
-                    department = Department.objects.get(dept_name=row['dept_name'])  # Get Department instance
-                    course = Course(
-                        course_code=row['course_code'],
-                        title=row['course_title'],
-                        dept=department,  # Assign the Department instance
-                        semester=row['sem'],
-                        credits=row['credits'],
-                        syllabus_year=row['syllabus_year'],
-                        no_of_cos=1  # Default value
-                    )
-                    courses_to_create.append(course)
-                except ObjectDoesNotExist:
-                    return JsonResponse({'error': f'Department with name "{row["dept_name"]}" does not exist.'}, status=400)
-
-            Course.objects.bulk_create(courses_to_create)  # Bulk insert all courses at once
-            return JsonResponse({'message': 'Courses uploaded successfully!'}, status=201)
+            if not csv_file.name.lower().endswith(('.csv', '.xlsx')):
+                return JsonResponse({'error': 'Invalid file format. Please upload a CSV or .xlsx file.'}, status=400)
+            if jobs.wants_async(request):
+                file_path = default_storage.save("uploads/" + csv_file.name, csv_file)
+                return jobs.accepted_response(jobs.enqueue("import_courses", {
+                    "path": file_path, "dry_run": importers.wants_dry_run(request)
+                }))
+
+            # Read the upload in chunks straight from the file instead of decoding it all at once
+            chunks = importers.read_chunks(csv_file, importers.COURSE_COLUMNS)
+            if importers.wants_dry_run(request):
+                report = importers.run_validation(chunks, importers.validate_courses, required=importers.COURSE_COLUMNS)
+                return JsonResponse(report)
+            try:
+                result = importers.run_import(chunks, importers.import_courses, required=importers.COURSE_COLUMNS)
+            except importers.ImportRowError as e:
+                return JsonResponse({'error': str(e), 'rows_processed': e.rows_processed}, status=400)
+
+            return JsonResponse({'message': 'Courses uploaded successfully!', **result}, status=201)
 
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
@@ -1921,73 +1956,176 @@ class FacultyCSVUploadView(APIView):
         file = request.FILES.get("file")
         if not file:
             return Response({"error": "No file uploaded"}, status=400)
+        if jobs.wants_async(request):
+            file_path = default_storage.save("uploads/" + file.name, file)
+            return jobs.accepted_response(jobs.enqueue("import_faculty", {
+                "path": file_path, "dry_run": importers.wants_dry_run(request)
+            }))
 
         try:
-            df = pd.read_csv(file, dtype=str)
+            chunks = importers.read_chunks(file, importers.FACULTY_COLUMNS)
+            if importers.wants_dry_run(request):
+                report = importers.run_validation(chunks, importers.validate_faculty, required=importers.FACULTY_REQUIRED)
+                return Response(report)
+            try:
+                result = importers.run_import(chunks, importers.import_faculty)
+            except importers.ImportRowError as e:
+                return Response({"error": str(e), "rows_processed": e.rows_processed}, status=400)
 
-            created_faculty = []
-            skipped_faculty = []
+            return Response({
+                "message": "Faculty records processed successfully",
+                **result,
+            }, status=201)
 
-            for _, row in df.iterrows():
-                name = str(row.get("name", "")).strip()
-                dept_name = str(row.get("dept_name", "")).strip()
-                email = str(row.get("email", "")).strip()
-                phone_no = str(row.get("mob", "")).strip() or "123"  # Default password if empty
+        except Exception as e:
+            return Response({"error": str(e)}, status=500)
 
-                # Ignore records without a valid email
-                if not email or email.lower() == "nan":
-                    continue
 
-                # Check if email already exists
-                if Faculty.objects.filter(email=email).exists() or User.objects.filter(email=email).exists():
-                    skipped_faculty.append(name)
-                    continue  # Skip record if email already exists
+def get_job(request, job_id):
+    job = get_object_or_404(Job, job_id=job_id)
+    return JsonResponse(jobs.describe(job))
 
-                # Split name into first and last name
-                name_parts = name.split(" ", 1)
-                first_name = name_parts[0]
-                last_name = name_parts[1] if len(name_parts) > 1 else ""
 
-                # Set username as email prefix (before @)
-                username = email.split("@")[0]
+def get_job_result(request, job_id):
+    job = get_object_or_404(Job, job_id=job_id)
+    if job.status == Job.FAILED:
+        return JsonResponse({"error": job.error, **(job.result or {})}, status=500)
+    if job.status != Job.SUCCEEDED:
+        # Not finished yet; poll the status endpoint
+        return JsonResponse(jobs.describe(job), status=202)
+    if "file" in job.result:
+        response = FileResponse(default_storage.open(job.result["file"], "rb"),
+                                content_type=job.result["content_type"])
+        response['Content-Disposition'] = f'inline; filename={os.path.basename(job.result["file"])}'
+        return response
+    return JsonResponse(job.result)
 
-                # Fetch or create department
-                try:
-                    department = Department.objects.get(dept_name=dept_name)
-                except ObjectDoesNotExist:
-                    return Response({"error": f"Department '{dept_name}' does not exist"}, status=400)
-
-                # Create Faculty record
-                faculty = Faculty.objects.create(
-                    name=name,
-                    dept=department,
-                    email=email,
-                    phone_no=phone_no
-                )
-                created_faculty.append(faculty.name)
-
-                # Register user via UserRegistrationView
-                user_data = {
-                    "first_name": first_name,
-                    "last_name": last_name,
-                    "email": email,
-                    "username": username,
-                    "password": phone_no,  # Phone number as password
-                    "role": "teacher"
-                }
 
-                user_view = UserRegistrationView()
-                request._request.data = user_data  # Set request data properly
-                response = user_view.post(request._request)
- 
-                if response.status_code != 201:
-                    return Response({"error": f"Failed to create user for {name}", "details": response.data}, status=400)
-
-            return Response({
-                "message": "Faculty records processed successfully",
-                "created": created_faculty,
-                "skipped": skipped_faculty
-            }, status=201)
+@csrf_exempt
+def upload_external_marks(request, external_exam_id):
+    """Import an external exam's results from a CSV or .xlsx keyed on register number."""
+    if request.method == "POST" and request.FILES.get("file"):
+        exam = get_object_or_404(ExternalExam, external_exam_id=external_exam_id)
+        uploaded_file = request.FILES["file"]
+        if jobs.wants_async(request):
+            file_path = default_storage.save("uploads/" + uploaded_file.name, uploaded_file)
+            return jobs.accepted_response(jobs.enqueue("import_external_marks", {
+                "path": file_path, "external_exam_id": exam.pk
+            }))
 
+        try:
+            chunks = importers.read_chunks(uploaded_file, marks.EXTERNAL_MARK_COLUMNS, normalize=True)
+            result = importers.run_import(chunks, marks.external_marks_importer(exam))
         except Exception as e:
-            return Response({"error": str(e)}, status=500)
\ No newline at end of file
+            return JsonResponse({"error": str(e)}, status=400)
+        return JsonResponse({"message": "External marks imported", **result}, status=201)
+
+    return JsonResponse({"error": "Invalid request"}, status=400)
+
+
+@csrf_exempt
+def assessment_marks(request, kind, assessment_id):
+    """GET or bulk POST the marks of one assessment as [[student_id, marks], ...]."""
+    try:
+        assessment = marks.get_assessment(kind, assessment_id)
+    except KeyError:
+        return JsonResponse({"error": f"Unknown assessment type: {kind}"}, status=404)
+    except ObjectDoesNotExist:
+        return JsonResponse({"error": "Assessment not found"}, status=404)
+
+    if request.method == "GET":
+        return JsonResponse({"marks": marks.read_marks(kind, assessment.pk)})
+
+    if request.method == "POST":
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "Invalid JSON"}, status=400)
+        if isinstance(data, dict):
+            data = data.get("marks", [])
+        try:
+            result = marks.save_marks(kind, assessment, data)
+        except marks.MarksError as e:
+            return JsonResponse({"error": str(e), "errors": e.errors}, status=400)
+        return JsonResponse({"message": "Marks saved successfully", **result}, status=200)
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
+@csrf_exempt
+def question_marks(request, int_exam_id):
+    """GET or bulk POST an internal exam's students x questions marks grid."""
+    exam = get_object_or_404(InternalExam, int_exam_id=int_exam_id)
+    if request.method == "GET":
+        return JsonResponse(marks.read_question_marks(exam))
+
+    if request.method == "POST":
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "Invalid JSON"}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({"error": "Send student_ids, question_ids and marks."}, status=400)
+        try:
+            result = marks.save_question_marks(exam, data)
+        except marks.MarksError as e:
+            return JsonResponse({"error": str(e), "errors": e.errors}, status=400)
+        return JsonResponse({"message": "Marks saved successfully", **result}, status=200)
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
+@csrf_exempt
+def rescore_exam(request, int_exam_id):
+    # Totals are re-scored on every question marks or section change; this forces it
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request method."}, status=405)
+    result = scoring.rescore(int_exam_id)
+    if result is None:
+        return JsonResponse({"error": "Exam not found"}, status=404)
+    return JsonResponse({"message": "Exam re-scored", **result})
+
+
+def wants_live(request):
+    return request.GET.get("live", "").lower() in ("1", "true", "yes")
+
+
+def get_batch_attainment(request, batch_id):
+    # Served from the snapshots kept up to date by the job queue; ?live=true computes from marks
+    batch = get_object_or_404(Batch, batch_id=batch_id)
+    if wants_live(request):
+        return JsonResponse(attainment.batch_attainment(batch))
+    return JsonResponse(snapshots.batch_report(batch))
+
+
+@csrf_exempt
+def course_co_mapping(request, course_id):
+    """GET or PUT a course's whole CO x PO and CO x PSO strength grids."""
+    course = get_object_or_404(Course, course_id=course_id)
+    if request.method == "GET":
+        return JsonResponse(mapping.read_matrix(course))
+
+    if request.method in ("PUT", "POST"):
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "Invalid JSON"}, status=400)
+        try:
+            saved = mapping.save_matrix(course, data)
+        except mapping.MappingError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        return JsonResponse({"message": "Mapping saved successfully", "mapped": saved, **mapping.read_matrix(course)})
+
+    return JsonResponse({"error": "Invalid request method."}, status=405)
+
+
+def get_programme_attainment(request, programme_id):
+    year = request.GET.get("year")
+    if year and not year.isdigit():
+        return JsonResponse({"error": "year must be an integer"}, status=400)
+    programme = get_object_or_404(Programme, programme_id=programme_id)
+    year = int(year) if year else None
+    if wants_live(request):
+        return JsonResponse(attainment.programme_attainment(programme, year=year))
+    return JsonResponse(snapshots.programme_report(programme, year=year))
+